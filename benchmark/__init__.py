@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 18:30
+# @Author  : FebSun
+# @FileName: __init__.py
+# @Software: PyCharm
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 18:30
+# @Author  : FebSun
+# @FileName: memory.py
+# @Software: PyCharm
+"""
+比较基于 __dict__ 的旧设备表示和基于 __slots__ 的设备表示的内存占用以及序列化耗时
+
+    python -m benchmark.memory --devices 1000 --ports 50
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from core.resource.pool import ResourceDevice, register_attributes
+
+
+class DictDevice:
+    """
+    旧版本的设备表示，所有字段存储在 __dict__ 中
+    """
+
+    def __init__(self, name='', *args, **kwargs):
+        self.name = name
+        self.type = kwargs.get('type', None)
+        self.description = kwargs.get('description', None)
+        self.ports = dict()
+
+    def add_port(self, name, *args, **kwargs):
+        self.ports[name] = DictPort(self, name, *args, **kwargs)
+        return self.ports[name]
+
+    def to_dict(self):
+        ret = dict()
+        for key, value in self.__dict__.items():
+            if key == 'ports':
+                ret[key] = {port_name: port.to_dict() for port_name, port in value.items()}
+            else:
+                ret[key] = value
+        return ret
+
+    @staticmethod
+    def from_dict(dict_obj):
+        ret = DictDevice()
+        for key, value in dict_obj.items():
+            if key == 'ports':
+                setattr(ret, 'ports', {port_name: DictPort.from_dict(port, ret) for port_name, port in value.items()})
+            else:
+                setattr(ret, key, value)
+        return ret
+
+
+class DictPort:
+    def __init__(self, parent_device=None, name='', *args, **kwargs):
+        self.parent = parent_device
+        self.type = kwargs.get('type', None)
+        self.name = name
+        self.description = kwargs.get('description', None)
+        self.remote_ports = list()
+
+    def to_dict(self):
+        ret = dict()
+        for key, value in self.__dict__.items():
+            if key == 'parent':
+                ret[key] = value.name
+            elif key == 'remote_ports':
+                ret[key] = [{"device": port.parent.name, "port": port.name} for port in value]
+            else:
+                ret[key] = value
+        return ret
+
+    @staticmethod
+    def from_dict(dict_obj, parent):
+        ret = DictPort(parent)
+        for key, value in dict_obj.items():
+            if key == 'remote_ports' or key == 'parent':
+                continue
+            setattr(ret, key, value)
+        return ret
+
+
+def build(device_class, devices, ports):
+    ret = list()
+    for number in range(devices):
+        device = device_class(f'ap{number}', type='AP')
+        device.version = '1.0.0'
+        for port_number in range(ports):
+            port = device.add_port(f'ETH1/{port_number}', type='ETH')
+            port.speed = 1000
+        ret.append(device)
+    return ret
+
+
+def measure(device_class, devices, ports):
+    gc.collect()
+    tracemalloc.start()
+    objects = build(device_class, devices, ports)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # tracemalloc 会放大每次内存分配的耗时，耗时在关闭 tracemalloc 之后单独测量
+    del objects
+    gc.collect()
+    start = time.perf_counter()
+    objects = build(device_class, devices, ports)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dicts = [device.to_dict() for device in objects]
+    to_dict_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for dict_obj in dicts:
+        device_class.from_dict(dict_obj)
+    from_dict_time = time.perf_counter() - start
+    return {
+        'bytes_per_device': current / devices,
+        'build_seconds': build_time,
+        'to_dict_seconds': to_dict_time,
+        'from_dict_seconds': from_dict_time
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=1000)
+    parser.add_argument('--ports', type=int, default=50)
+    args = parser.parse_args()
+
+    register_attributes('device', 'AP', ['version'])
+    register_attributes('port', 'ETH', ['speed'])
+    result = {
+        'devices': args.devices,
+        'ports': args.ports,
+        'dict': measure(DictDevice, args.devices, args.ports),
+        'slots': measure(ResourceDevice, args.devices, args.ports)
+    }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == '__main__':
+    main()
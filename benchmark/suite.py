@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 01:55
+# @Author  : FebSun
+# @FileName: suite.py
+# @Software: PyCharm
+"""
+资源池的性能测试：在合成拓扑上测量加载、保存、占用/释放、设备选择以及嵌套连接限制条件的耗时和内存峰值，
+结果以 JSON 输出，指定 --baseline 时与上一次的结果比较，变慢超过 --threshold 的项目以非零状态退出
+
+    python -m benchmark.suite --aps 2000 --output result.json
+    python -m benchmark.suite --aps 2000 --baseline result.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmark.topology import TopologySpec, generate
+from core.resource.pool import ResourcePool
+from core.resource.predicate import AttrConstraint, PortAttrConstraint
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    PhoneMustBeAndroidConstraint, TrafficGeneratorSpeedMustGreaterThen
+
+
+class Benchmark:
+    """
+    一个测试项目，setup 的返回值作为 run 的参数，每次重复都重新 setup，setup 的耗时不计入结果
+    """
+
+    def __init__(self, name, run, setup=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+    def measure(self, repeat):
+        timings = list()
+        for _ in range(repeat):
+            state = self.setup() if self.setup else None
+            gc.collect()
+            start = time.perf_counter()
+            self.run(state)
+            timings.append(time.perf_counter() - start)
+        # 单独执行一次测量内存峰值，避免 tracemalloc 影响耗时
+        state = self.setup() if self.setup else None
+        gc.collect()
+        tracemalloc.start()
+        self.run(state)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'min_seconds': min(timings),
+            'median_seconds': statistics.median(timings),
+            'max_seconds': max(timings),
+            'repeat': repeat,
+            'peak_bytes': peak
+        }
+
+
+def build_benchmarks(spec, directory):
+    json_file = os.path.join(directory, 'pool.json')
+    snapshot_file = os.path.join(directory, 'pool.snapshot')
+    source = generate(spec)
+    source.save(json_file)
+    source.save_snapshot(snapshot_file)
+
+    def loaded(file_name=json_file):
+        def setup():
+            rp = ResourcePool()
+            rp.load(file_name, 'benchmark')
+            return rp
+        return setup
+
+    def reserved_file():
+        # 每次占用/释放都使用独立的文件，避免残留的占用信息影响下一次测量
+        file_name = os.path.join(directory, f'reserve-{time.perf_counter_ns()}.json')
+        source.save(file_name)
+        rp = ResourcePool()
+        rp.load(file_name, 'benchmark')
+        return rp
+
+    def reserve_release(rp):
+        rp.reserve()
+        rp.release()
+
+    def reserve_devices(rp):
+        devices = rp.reserve_any('AP', 50)
+        rp.release_devices(devices)
+
+    android = [PhoneMustBeAndroidConstraint('>=', 10)]
+    android_exact = [PhoneMustBeAndroidConstraint('=', 10)]
+    # 与 android 等价的列式条件，以及测试仪表的 10G 端口
+    android_columns = [AttrConstraint('version', '>=', 10, device_type='Android')]
+    tg_columns = [PortAttrConstraint('speed', '>=', 10000, port_type='ETH')]
+    traffic = [DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(10000))]
+    # AP 至少连接 2 台 STA，每台 STA 都要连接 10G 的测试仪表端口
+    nested = [ApMustHaveStaConnected([DeviceMustHaveTrafficGeneratorConnected(
+        TrafficGeneratorSpeedMustGreaterThen(10000))], sta_count=2)]
+
+    def columnar(constraints):
+        # 列式视图在第一次查询时建立，测量之前先建立好，只测量查询本身
+        def setup():
+            rp = loaded()()
+            rp.collect_all_device(None, constraints)
+            return rp
+        return setup
+
+    def fresh_pool():
+        rp = loaded()()
+        # 清空缓存，测量冷启动的耗时
+        rp.constraint_cache.clear()
+        return rp
+
+    return [
+        Benchmark('generate', lambda state: generate(spec)),
+        Benchmark('save_json', lambda rp: rp.save(os.path.join(directory, 'save.json')), lambda: source),
+        Benchmark('load_json', lambda state: ResourcePool().load(json_file, 'benchmark')),
+        Benchmark('load_json_lazy', lambda state: ResourcePool().load(json_file, 'benchmark', lazy=True)),
+        Benchmark('load_json_streaming', lambda state: ResourcePool().load(json_file, 'benchmark', streaming=True)),
+        Benchmark('load_json_types', lambda state: ResourcePool().load(json_file, 'benchmark', types=['AP'])),
+        Benchmark('save_snapshot', lambda rp: rp.save_snapshot(os.path.join(directory, 'save.snapshot')),
+                  lambda: source),
+        Benchmark('load_snapshot', lambda state: ResourcePool().load(snapshot_file, 'benchmark')),
+        Benchmark('reserve_release', reserve_release, reserved_file),
+        Benchmark('reserve_any_release', reserve_devices, reserved_file),
+        Benchmark('collect_device_index', lambda rp: rp.collect_device(None, 10, android_exact), loaded()),
+        Benchmark('collect_all_device_filter', lambda rp: rp.collect_all_device(None, android), loaded()),
+        Benchmark('collect_all_device_columns', lambda rp: rp.collect_all_device(None, android_columns),
+                  columnar(android_columns)),
+        Benchmark('collect_all_device_port_columns', lambda rp: rp.collect_all_device('TrafficGen', tg_columns),
+                  columnar(tg_columns)),
+        Benchmark('collect_all_device_connection', lambda rp: rp.collect_all_device('AP', traffic), fresh_pool),
+        Benchmark('collect_all_device_nested', lambda rp: rp.collect_all_device('AP', nested), fresh_pool),
+        Benchmark('collect_connection_route', lambda rp: [rp.collect_connection_route(device, nested) for device in
+                                                          rp.collect_all_device('AP', nested)], fresh_pool),
+    ]
+
+
+def run(spec, repeat=3, only=None):
+    with tempfile.TemporaryDirectory() as directory:
+        results = dict()
+        for benchmark in build_benchmarks(spec, directory):
+            if only and benchmark.name not in only:
+                continue
+            results[benchmark.name] = benchmark.measure(repeat)
+    return {
+        'spec': spec.to_dict(),
+        'devices': spec.devices,
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results
+    }
+
+
+def compare(result, baseline, threshold):
+    """
+    比较两次结果的最小耗时，返回变慢超过 threshold（比例）的项目 {名称: 比值}
+    """
+    regressions = dict()
+    for name, current in result['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None or not previous['min_seconds']:
+            continue
+        ratio = current['min_seconds'] / previous['min_seconds']
+        current['baseline_ratio'] = ratio
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--aps', type=int, default=1000)
+    parser.add_argument('--stas-per-ap', type=int, default=4)
+    parser.add_argument('--phones-per-ap', type=int, default=1)
+    parser.add_argument('--traffic-generators', type=int, default=16)
+    parser.add_argument('--tg-ports', type=int, default=64)
+    parser.add_argument('--sta-tg-ratio', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', help='只运行指定名称的项目')
+    parser.add_argument('--output', help='结果写入文件，默认输出到标准输出')
+    parser.add_argument('--baseline', help='上一次的结果文件')
+    parser.add_argument('--threshold', type=float, default=0.2, help='允许变慢的比例')
+    args = parser.parse_args()
+
+    spec = TopologySpec(args.aps, args.stas_per_ap, args.phones_per_ap, args.traffic_generators, args.tg_ports,
+                        sta_tg_ratio=args.sta_tg_ratio, seed=args.seed)
+    result = run(spec, args.repeat, args.only)
+    regressions = dict()
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(result, json.load(file), args.threshold)
+        result['regressions'] = regressions
+    output = json.dumps(result, indent=4)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 01:40
+# @Author  : FebSun
+# @FileName: topology.py
+# @Software: PyCharm
+"""
+生成用于性能测试的合成拓扑：
+每台 AP 有一个 WIFI 端口和一个 ETH 端口，ETH 端口连接测试仪表；
+每台 AP 的 WIFI 端口连接 stas_per_ap 台 STA 和 phones_per_ap 台 Android 手机，
+STA 的 ETH 端口轮流连接测试仪表端口，测试仪表端口的速率按 speeds 的权重随机分配
+"""
+import random
+
+from core.resource.pool import ResourcePool
+
+
+class TopologySpec:
+    """
+    合成拓扑的规模和属性分布，attributes 的值为 [(取值, 权重), ...]
+    """
+
+    def __init__(self, aps=1000, stas_per_ap=4, phones_per_ap=1, traffic_generators=16, tg_ports=64,
+                 speeds=((1000, 3), (10000, 1)), versions=((8, 1), (9, 2), (10, 4), (11, 2)),
+                 sta_tg_ratio=0.5, seed=0):
+        self.aps = aps
+        self.stas_per_ap = stas_per_ap
+        self.phones_per_ap = phones_per_ap
+        self.traffic_generators = traffic_generators
+        self.tg_ports = tg_ports
+        self.speeds = speeds
+        self.versions = versions
+        # 连接测试仪表的 STA 比例
+        self.sta_tg_ratio = sta_tg_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @property
+    def devices(self):
+        return self.aps * (1 + self.stas_per_ap + self.phones_per_ap) + self.traffic_generators
+
+
+def _choice(rng, distribution):
+    values = [value for value, weight in distribution]
+    weights = [weight for value, weight in distribution]
+    return rng.choices(values, weights)[0]
+
+
+def generate(spec=None):
+    """
+    按 spec 生成资源池，同样的 spec（包括 seed）总是生成同样的拓扑
+    """
+    spec = spec or TopologySpec()
+    rng = random.Random(spec.seed)
+    rp = ResourcePool()
+    rp.declare_index('version')
+    tg_ports = list()
+    for number in range(spec.traffic_generators):
+        tg = rp.add_device(f'tg{number}', type='TrafficGen')
+        for port_number in range(spec.tg_ports):
+            port = tg.add_port(f'ETH1/{port_number}', type='ETH')
+            port.speed = _choice(rng, spec.speeds)
+            tg_ports.append(port)
+    tg_cursor = 0
+
+    def next_tg_port():
+        nonlocal tg_cursor
+        if not tg_ports:
+            return None
+        port = tg_ports[tg_cursor % len(tg_ports)]
+        tg_cursor += 1
+        return port
+
+    for number in range(spec.aps):
+        ap = rp.add_device(f'ap{number}', type='AP')
+        wifi = ap.add_port('WIFI', type='WIFI')
+        eth = ap.add_port('ETH1/1', type='ETH')
+        tg_port = next_tg_port()
+        if tg_port is not None:
+            rp.link(eth, tg_port)
+        for sta_number in range(spec.stas_per_ap):
+            sta = rp.add_device(f'ap{number}-sta{sta_number}', type='STA')
+            rp.link(wifi, sta.add_port('WIFI', type='WIFI'))
+            sta_eth = sta.add_port('ETH1/1', type='ETH')
+            if rng.random() < spec.sta_tg_ratio:
+                tg_port = next_tg_port()
+                if tg_port is not None:
+                    rp.link(sta_eth, tg_port)
+        for phone_number in range(spec.phones_per_ap):
+            phone = rp.add_device(f'ap{number}-phone{phone_number}', type='Android')
+            phone.version = _choice(rng, spec.versions)
+            rp.link(wifi, phone.add_port('WIFI', type='WIFI'))
+    rp.rebuild_index()
+    return rp
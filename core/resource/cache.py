@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 13:10
+# @Author  : FebSun
+# @FileName: cache.py
+# @Software: PyCharm
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+_MISSING = object()
+
+
+class ConstraintCache:
+    """
+    限制条件结果的 LRU 缓存，以 (方法名, 限制条件的 key, 资源对象) 为键，
+    资源池的拓扑版本号变化时整个缓存失效，get_version 返回当前的拓扑版本号。
+    并发判断限制条件时多个线程共用同一个缓存，读写在锁内完成，计算在锁外完成
+    """
+
+    def __init__(self, get_version, maxsize=65536):
+        self.get_version = get_version
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_compute(self, key, compute):
+        version = self.get_version()
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+            value = self._data.get(key, _MISSING)
+            if value is not _MISSING:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return value
+            self.misses += 1
+        value = compute()
+        # 计算过程中拓扑可能被修改，此时结果不再可靠，不写入缓存
+        with self._lock:
+            if version == self.get_version() and version == self.version:
+                self._data[key] = value
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return value
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'version': self.version
+        }
+
+
+# 使用默认 repr 的对象（带有内存地址）在不同的进程中不一致，不能作为持久缓存的键
+_ADDRESS = re.compile(r' at 0x[0-9a-fA-F]+>')
+
+
+def selection_key(device_type, constraints, attributes=None):
+    """
+    设备选择的持久缓存键：设备类型、属性条件和所有限制条件 get_key 的规范 JSON 的 sha256，
+    有不可缓存的限制条件或者参数无法稳定序列化时返回 None
+    """
+    if not all(constraint.is_cacheable() for constraint in constraints):
+        return None
+    text = json.dumps([device_type, sorted((attributes or dict()).items()),
+                       [constraint.get_key() for constraint in constraints]], default=repr)
+    if _ADDRESS.search(text):
+        return None
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class SelectionCache:
+    """
+    跨会话的设备选择结果缓存，保存在资源文件旁边的 SQLite 数据库中，
+    以 (拓扑指纹, 选择键) 为键保存满足条件的全部设备名称。
+    条目数量超过 maxsize 时淘汰最久没有使用的条目
+    """
+
+    def __init__(self, path, maxsize=1024, timeout=5.0):
+        self.path = path
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS selection ("
+                "fingerprint TEXT NOT NULL, key TEXT NOT NULL, devices TEXT NOT NULL, "
+                "used REAL NOT NULL, PRIMARY KEY (fingerprint, key))")
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM selection").fetchone()[0]
+
+    def get(self, fingerprint, key):
+        """
+        返回缓存的设备名称列表，没有缓存时返回 None
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT devices FROM selection WHERE fingerprint = ? AND key = ?",
+                           (fingerprint, key)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        conn.execute("UPDATE selection SET used = ? WHERE fingerprint = ? AND key = ?",
+                     (time.time(), fingerprint, key))
+        return json.loads(row[0])
+
+    def put(self, fingerprint, key, names):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR REPLACE INTO selection (fingerprint, key, devices, used) VALUES (?, ?, ?, ?)",
+                         (fingerprint, key, json.dumps(names), time.time()))
+            conn.execute("DELETE FROM selection WHERE rowid NOT IN "
+                         "(SELECT rowid FROM selection ORDER BY used DESC, rowid DESC LIMIT ?)", (self.maxsize,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self._connect().execute("DELETE FROM selection")
+
+    def info(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self),
+            'maxsize': self.maxsize
+        }
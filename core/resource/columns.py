@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 04:10
+# @Author  : FebSun
+# @FileName: columns.py
+# @Software: PyCharm
+"""
+资源池设备和端口属性的列式视图（NumPy 数组），用于一次判断整列的属性条件。
+列在第一次使用时才从对象中提取；没有安装 NumPy 时 available 为 False，
+限制条件退回到逐个对象的 is_meet
+"""
+import operator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+OPERATORS = {
+    '=': operator.eq,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le
+}
+
+
+def available():
+    return numpy is not None
+
+
+def compare_value(op, value, expected):
+    """
+    单个值的比较，与 Column.compare 的结果一致：值为 None 或者类型无法比较时返回 False
+    """
+    if value is None:
+        return False
+    try:
+        return bool(OPERATORS[op](value, expected))
+    except TypeError:
+        return False
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Column:
+    """
+    一个属性的列：全部为整数或浮点数时存储为数值数组，valid 标记有值的行；
+    否则按不同的取值编码，codes 为每行取值在 categories 中的序号，没有值的行为 -1
+    """
+
+    def __init__(self, values):
+        present = [value for value in values if value is not None]
+        self.numeric = bool(present) and all(_is_number(value) for value in present)
+        if self.numeric:
+            dtype = numpy.int64 if all(isinstance(value, int) for value in present) else numpy.float64
+            self.valid = numpy.fromiter((value is not None for value in values), dtype=bool, count=len(values))
+            self.values = numpy.fromiter((0 if value is None else value for value in values), dtype=dtype,
+                                         count=len(values))
+            return
+        self._category_codes = codes = dict()
+        self.categories = list()
+        ret = numpy.empty(len(values), dtype=numpy.int32)
+        for row, value in enumerate(values):
+            if value is None:
+                ret[row] = -1
+                continue
+            key = (type(value), value) if _hashable(value) else None
+            code = codes.get(key) if key is not None else None
+            if code is None:
+                code = len(self.categories)
+                self.categories.append(value)
+                if key is not None:
+                    codes[key] = code
+            ret[row] = code
+        self.codes = ret
+
+    def set(self, row, value):
+        """
+        原地修改一行的值，数值列无法保存该值（类型不同）时返回 False
+        """
+        if self.numeric:
+            if value is None:
+                self.valid[row] = False
+                return True
+            if not _is_number(value) or (self.values.dtype == numpy.int64 and not isinstance(value, int)):
+                return False
+            self.values[row] = value
+            self.valid[row] = True
+            return True
+        if value is None:
+            self.codes[row] = -1
+            return True
+        key = (type(value), value) if _hashable(value) else None
+        code = self._category_codes.get(key) if key is not None else None
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(value)
+            if key is not None:
+                self._category_codes[key] = code
+        self.codes[row] = code
+        return True
+
+    def compare(self, op, expected):
+        """
+        返回每一行是否满足 值 op expected 的布尔数组
+        """
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op}")
+        if self.numeric:
+            if not _is_number(expected):
+                # 数值与其他类型只有 != 成立，其余比较在 Python 中返回 False 或抛出 TypeError
+                return self.valid.copy() if op == '!=' else numpy.zeros(len(self.valid), dtype=bool)
+            return OPERATORS[op](self.values, expected) & self.valid
+        # 对每个不同的取值比较一次，再按编码展开到所有行，最后一项对应没有值的行
+        table = numpy.array([compare_value(op, value, expected) for value in self.categories] + [False])
+        return table[self.codes]
+
+
+def _hashable(value):
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class ColumnTable:
+    """
+    设备和端口的列式视图，行号与 devices、ports 列表的序号一致，
+    port_parent 为每个端口所属设备的行号
+    """
+
+    def __init__(self, devices):
+        self.devices = list(devices)
+        self._rows = None
+        self._port_rows = None
+        self._ports = None
+        self._port_parent = None
+        self._device_columns = dict()
+        self._port_columns = dict()
+
+    @property
+    def ports(self):
+        if self._ports is None:
+            ports = list()
+            parent = list()
+            for number, device in enumerate(self.devices):
+                for port in device.ports.values():
+                    ports.append(port)
+                    parent.append(number)
+            self._ports = ports
+            self._port_parent = numpy.array(parent, dtype=numpy.intp)
+        return self._ports
+
+    @property
+    def port_parent(self):
+        self.ports
+        return self._port_parent
+
+    def device_column(self, attribute):
+        column = self._device_columns.get(attribute)
+        if column is None:
+            column = self._device_columns[attribute] = Column(
+                [getattr(device, attribute, None) for device in self.devices])
+        return column
+
+    def port_column(self, attribute):
+        column = self._port_columns.get(attribute)
+        if column is None:
+            column = self._port_columns[attribute] = Column([getattr(port, attribute, None) for port in self.ports])
+        return column
+
+    def device_rows(self, devices):
+        """
+        设备列表对应的行号数组
+        """
+        if self._rows is None:
+            self._rows = {id(device): number for number, device in enumerate(self.devices)}
+        rows = self._rows
+        return numpy.fromiter((rows[id(device)] for device in devices), dtype=numpy.intp, count=len(devices))
+
+    def apply(self, event):
+        """
+        应用一个拓扑修改事件（ChangeEvent）：属性修改只更新已经提取的列中的一个值，
+        其他修改无法增量更新时返回 False，此时需要重新生成列式视图
+        """
+        if event.op == 'link' or event.op == 'unlink':
+            return True
+        if event.op != 'set':
+            return False
+        resource = event.resource
+        if resource._category == 'port':
+            columns = self._port_columns
+            if event.attribute not in columns:
+                return True
+            if self._port_rows is None:
+                self._port_rows = {id(port): number for number, port in enumerate(self.ports)}
+            row = self._port_rows.get(id(resource))
+        else:
+            columns = self._device_columns
+            if event.attribute not in columns:
+                return True
+            if self._rows is None:
+                self._rows = {id(device): number for number, device in enumerate(self.devices)}
+            row = self._rows.get(id(resource))
+        if row is None:
+            return False
+        if not columns[event.attribute].set(row, event.value):
+            # 只丢弃这一列，下次使用时重新提取
+            del columns[event.attribute]
+        return True
+
+    def any_port(self, port_mask):
+        """
+        把端口的布尔数组归约到设备：设备至少有一个端口满足时为 True
+        """
+        return numpy.bincount(self.port_parent[port_mask], minlength=len(self.devices)) > 0
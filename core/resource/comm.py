@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 01:00
+# @Author  : FebSun
+# @FileName: comm.py
+# @Software: PyCharm
+import atexit
+import threading
+from contextlib import contextmanager
+
+# 作用域从小到大排列，结束一个作用域时同时结束比它小的作用域
+SCOPES = ('test', 'session', 'process')
+
+
+class CommRegistry:
+    """
+    配置接口实例的缓存，键为 ('device', 资源池编号, 设备名) 或 ('port', 资源池编号, 设备名, 端口名)。
+    实例在第一次使用时创建，按作用域批量关闭（调用实例的 disconnect），
+    同一个键的并发创建只会执行一次
+    """
+
+    def __init__(self):
+        self._instances = dict()
+        self._locks = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __contains__(self, key):
+        return key in self._instances
+
+    def get(self, key, scope, create):
+        if scope not in SCOPES:
+            raise ValueError(f"unknown scope {scope}, must be one of {SCOPES}")
+        entry = self._instances.get(key)
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            entry = self._instances.get(key)
+            if entry is None:
+                # 创建失败时不缓存，下次调用重新创建
+                entry = (scope, create())
+                self._instances[key] = entry
+        return entry[1]
+
+    def _pop(self, match):
+        with self._lock:
+            keys = [key for key, entry in self._instances.items() if match(key, entry[0])]
+            entries = [(key, self._instances.pop(key)[1]) for key in keys]
+            for key in keys:
+                self._locks.pop(key, None)
+        errors = list()
+        for key, instance in entries:
+            error = _close(instance)
+            if error is not None:
+                errors.append((key, error))
+        return errors
+
+    def end_scope(self, scope):
+        """
+        关闭 scope 以及更小作用域中的所有实例，返回关闭时出错的 [(键, 异常)]
+        """
+        scopes = SCOPES[:SCOPES.index(scope) + 1]
+        return self._pop(lambda key, entry_scope: entry_scope in scopes)
+
+    def teardown(self, devices=None, pool=None):
+        """
+        关闭资源池（编号为 pool，不属于任何资源池的资源为 None）中指定设备（设备名称）及其端口的实例，
+        devices 为 None 时关闭该资源池的全部实例。其他资源池中同名设备的实例不受影响
+        """
+        if devices is None:
+            return self._pop(lambda key, entry_scope: key[1] == pool)
+        devices = set(devices)
+        return self._pop(lambda key, entry_scope: key[1] == pool and key[2] in devices)
+
+    def invalidate(self, key):
+        """
+        出错之后丢弃一个实例，下次使用时重新创建
+        """
+        return self._pop(lambda other, entry_scope: other == key)
+
+
+def _close(instance):
+    disconnect = getattr(instance, 'disconnect', None)
+    if disconnect is None:
+        return None
+    try:
+        disconnect()
+    except Exception as error:
+        return error
+    return None
+
+
+comm_registry = CommRegistry()
+atexit.register(comm_registry.end_scope, 'process')
+
+
+def comm_key(resource):
+    """
+    资源对应的缓存键，设备为 ('device', 资源池编号, 设备名)，端口为 ('port', 资源池编号, 设备名, 端口名)，
+    资源池编号为所属资源池的 comm_id，不同资源池中的同名设备使用不同的实例
+    """
+    parent = getattr(resource, 'parent', None)
+    if parent is not None and hasattr(resource, 'remote_ports'):
+        return 'port', _pool_id(parent), parent.name, resource.name
+    return 'device', _pool_id(resource), resource.name
+
+
+def _pool_id(device):
+    return getattr(getattr(device, '_pool', None), 'comm_id', None)
+
+
+@contextmanager
+def using_comm(resource):
+    """
+    获取资源的配置接口实例，代码块中出现异常时丢弃缓存的实例，避免后续用例使用状态异常的连接：
+
+        with using_comm(device) as comm:
+            comm.send_and_wait('reboot', 'login:')
+    """
+    instance = resource.get_comm_instance()
+    try:
+        yield instance
+    except BaseException:
+        comm_registry.invalidate(comm_key(resource))
+        raise
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 08:20
+# @Author  : FebSun
+# @FileName: events.py
+# @Software: PyCharm
+
+
+class ChangeEvent:
+    """
+    资源池的拓扑修改事件，op 取值：
+    'add_device'、'remove_device'：resource 为设备；
+    'add_port'：resource 为端口；
+    'link'、'unlink'：resource 和 peer 为连接的两个端口；
+    'set'：resource 为设备或端口，attribute、value、old 为属性名、新值和旧值；
+    'touch'：无法确定范围的修改（直接修改 remote_ports、重建索引、重新加载等），派生的数据结构需要全部重建
+    """
+
+    __slots__ = ('op', 'resource', 'peer', 'attribute', 'value', 'old')
+
+    def __init__(self, op, resource=None, peer=None, attribute=None, value=None, old=None):
+        self.op = op
+        self.resource = resource
+        self.peer = peer
+        self.attribute = attribute
+        self.value = value
+        self.old = old
+
+    def devices(self):
+        """
+        事件涉及的设备，'touch' 事件返回 None
+        """
+        if self.op == 'touch':
+            return None
+        ret = list()
+        for resource in (self.resource, self.peer):
+            if resource is None:
+                continue
+            device = resource.parent if resource._category == 'port' else resource
+            if all(device is not item for item in ret):
+                ret.append(device)
+        return ret
+
+    def __repr__(self):
+        ret = f"ChangeEvent({self.op}"
+        if self.resource is not None:
+            ret += f", {_describe(self.resource)}"
+        if self.peer is not None:
+            ret += f", {_describe(self.peer)}"
+        if self.attribute is not None:
+            ret += f", {self.attribute}={self.value!r}"
+        return ret + ')'
+
+
+def _describe(resource):
+    if resource._category == 'port':
+        return f"{resource.parent.name}:{resource.name}"
+    return resource.name
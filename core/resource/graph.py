@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 19:40
+# @Author  : FebSun
+# @FileName: graph.py
+# @Software: PyCharm
+from array import array
+
+
+class Route:
+    """
+    一条连接路由，hops 为 [(本端端口, 对端端口), ...]，第一个本端端口属于源设备，最后一个对端端口属于目标设备
+    """
+
+    def __init__(self, hops):
+        self.hops = hops
+
+    @property
+    def source(self):
+        return self.hops[0][0].parent
+
+    @property
+    def target(self):
+        return self.hops[-1][1].parent
+
+    @property
+    def devices(self):
+        return [self.source] + [remote_port.parent for local_port, remote_port in self.hops]
+
+    def __len__(self):
+        return len(self.hops)
+
+    def __iter__(self):
+        return iter(self.hops)
+
+    def __repr__(self):
+        path = ' -> '.join(f"{local.parent.name}:{local.name}~{remote.parent.name}:{remote.name}"
+                           for local, remote in self.hops)
+        return f"Route({path})"
+
+
+class ConnectivityGraph:
+    """
+    资源池端口连接关系的 CSR 表示：
+    同一设备的端口编号连续，device_offsets[d]..device_offsets[d+1] 为设备 d 的端口，
+    link_offsets[p]..link_offsets[p+1] 为端口 p 在 link_targets 中的对端端口。
+    apply 增量地应用连接的修改：修改过的端口的对端端口记录在 overrides 中，不再重排 CSR 数组
+    """
+
+    def __init__(self, devices):
+        self.devices = list(devices)
+        self.device_ids = {id(device): number for number, device in enumerate(self.devices)}
+        self.device_types = [device.type for device in self.devices]
+        self.ports = list()
+        self.port_types = list()
+        self.port_device = array('I')
+        self.device_offsets = array('I', [0])
+        self.port_ids = port_ids = dict()
+        self.overrides = dict()
+        for number, device in enumerate(self.devices):
+            for port in device.ports.values():
+                port_ids[id(port)] = len(self.ports)
+                self.ports.append(port)
+                self.port_types.append(port.type)
+                self.port_device.append(number)
+            self.device_offsets.append(len(self.ports))
+        self.link_offsets = array('I', [0])
+        self.link_targets = array('I')
+        for port in self.ports:
+            for remote_port in port.remote_ports:
+                # 连接到图以外设备的端口被忽略
+                remote_id = port_ids.get(id(remote_port))
+                if remote_id is not None:
+                    self.link_targets.append(remote_id)
+            self.link_offsets.append(len(self.link_targets))
+
+    def _remote_ids(self, port_id):
+        links = self.overrides.get(port_id) if self.overrides else None
+        if links is not None:
+            return links
+        return self.link_targets[self.link_offsets[port_id]:self.link_offsets[port_id + 1]]
+
+    def apply(self, event):
+        """
+        应用一个拓扑修改事件（ChangeEvent），无法增量更新时返回 False，此时需要重新生成连接关系图
+        """
+        if event.op == 'set':
+            # 设备和端口的类型不能通过 set_attribute 修改，其他属性不影响连接关系图
+            return True
+        if event.op != 'link' and event.op != 'unlink':
+            return False
+        port1 = self.port_ids.get(id(event.resource))
+        port2 = self.port_ids.get(id(event.peer))
+        if port1 is None or port2 is None:
+            return False
+        for local, remote in ((port1, port2), (port2, port1)):
+            links = list(self._remote_ids(local))
+            if event.op == 'link':
+                links.append(remote)
+            elif remote in links:
+                links.remove(remote)
+            self.overrides[local] = links
+            if port1 == port2:
+                break
+        return True
+
+    def _device_id(self, device):
+        number = self.device_ids.get(id(device))
+        if number is None:
+            raise KeyError(f"device {device.name} is not in the graph")
+        return number
+
+    def neighbors(self, device, port_type=None):
+        """
+        直接相连的 (本端端口, 对端端口)
+        """
+        ret = list()
+        number = self._device_id(device)
+        for port_id in range(self.device_offsets[number], self.device_offsets[number + 1]):
+            if port_type is not None and self.port_types[port_id] != port_type:
+                continue
+            for remote_id in self._remote_ids(port_id):
+                ret.append((self.ports[port_id], self.ports[remote_id]))
+        return ret
+
+    def _bfs(self, source, max_hops, port_types, via_types, is_target, limit=None):
+        """
+        以设备为单位的广度优先搜索，返回 (按跳数排序的目标设备编号, 前驱表)。
+        port_types 限制经过的端口类型，via_types 限制中间设备的类型
+        """
+        device_offsets, link_offsets, link_targets = self.device_offsets, self.link_offsets, self.link_targets
+        overrides = self.overrides
+        port_device, port_types_list, device_types = self.port_device, self.port_types, self.device_types
+        parents = {source: None}
+        frontier = [source]
+        targets = list()
+        hops = 0
+        while frontier and (max_hops is None or hops < max_hops):
+            hops += 1
+            next_frontier = list()
+            for device in frontier:
+                for port_id in range(device_offsets[device], device_offsets[device + 1]):
+                    if port_types is not None and port_types_list[port_id] not in port_types:
+                        continue
+                    links = overrides.get(port_id) if overrides else None
+                    if links is None:
+                        links = link_targets[link_offsets[port_id]:link_offsets[port_id + 1]]
+                    for remote_id in links:
+                        if port_types is not None and port_types_list[remote_id] not in port_types:
+                            continue
+                        remote_device = port_device[remote_id]
+                        if remote_device in parents:
+                            continue
+                        parents[remote_device] = (device, port_id, remote_id)
+                        if is_target(remote_device):
+                            targets.append(remote_device)
+                            if limit is not None and len(targets) >= limit:
+                                return targets, parents
+                        if via_types is None or device_types[remote_device] in via_types:
+                            next_frontier.append(remote_device)
+            frontier = next_frontier
+        return targets, parents
+
+    def _route(self, parents, target):
+        hops = list()
+        while parents[target] is not None:
+            device, port_id, remote_id = parents[target]
+            hops.append((self.ports[port_id], self.ports[remote_id]))
+            target = device
+        hops.reverse()
+        return Route(hops)
+
+    def reachable(self, source, max_hops=1, port_types=None, via_types=None, target_type=None):
+        """
+        k 跳以内可达的设备，返回 {设备: 跳数}
+        """
+        source_id = self._device_id(source)
+        targets, parents = self._bfs(source_id, max_hops, port_types, via_types,
+                                     self._type_filter(target_type))
+        ret = dict()
+        for target in targets:
+            ret[self.devices[target]] = len(self._route(parents, target))
+        return ret
+
+    def paths(self, source, target_type=None, max_hops=1, port_types=None, via_types=None, count=None):
+        """
+        从 source 出发到每一个满足 target_type 的设备的最短路由，按跳数从小到大排列
+        """
+        source_id = self._device_id(source)
+        targets, parents = self._bfs(source_id, max_hops, port_types, via_types,
+                                     self._type_filter(target_type), count)
+        return [self._route(parents, target) for target in targets]
+
+    def shortest_path(self, source, target, max_hops=None, port_types=None, via_types=None):
+        """
+        两个设备之间的最短路由，不可达时返回 None
+        """
+        source_id = self._device_id(source)
+        target_id = self._device_id(target)
+        targets, parents = self._bfs(source_id, max_hops, port_types, via_types,
+                                     lambda device: device == target_id, 1)
+        return self._route(parents, target_id) if targets else None
+
+    def _type_filter(self, target_type):
+        if target_type is None:
+            return lambda device: True
+        device_types = self.device_types
+        return lambda device: device_types[device] == target_type
+
+
+def component(resource):
+    """
+    沿着连接关系收集设备所在的连通分量，用于不属于任何资源池的设备
+    """
+    seen = {id(resource): resource}
+    stack = [resource]
+    while stack:
+        device = stack.pop()
+        for port in device.ports.values():
+            for remote_port in port.remote_ports:
+                remote_device = remote_port.parent
+                if id(remote_device) not in seen:
+                    seen[id(remote_device)] = remote_device
+                    stack.append(remote_device)
+    return seen.values()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 10:02
+# @Author  : FebSun
+# @FileName: index.py
+# @Software: PyCharm
+
+
+def _hashable(value):
+    """
+    把索引值转换为可哈希的形式，列表转换为元组，无法哈希时返回 None
+    """
+    if isinstance(value, list):
+        value = tuple(_hashable(item) for item in value)
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return value
+
+
+def _port_key(port):
+    return port.parent.name, port.name
+
+
+class ResourceIndex:
+    """
+    资源池的二级索引，按设备类型、端口类型以及声明的属性建立索引，
+    每个索引桶是 dict，设备按加入索引时分配的序号排列，查询结果保持资源池的顺序。
+    设备不按序号加入索引桶时（属性被修改、指定了序号），在下一次查询之前重新排序
+    """
+
+    def __init__(self, device_attributes=(), port_attributes=()):
+        self.device_attributes = set(device_attributes)
+        self.port_attributes = set(port_attributes)
+        self.device_count = 0
+        self._devices = dict()
+        self._sequence = dict()
+        self._next = 0
+        self._unsorted = dict()
+        self._device_type = dict()
+        self._port_type = dict()
+        self._device_attr = dict()
+        self._port_attr = dict()
+
+    def clear(self):
+        self.device_count = 0
+        self._devices.clear()
+        self._sequence.clear()
+        self._next = 0
+        self._unsorted.clear()
+        self._device_type.clear()
+        self._port_type.clear()
+        self._device_attr.clear()
+        self._port_attr.clear()
+
+    def rebuild(self, topology, sequence=None, first=0):
+        """
+        sequence 返回设备的序号，返回 None 时从 first 开始依次分配
+        """
+        self.clear()
+        self._next = first
+        for device in topology.values():
+            self.add_device(device, None if sequence is None else sequence(device.name))
+
+    def sequence(self, device):
+        """
+        设备在资源池中的序号，按序号排序即为资源池的顺序
+        """
+        return self._sequence[device.name]
+
+    def _insert(self, bucket, device):
+        if bucket and self._sequence[next(reversed(bucket))] > self._sequence[device.name]:
+            self._unsorted[id(bucket)] = bucket
+        bucket[device.name] = device
+
+    def _sort(self):
+        sequence = self._sequence
+        for bucket in self._unsorted.values():
+            items = sorted(bucket.items(), key=lambda item: sequence[item[0]])
+            bucket.clear()
+            bucket.update(items)
+        self._unsorted.clear()
+
+    def declare(self, category, attribute):
+        """
+        声明需要建立索引的属性，category 取值为 'device' 或 'port'，
+        声明后需要调用 rebuild 重新建立索引
+        """
+        if category == 'device':
+            self.device_attributes.add(attribute)
+        elif category == 'port':
+            self.port_attributes.add(attribute)
+        else:
+            raise ValueError(f"unknown index category {category}")
+
+    def add_device(self, device, sequence=None):
+        if sequence is None:
+            sequence = self._next
+        self._next = max(self._next, sequence + 1)
+        self._sequence[device.name] = sequence
+        self._insert(self._devices, device)
+        self._insert(self._device_type.setdefault(device.type, dict()), device)
+        for attribute in self.device_attributes:
+            self._add_device_attr(attribute, device)
+        for port in device.ports.values():
+            self.add_port(port)
+        self.device_count += 1
+
+    def remove_device(self, device):
+        bucket = self._device_type.get(device.type)
+        if bucket is None or bucket.get(device.name) is not device:
+            return
+        del bucket[device.name]
+        del self._devices[device.name]
+        for attribute in self.device_attributes:
+            self._remove_attr(self._device_attr, attribute, device, device.name)
+        for port in device.ports.values():
+            self.remove_port(port)
+        del self._sequence[device.name]
+        self.device_count -= 1
+
+    def add_port(self, port):
+        key = _port_key(port)
+        self._port_type.setdefault(port.type, dict())[key] = port
+        for attribute in self.port_attributes:
+            self._add_attr(self._port_attr, attribute, port, key)
+
+    def remove_port(self, port):
+        key = _port_key(port)
+        bucket = self._port_type.get(port.type)
+        if bucket is not None:
+            bucket.pop(key, None)
+        for attribute in self.port_attributes:
+            self._remove_attr(self._port_attr, attribute, port, key)
+
+    def update_device(self, device, attribute, value):
+        """
+        修改设备属性并更新该属性的索引，设备在类型索引中的位置不变
+        """
+        indexed = attribute in self.device_attributes
+        if indexed:
+            self._remove_attr(self._device_attr, attribute, device, device.name)
+        setattr(device, attribute, value)
+        if indexed:
+            self._add_device_attr(attribute, device)
+
+    def update_port(self, port, attribute, value):
+        indexed = attribute in self.port_attributes
+        if indexed:
+            self._remove_attr(self._port_attr, attribute, port, _port_key(port))
+        setattr(port, attribute, value)
+        if indexed:
+            self._add_attr(self._port_attr, attribute, port, _port_key(port))
+
+    def devices(self, device_type=None, **attributes):
+        """
+        按设备类型和属性值查询设备，device_type 为 None 时不限制类型
+        """
+        if self._unsorted:
+            self._sort()
+        buckets = list()
+        if device_type is not None:
+            buckets.append(self._device_type.get(device_type, dict()))
+        buckets.extend(self._attr_buckets(self._device_attr, self.device_attributes, attributes))
+        if not buckets:
+            return list(self._devices.values())
+        return self._intersect(buckets, self._device_type)
+
+    def ports(self, port_type=None, device_type=None, **attributes):
+        """
+        按端口类型、所属设备类型和端口属性查询端口
+        """
+        buckets = list()
+        if port_type is not None:
+            buckets.append(self._port_type.get(port_type, dict()))
+        buckets.extend(self._attr_buckets(self._port_attr, self.port_attributes, attributes))
+        ret = self._intersect(buckets, self._port_type)
+        if device_type is not None:
+            ret = [port for port in ret if port.parent.type == device_type]
+        return ret
+
+    def count(self, device_type):
+        return len(self._device_type.get(device_type, ()))
+
+    def _add_device_attr(self, attribute, device):
+        value = _hashable(getattr(device, attribute, None))
+        if value is None:
+            return
+        self._insert(self._device_attr.setdefault(attribute, dict()).setdefault(value, dict()), device)
+
+    @staticmethod
+    def _add_attr(index, attribute, resource, key):
+        value = _hashable(getattr(resource, attribute, None))
+        if value is None:
+            return
+        index.setdefault(attribute, dict()).setdefault(value, dict())[key] = resource
+
+    @staticmethod
+    def _remove_attr(index, attribute, resource, key):
+        value = _hashable(getattr(resource, attribute, None))
+        if value is None:
+            return
+        bucket = index.get(attribute, dict()).get(value)
+        if bucket is not None:
+            bucket.pop(key, None)
+
+    @staticmethod
+    def _attr_buckets(index, declared, attributes):
+        for attribute, value in attributes.items():
+            if attribute not in declared:
+                raise ValueError(f"attribute {attribute} is not indexed")
+            yield index.get(attribute, dict()).get(_hashable(value), dict())
+
+    @staticmethod
+    def _intersect(buckets, all_buckets):
+        if not buckets:
+            ret = list()
+            for bucket in all_buckets.values():
+                ret.extend(bucket.values())
+            return ret
+        # 从最小的索引桶开始，用其余的桶做成员判断
+        buckets = sorted(buckets, key=len)
+        smallest, others = buckets[0], buckets[1:]
+        return [value for key, value in smallest.items() if all(key in other for other in others)]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 02:30
+# @Author  : FebSun
+# @FileName: instrument.py
+# @Software: PyCharm
+"""
+资源选择热点路径的统计：
+
+    with instrumentation.enable(trace=True):
+        rp.load('pool.json', 'alice')
+        rp.collect_device('AP', 2, constraints)
+    print(instrumentation.report())
+    print(instrumentation.rejections)
+
+关闭时不做任何包装，没有额外开销；打开时替换限制条件、资源池操作和 get_comm_instance 的类属性，
+关闭时恢复原来的方法
+"""
+import cProfile
+import io
+import pstats
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+
+POOL_OPERATIONS = ('load', 'save', 'save_snapshot', 'reserve', 'release', 'reserve_devices', 'release_devices',
+                   'reserve_any', 'collect_device', 'collect_all_device', 'collect_connection_route',
+                   'collect_connection_paths', 'match_topology', 'prewarm', 'compact')
+
+
+class OperationStats:
+    """
+    一类操作的调用次数和耗时，self_elapsed 不包括嵌套调用的其他被统计操作的耗时
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.elapsed = 0.0
+        self.self_elapsed = 0.0
+        self.max = 0.0
+        self.rejected = 0
+
+    def record(self, elapsed, self_elapsed):
+        self.calls += 1
+        self.elapsed += elapsed
+        self.self_elapsed += self_elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+
+class Rejection:
+    """
+    一次限制条件不满足的记录，depth 为嵌套深度，0 表示直接由选择过程调用
+    """
+
+    def __init__(self, resource, constraint, depth):
+        self.resource = resource
+        self.constraint = constraint
+        self.depth = depth
+
+    def __repr__(self):
+        return f"{'  ' * self.depth}{_resource_name(self.resource)} rejected by {type(self.constraint).__name__}: " \
+               f"{self.constraint.get_description()}"
+
+
+def _resource_name(resource):
+    parent = getattr(resource, 'parent', None)
+    if parent is not None and hasattr(resource, 'remote_ports'):
+        return f"{parent.name}:{resource.name}"
+    return getattr(resource, 'name', repr(resource))
+
+
+class Instrumentation:
+    """
+    统计数据按 (类别, 名称) 汇总，类别为：
+    pool（资源池操作）、constraint（限制条件类的 is_meet）、connection（get_connection）、
+    instance（每个限制条件实例）、comm（按资源类型统计的 get_comm_instance）。
+    hooks 中的回调在每次操作结束后以 (类别, 名称, 耗时, 对象) 调用
+    """
+
+    def __init__(self, max_rejections=10000):
+        self.enabled = False
+        self.stats = dict()
+        self.hooks = list()
+        self.rejections = deque(maxlen=max_rejections)
+        self.trace = False
+        self.profiler = None
+        self._patched = dict()
+        self._local = threading.local()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def reset(self):
+        self.stats = dict()
+        self.rejections.clear()
+
+    def _stats(self, category, name):
+        key = (category, name)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = OperationStats()
+        return stats
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = list()
+        return stack
+
+    def _wrap(self, method, category, name_of, check=None):
+        instrumentation = self
+
+        @wraps(method)
+        def wrapper(obj, *args, **kwargs):
+            stack = instrumentation._stack()
+            # 栈中记录每一层嵌套调用的类别和子操作耗时，用于计算 self_elapsed
+            frame = [category, 0.0]
+            stack.append(frame)
+            start = perf_counter()
+            try:
+                result = method(obj, *args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                stack.pop()
+                children = frame[1]
+                if stack:
+                    stack[-1][1] += elapsed
+                name = name_of(obj)
+                instrumentation._stats(category, name).record(elapsed, elapsed - children)
+                for hook in instrumentation.hooks:
+                    hook(category, name, elapsed, obj)
+            if check is not None:
+                check(obj, args, result, stack, elapsed, elapsed - children)
+            return result
+
+        wrapper._instrumented = method
+        return wrapper
+
+    def _constraint_checked(self, constraint, args, result, stack, elapsed, self_elapsed):
+        instance = self._stats('instance', f"{type(constraint).__name__}: {constraint.get_description()}")
+        instance.record(elapsed, self_elapsed)
+        if not result:
+            instance.rejected += 1
+            self._stats('constraint', type(constraint).__name__).rejected += 1
+            self._rejected(constraint, args, stack)
+
+    def _connection_checked(self, constraint, args, result, stack, elapsed, self_elapsed):
+        # get_connection 返回空列表同样表示资源不满足条件
+        if not result or not any(result):
+            self._stats('connection', type(constraint).__name__).rejected += 1
+            self._rejected(constraint, args, stack)
+
+    def _rejected(self, constraint, args, stack):
+        if self.trace and args:
+            # 嵌套深度只计算外层的限制条件，不计算资源池操作
+            depth = sum(1 for frame in stack if frame[0] != 'pool' and frame[0] != 'comm')
+            self.rejections.append(Rejection(args[0], constraint, depth))
+
+    def _patch(self, cls, name, wrapper_factory):
+        method = cls.__dict__.get(name)
+        if method is None or getattr(method, '__isabstractmethod__', False) or (cls, name) in self._patched:
+            return
+        self._patched[(cls, name)] = method
+        setattr(cls, name, wrapper_factory(method))
+
+    def _install(self):
+        from core.resource.pool import Constraint, DevicePort, ResourceDevice, ResourcePool
+
+        for operation in POOL_OPERATIONS:
+            self._patch(ResourcePool, operation,
+                        lambda method, operation=operation: self._wrap(method, 'pool', lambda obj: operation))
+        for cls in (ResourceDevice, DevicePort):
+            self._patch(cls, 'get_comm_instance',
+                        lambda method: self._wrap(method, 'comm', lambda obj: obj.type))
+        classes = [Constraint]
+        while classes:
+            cls = classes.pop()
+            classes.extend(cls.__subclasses__())
+            self._patch(cls, 'is_meet', lambda method: self._wrap(
+                method, 'constraint', lambda obj: type(obj).__name__, self._constraint_checked))
+            self._patch(cls, 'get_connection', lambda method: self._wrap(
+                method, 'connection', lambda obj: type(obj).__name__, self._connection_checked))
+
+    def _uninstall(self):
+        for (cls, name), method in self._patched.items():
+            setattr(cls, name, method)
+        self._patched = dict()
+
+    def start(self, trace=False, profile=False):
+        """
+        打开统计，trace 为 True 时记录被拒绝的设备，profile 为 True 时同时运行 cProfile
+        """
+        if self.enabled:
+            self.stop()
+        self.trace = trace
+        self._install()
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.enabled = True
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        self._uninstall()
+        self.enabled = False
+
+    @contextmanager
+    def enable(self, trace=False, profile=False, reset=True):
+        if reset:
+            self.reset()
+        self.start(trace, profile)
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    def report(self, limit=None):
+        """
+        按总耗时排序的统计报告
+        """
+        rows = sorted(self.stats.items(), key=lambda item: item[1].elapsed, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        lines = [f"{'category':<11} {'name':<60} {'calls':>9} {'total ms':>10} {'self ms':>10} {'max ms':>9} "
+                 f"{'rejected':>9}"]
+        for (category, name), stats in rows:
+            if len(name) > 60:
+                name = name[:57] + '...'
+            lines.append(f"{category:<11} {name:<60} {stats.calls:>9} {stats.elapsed * 1e3:>10.3f} "
+                         f"{stats.self_elapsed * 1e3:>10.3f} {stats.max * 1e3:>9.3f} {stats.rejected:>9}")
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {f"{category}/{name}": stats.to_dict() for (category, name), stats in self.stats.items()}
+
+    def profile_report(self, sort='cumulative', limit=30):
+        if self.profiler is None:
+            return ''
+        output = io.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 03:10
+# @Author  : FebSun
+# @FileName: journal.py
+# @Software: PyCharm
+"""
+资源文件旁边的追加式修改日志（<资源文件>.journal），每行一个 JSON 记录：
+第一行为 {"journal": 1, "base": <资源文件的 sha256>}，之后每行是一次修改，例如
+{"op": "link", "port1": ["ap1", "ETH1/1"], "port2": ["tg", "ETH1/1"]}。
+资源文件被替换之后 base 不再匹配，旧的日志自动失效；最后一行写到一半时（进程崩溃）被忽略
+"""
+import fcntl
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+VERSION = 1
+
+
+def file_digest(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def journal_path(filename):
+    return f"{filename}.journal"
+
+
+class Journal:
+    """
+    修改日志的读写，lock 使用单独的锁文件（<日志>.lock）与其他进程互斥，日志压缩时锁文件不会被替换。
+    offset 为已经读取到的位置，read 只返回在此之后追加的记录。
+    日志文件保持打开，其他进程压缩日志（替换为新文件）之后仍然可以读完旧日志中剩余的记录
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.base = None
+        self.offset = 0
+        self.count = 0
+        self._file = None
+        self._locked = 0
+
+    @staticmethod
+    def exists(filename):
+        return os.path.exists(journal_path(filename))
+
+    @contextmanager
+    def lock(self):
+        # 允许同一个进程内嵌套加锁
+        if self._locked:
+            self._locked += 1
+            try:
+                yield
+            finally:
+                self._locked -= 1
+            return
+        with open(f"{self.path}.lock", 'a') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            self._locked = 1
+            try:
+                yield
+            finally:
+                self._locked = 0
+                fcntl.flock(file, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        """
+        打开日志文件并读取头部，头部无效时返回 None
+        """
+        self.close()
+        self._file = open(self.path, 'rb')
+        try:
+            header = json.loads(self._file.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get('journal') != VERSION:
+            self.close()
+            return None
+        self.offset = self._file.tell()
+        return header
+
+    def create(self, base):
+        """
+        原子地创建只有头部的日志，已有的日志被替换
+        """
+        temp = f"{self.path}.tmp"
+        with open(temp, 'wb') as file:
+            file.write((json.dumps({'journal': VERSION, 'base': base}) + '\n').encode())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp, self.path)
+        self._open()
+        self.base = base
+        self.count = 0
+
+    def open(self, base):
+        """
+        打开已有的日志，返回全部记录；日志的 base 与资源文件不一致时返回 None
+        """
+        header = self._open()
+        if header is None or header.get('base') != base:
+            self.close()
+            return None
+        self.base = base
+        self.count = 0
+        return self.read()
+
+    def rotated(self):
+        """
+        日志是否已经被其他进程压缩（替换为新的文件）
+        """
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _read(self):
+        records = list()
+        self._file.seek(self.offset)
+        for line in self._file:
+            if not line.endswith(b'\n'):
+                # 没有写完的记录
+                break
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            self.offset += len(line)
+        return records
+
+    def read(self):
+        """
+        读取 offset 之后的完整记录，调用时需要持有锁。
+        日志被其他进程压缩时，旧日志中剩余的记录已经包含在新的资源文件中，
+        但是本进程还没有应用，所以先读完旧日志，再从新日志的开头继续读取
+        """
+        records = self._read()
+        if self.rotated():
+            header = self._open()
+            if header is None:
+                raise ValueError(f"invalid journal {self.path}")
+            self.base = header['base']
+            self.count = 0
+            records.extend(self._read())
+        self.count += len(records)
+        return records
+
+    def append(self, records):
+        """
+        追加记录并写入磁盘，调用之前需要先用 read 读取其他进程追加的记录。
+        offset 之后只可能是崩溃时没有写完的记录，先截断，否则新的记录会接在半行后面而无法解析
+        """
+        data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records).encode()
+        with self.lock():
+            with open(self.path, 'r+b') as file:
+                file.truncate(self.offset)
+                file.seek(self.offset)
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+                self.offset = file.tell()
+        self.count += len(records)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 14:20
+# @Author  : FebSun
+# @FileName: loader.py
+# @Software: PyCharm
+import hashlib
+import json
+import sys
+from operator import itemgetter
+
+from core.resource.snapshot import SnapshotTopology
+
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonStreamReader:
+    """
+    增量读取资源配置文件的 JSON 解析器，
+    顶层的 info、reserved 作为整体返回，devices 中的设备逐个返回，不需要一次性读入整个文件
+    """
+
+    def __init__(self, file, chunk_size=1 << 20):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # 丢弃已经解析过的内容，缓冲区只保留当前正在解析的对象
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("unexpected end of resource file")
+        return self.buffer[self.pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"expect '{char}' at offset {self.pos} of resource file")
+        self.pos += 1
+
+    def _decode(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # 数字等没有结束符的值可能被截断，需要读到后续内容才能确认
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def _members(self):
+        """
+        遍历当前对象的成员，返回成员名称，调用方负责解析成员的值
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            yield key
+            char = self._peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError(f"expect ',' or '}}' at offset {self.pos} of resource file")
+
+    def __iter__(self):
+        """
+        返回 ('device', 设备名称, 设备字典) 或者 (顶层字段名, None, 值)
+        """
+        for key in self._members():
+            if key == 'devices':
+                for name in self._members():
+                    yield 'device', name, self._decode()
+            else:
+                yield key, None, self._decode()
+
+
+class DeferredLinks:
+    """
+    一次遍历完成连接关系的映射：对端设备还没有加载时，先在表中记录占位，
+    对端设备加载之后再回填，保持 remote_ports 的原有顺序
+    """
+
+    def __init__(self, topology):
+        self.topology = topology
+        self.pending = dict()
+
+    def add_device(self, name, device, dict_obj):
+        for port_name, port in dict_obj.get('ports', dict()).items():
+            port_obj = device.ports[port_name]
+            for remote_port in port.get('remote_ports', list()):
+                remote_device = self.topology.get(remote_port['device'])
+                if remote_device is not None:
+                    port_obj.remote_ports.append(remote_device.ports[remote_port['port']])
+                else:
+                    key = (remote_port['device'], remote_port['port'])
+                    self.pending.setdefault(key, list()).append((port_obj, len(port_obj.remote_ports)))
+                    port_obj.remote_ports.append(None)
+        # 回填等待当前设备的端口
+        for port_name, port_obj in device.ports.items():
+            for waiting_port, position in self.pending.pop((name, port_name), list()):
+                waiting_port.remote_ports[position] = port_obj
+
+    def finish(self):
+        """
+        对端设备没有被加载（被过滤掉）的连接直接丢弃，返回丢弃的连接数量
+        """
+        dropped = 0
+        ports = dict()
+        for waiting in self.pending.values():
+            for waiting_port, position in waiting:
+                ports[id(waiting_port)] = waiting_port
+                dropped += 1
+        for port in ports.values():
+            port.remote_ports[:] = [remote for remote in port.remote_ports if remote is not None]
+        self.pending.clear()
+        return dropped
+
+
+class LinkReferences:
+    """
+    尚未映射的连接关系，links 为对端端口的 (设备名, 端口名)，
+    第一次访问 remote_ports 时才在 topology 中查找对端端口。
+    skip_missing 为 True 时忽略没有加载的对端设备
+    """
+
+    __slots__ = ('topology', 'links', 'skip_missing')
+
+    def __init__(self, topology, links, skip_missing=False):
+        self.topology = topology
+        self.links = links
+        self.skip_missing = skip_missing
+
+    def __call__(self):
+        topology = self.topology
+        return [topology[device].ports[port] for device, port in self.references()]
+
+    def references(self):
+        if self.skip_missing:
+            return [(device, port) for device, port in self.links if device in self.topology]
+        return list(self.links)
+
+
+_link_device = itemgetter('device')
+_link_port = itemgetter('port')
+
+
+def lazy_links(pool, device, dict_obj):
+    """
+    延迟映射设备的连接关系：端口只记录对端的 (设备名, 端口名)，
+    第一次访问 remote_ports 时才创建 RemotePorts 并映射。
+    名称使用 intern 的字符串，同一个设备名或端口名只保存一份
+    """
+    device._pool = pool
+    _link_references(device, dict_obj)
+
+
+def _link_references(device, dict_obj):
+    intern = sys.intern
+    ports = device.ports
+    for port_name, port in dict_obj.get('ports', dict()).items():
+        links = port.get('remote_ports')
+        if links:
+            ports[port_name]._remote_ports = tuple(zip(map(intern, map(_link_device, links)),
+                                                       map(intern, map(_link_port, links))))
+
+
+class JsonReader:
+    """
+    已经解析的资源文件中的设备字典，接口与 SnapshotReader 相同，供 JsonTopology 按需创建设备
+    """
+
+    def __init__(self, devices):
+        self.devices = devices
+        self._names = list(devices)
+        self.device_count = len(self._names)
+        self._numbers = None
+        self._types = None
+        self._digest = None
+
+    def close(self):
+        pass
+
+    def digest(self):
+        if self._digest is None:
+            text = json.dumps(self.devices, sort_keys=True)
+            self._digest = hashlib.sha256(text.encode()).hexdigest()
+        return self._digest
+
+    def name(self, number):
+        return self._names[number]
+
+    def names(self):
+        return list(self._names)
+
+    def find(self, name):
+        if self._numbers is None:
+            self._numbers = {name: number for number, name in enumerate(self._names)}
+        return self._numbers.get(name)
+
+    def numbers_of_type(self, device_type):
+        if self._types is None:
+            self._types = dict()
+            for number, name in enumerate(self._names):
+                self._types.setdefault(self.devices[name].get('type'), list()).append(number)
+        return self._types.get(device_type, ())
+
+    def read_device(self, number):
+        return self.devices[self._names[number]], None
+
+
+class JsonTopology(SnapshotTopology):
+    """
+    lazy 加载 JSON 资源文件时的拓扑：只保留解析出来的设备字典，
+    设备在第一次被访问或者查询该类型时才创建，端口只记录对端的 (设备名, 端口名)
+    """
+
+    def __init__(self, devices, on_load=None):
+        super().__init__(JsonReader(devices), on_load)
+
+    def _attach_links(self, device, dict_obj, links):
+        _link_references(device, dict_obj)
+
+
+def stream_load(pool, filename, owner=None, types=None, names=None, chunk_size=1 << 20, ignore_reserved=False,
+                lazy=False):
+    """
+    以流的方式加载资源文件到资源池中。
+    指定 types 或 names 时只加载类型在 types 中或名称在 names 中的设备，
+    连接到未加载设备的端口会被丢弃，此时资源池标记为 partial，不允许保存。
+    lazy 为 True 时连接关系在第一次访问 remote_ports 时才映射
+    """
+    from core.resource.pool import ResourceDevice, ResourceError
+
+    types = set(types) if types is not None else None
+    names = set(names) if names is not None else None
+    filtered = types is not None or names is not None
+    links = DeferredLinks(pool.topology)
+    with open(filename) as file:
+        for kind, name, value in JsonStreamReader(file, chunk_size):
+            if kind == 'reserved':
+                if not ignore_reserved and value and value['owner'] != owner:
+                    raise ResourceError(f"Resource is reserved by {value['owner']}")
+                pool.reserved = value
+            elif kind == 'info':
+                pool.information = value
+            elif kind == 'device':
+                if filtered and not ((types is not None and value.get('type') in types) or
+                                     (names is not None and name in names)):
+                    continue
+                device = ResourceDevice.from_dict(value)
+                pool.topology[name] = device
+                if lazy:
+                    lazy_links(pool, device, value)
+                else:
+                    links.add_device(name, device, value)
+    links.finish()
+    pool.partial = filtered
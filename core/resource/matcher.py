@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 20:50
+# @Author  : FebSun
+# @FileName: matcher.py
+# @Software: PyCharm
+from time import perf_counter
+
+
+class Role:
+    """
+    拓扑请求中的一个角色，对应一台设备。
+    exclusive 为 False 的角色之间可以分配同一台设备，例如多个 STA 可以连接同一台测试仪表
+    """
+
+    def __init__(self, name, device_type, constraints=None, attributes=None, exclusive=True):
+        self.name = name
+        self.device_type = device_type
+        self.constraints = list(constraints or list())
+        self.attributes = attributes
+        self.exclusive = exclusive
+
+
+class Link:
+    """
+    两个角色之间的一条连接，分配结果为 (role1 设备的端口, role2 设备的端口)。
+    exclusive 为 True 的连接独占所用的端口；为 False 时端口可以被其他非独占连接共用，
+    例如 AP 的一个 WIFI 端口连接多台 STA
+    """
+
+    def __init__(self, role1, role2, port_type=None, remote_port_type=None, port_constraints=None,
+                 remote_port_constraints=None, exclusive=True):
+        self.role1 = role1
+        self.role2 = role2
+        self.port_type = port_type
+        self.remote_port_type = remote_port_type
+        self.port_constraints = list(port_constraints or list())
+        self.remote_port_constraints = list(remote_port_constraints or list())
+        self.exclusive = exclusive
+
+
+class TopologyRequest:
+    """
+    由角色和连接组成的拓扑模式，例如 1 台 AP 连接 3 台 STA，每台 STA 连接测试仪表的不同端口：
+
+        request = TopologyRequest()
+        request.add_role('ap', 'AP')
+        request.add_role('tg', 'TrafficGen', exclusive=False)
+        for i in range(3):
+            request.add_role(f'sta{i}', 'STA')
+            request.add_link('ap', f'sta{i}', 'WIFI', 'WIFI', exclusive=False)
+            request.add_link(f'sta{i}', 'tg', 'ETH', 'ETH',
+                             remote_port_constraints=[TrafficGeneratorSpeedMustGreaterThen(1000)])
+    """
+
+    def __init__(self):
+        self.roles = dict()
+        self.links = list()
+
+    def add_role(self, name, device_type, constraints=None, attributes=None, exclusive=True):
+        if name in self.roles:
+            raise ValueError(f"role {name} already exists")
+        self.roles[name] = Role(name, device_type, constraints, attributes, exclusive)
+        return self.roles[name]
+
+    def add_link(self, role1, role2, port_type=None, remote_port_type=None, port_constraints=None,
+                 remote_port_constraints=None, exclusive=True):
+        for role in (role1, role2):
+            if role not in self.roles:
+                raise ValueError(f"role {role} does not exist")
+        if role1 == role2:
+            raise ValueError("a link must connect two different roles")
+        link = Link(role1, role2, port_type, remote_port_type, port_constraints, remote_port_constraints, exclusive)
+        self.links.append(link)
+        return link
+
+
+class TopologyMatch:
+    """
+    拓扑请求的分配结果，devices 为 {角色: 设备}，links 与请求中的连接一一对应，为 (端口, 对端端口)
+    """
+
+    def __init__(self, devices, links, score=None):
+        self.devices = devices
+        self.links = links
+        self.score = score
+
+    def __getitem__(self, role):
+        return self.devices[role]
+
+
+class MatchTimeout(Exception):
+    pass
+
+
+class TopologyMatcher:
+    """
+    带约束传播的回溯搜索：
+    每个角色的候选设备先通过资源池的索引和限制条件得到；
+    每次选择候选最少的角色（MRV），与已分配角色相连的角色只在已分配设备的邻居中选择；
+    连接两端都分配之后为连接选择未被占用的端口对
+    """
+
+    def __init__(self, pool, request, timeout=None, exclude=None):
+        self.pool = pool
+        self.request = request
+        self.timeout = timeout
+        self.exclude = set(exclude or ())
+        self.timed_out = False
+        self.nodes = 0
+        self._deadline = None
+        self._domains = dict()
+        self._positions = dict()
+        self._role_links = {name: list() for name in request.roles}
+        for number, link in enumerate(request.links):
+            self._role_links[link.role1].append(number)
+            self._role_links[link.role2].append(number)
+
+    def _base_domains(self):
+        for name, role in self.request.roles.items():
+            devices = [device for device in
+                       self.pool.collect_all_device(role.device_type, role.constraints, role.attributes)
+                       if device.name not in self.exclude]
+            self._domains[name] = devices
+            self._positions[name] = {id(device): position for position, device in enumerate(devices)}
+
+    def solve(self, best=False, score=None):
+        """
+        返回第一个（best 为 False）或者 score 最小的（best 为 True）分配，找不到时返回 None。
+        超时后返回已经找到的最优分配，并设置 timed_out
+        """
+        if best and score is None:
+            raise ValueError("score is required to search the best match")
+        self._deadline = None if self.timeout is None else perf_counter() + self.timeout
+        self._base_domains()
+        found = None
+        try:
+            for match in self._search(dict(), dict(), dict(), dict()):
+                if not best:
+                    return match
+                match.score = score(match)
+                if found is None or match.score < found.score:
+                    found = match
+        except MatchTimeout:
+            self.timed_out = True
+        return found
+
+    def _check_timeout(self):
+        self.nodes += 1
+        if self._deadline is not None and self.nodes % 64 == 0 and perf_counter() > self._deadline:
+            raise MatchTimeout()
+
+    def _link_ends(self, link, role):
+        """
+        从 role 一侧看连接：返回 (本端端口类型, 本端端口限制, 对端角色, 对端端口类型, 对端端口限制)
+        """
+        if link.role1 == role:
+            return link.port_type, link.port_constraints, link.role2, link.remote_port_type, \
+                link.remote_port_constraints
+        return link.remote_port_type, link.remote_port_constraints, link.role1, link.port_type, \
+            link.port_constraints
+
+    def _port_meet(self, port, port_type, constraints, exclusive, used_ports):
+        links = used_ports.get(id(port))
+        if links and (exclusive or any(self.request.links[number].exclusive for number in links)):
+            return False
+        if port_type is not None and port.type != port_type:
+            return False
+        return all(constraint.is_meet(port) for constraint in constraints)
+
+    def _neighbors(self, device, role, link, used_ports):
+        """
+        device 作为 role 时，通过 link 能连接到的设备
+        """
+        port_type, constraints, other, remote_port_type, remote_constraints = self._link_ends(link, role)
+        ret = dict()
+        for port in device.ports.values():
+            if not self._port_meet(port, port_type, constraints, link.exclusive, used_ports):
+                continue
+            for remote_port in port.remote_ports:
+                if self._port_meet(remote_port, remote_port_type, remote_constraints, link.exclusive, used_ports):
+                    ret[id(remote_port.parent)] = remote_port.parent
+        return ret
+
+    def _domain(self, role, assignment, used_ports):
+        domain = self._domains[role]
+        for number in self._role_links[role]:
+            link = self.request.links[number]
+            other = link.role2 if link.role1 == role else link.role1
+            if other not in assignment:
+                continue
+            neighbors = self._neighbors(assignment[other], other, link, used_ports)
+            if len(neighbors) < len(domain):
+                # 邻居比候选少时遍历邻居，并按候选的原有顺序排序，保证结果确定
+                positions = self._positions[role]
+                members = {id(device) for device in domain}
+                domain = sorted((device for key, device in neighbors.items() if key in members),
+                                key=lambda device: positions[id(device)])
+            else:
+                domain = [device for device in domain if id(device) in neighbors]
+            if not domain:
+                break
+        return domain
+
+    def _available(self, role, device, owners):
+        roles = owners.get(id(device))
+        if not roles:
+            return True
+        if self.request.roles[role].exclusive:
+            return False
+        return all(not self.request.roles[other].exclusive for other in roles)
+
+    def _search(self, assignment, owners, used_ports, link_ports):
+        self._check_timeout()
+        unassigned = [role for role in self.request.roles if role not in assignment]
+        if not unassigned:
+            yield TopologyMatch(dict(assignment), [link_ports[number] for number in range(len(self.request.links))])
+            return
+        # MRV：选择候选设备最少的角色
+        role, domain = None, None
+        for candidate in unassigned:
+            candidate_domain = self._domain(candidate, assignment, used_ports)
+            if domain is None or len(candidate_domain) < len(domain):
+                role, domain = candidate, candidate_domain
+            if not domain:
+                return
+        for device in domain:
+            if not self._available(role, device, owners):
+                continue
+            assignment[role] = device
+            owners.setdefault(id(device), list()).append(role)
+            completed = [number for number in self._role_links[role]
+                         if self._other(number, role) in assignment]
+            yield from self._assign_links(completed, 0, assignment, owners, used_ports, link_ports)
+            owners[id(device)].remove(role)
+            del assignment[role]
+
+    def _other(self, number, role):
+        link = self.request.links[number]
+        return link.role2 if link.role1 == role else link.role1
+
+    def _assign_links(self, completed, position, assignment, owners, used_ports, link_ports):
+        if position == len(completed):
+            yield from self._search(assignment, owners, used_ports, link_ports)
+            return
+        number = completed[position]
+        link = self.request.links[number]
+        device1, device2 = assignment[link.role1], assignment[link.role2]
+        for port in device1.ports.values():
+            if not self._port_meet(port, link.port_type, link.port_constraints, link.exclusive, used_ports):
+                continue
+            for remote_port in port.remote_ports:
+                if remote_port.parent is not device2 or \
+                        not self._port_meet(remote_port, link.remote_port_type, link.remote_port_constraints,
+                                            link.exclusive, used_ports):
+                    continue
+                # used_ports 记录每个端口被哪些连接使用
+                used_ports.setdefault(id(port), list()).append(number)
+                used_ports.setdefault(id(remote_port), list()).append(number)
+                link_ports[number] = (port, remote_port)
+                yield from self._assign_links(completed, position + 1, assignment, owners, used_ports, link_ports)
+                del link_ports[number]
+                used_ports[id(port)].remove(number)
+                used_ports[id(remote_port)].remove(number)
+                self._check_timeout()
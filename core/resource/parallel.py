@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 21:30
+# @Author  : FebSun
+# @FileName: parallel.py
+# @Software: PyCharm
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+import os
+
+from core.resource.pool import ResourceError, ResourcePool
+from core.resource.server import _dumps, _loads
+
+# 子进程中的资源池副本，由进程池的 initializer 创建
+_worker_pool = None
+
+
+def _init_worker(json_object):
+    """
+    进程池的 initializer：每个子进程按资源池的内容创建一份副本，之后只按名称传递设备
+    """
+    global _worker_pool
+    _worker_pool = ResourcePool()
+    _worker_pool._from_json(json_object)
+    _worker_pool.rebuild_index()
+
+
+def _evaluate_names(constraints, names):
+    topology = _worker_pool.topology
+    return _evaluate_chunk(constraints, [topology[name] for name in names])
+
+
+def _get_connection_by_name(constraint, data):
+    """
+    在子进程的资源池副本中执行 get_connection，资源和结果中的设备、端口都按名称序列化
+    """
+    resource = _loads(data, _worker_pool.topology)
+    return _dumps(constraint.get_connection(resource), _worker_pool)[0]
+
+
+def _linked(devices):
+    return any(port._references() for device in devices for port in device.ports.values())
+
+
+def _evaluate_chunk(constraints, devices):
+    """
+    判断一组设备，返回满足全部限制条件的设备在这一组中的序号。
+    进程池中运行时参数和返回值都需要序列化，因此只返回序号
+    """
+    ret = list()
+    for number, device in enumerate(devices):
+        for constraint in constraints:
+            if not constraint.is_meet(device):
+                break
+        else:
+            ret.append(number)
+    return ret
+
+
+def _get_connection(constraint, resource):
+    return constraint.get_connection(resource)
+
+
+class ParallelEvaluator:
+    """
+    把候选设备分块交给线程池或进程池判断限制条件：
+    同时只提交有限个数的块，结果按块的顺序合并，与串行执行的顺序完全一致；
+    已经按顺序凑够 count 个设备时取消剩余的块。
+    kind 为 'thread' 时适合会释放 GIL 的限制条件（IO、外部命令），
+    'process' 时适合纯 Python 计算，此时限制条件必须可以 pickle，并且在子进程中无法使用资源池的限制条件缓存。
+    进程池中只传递设备名称，子进程在启动时创建一份资源池的副本（资源池修改之后重新创建进程池）；
+    使用外部传入的进程池或者没有资源池时直接传递设备，此时设备不能有连接关系
+    """
+
+    def __init__(self, kind='thread', workers=None, chunk_size=64, executor=None):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"unknown executor kind {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor = executor
+        self._owned = executor is None
+        # 子进程中资源池副本对应的 (资源池, 版本号)
+        self._replica = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == 'thread':
+                self._executor = ThreadPoolExecutor(self.workers)
+            else:
+                self._executor = ProcessPoolExecutor(self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None and self._owned:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+            self._replica = None
+
+    def _replicate(self, pool):
+        """
+        确保进程池的子进程中有资源池当前版本的副本
+        """
+        if self._replica is not None and self._replica[0] is pool and self._replica[1] == pool.version:
+            return
+        self.shutdown()
+        self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(pool._to_json(),))
+        self._replica = (pool, pool.version)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def filter(self, devices, constraints, count=None, pool=None):
+        """
+        返回满足全部限制条件的设备，顺序与 devices 相同，count 不为 None 时最多返回 count 个，
+        pool 为 devices 所在的资源池
+        """
+        if not constraints:
+            return list(devices)[:count]
+        constraints = list(constraints)
+        evaluate = _evaluate_chunk
+        if self.kind == 'process':
+            if pool is not None and self._owned:
+                self._replicate(pool)
+                evaluate = _evaluate_names
+            else:
+                devices = list(devices)
+                if _linked(devices):
+                    raise ResourceError('devices with connections cannot be sent to a process pool, '
+                                        'pass the resource pool instead')
+        chunks = iter(lambda it=iter(devices): list(islice(it, self.chunk_size)), [])
+        # 最多同时提交 workers 的两倍个块，凑够 count 之后不会再有大量无用的块在执行
+        window = self.workers * 2
+        pending = list()
+        ret = list()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    names = [device.name for device in chunk] if evaluate is _evaluate_names else chunk
+                    pending.append((chunk, self.executor.submit(evaluate, constraints, names)))
+                if not pending:
+                    return ret
+                # 只有最早提交的块完成之后才能确定结果的顺序
+                wait([pending[0][1]], return_when=FIRST_COMPLETED)
+                while pending and pending[0][1].done():
+                    chunk, future = pending.pop(0)
+                    ret.extend(chunk[number] for number in future.result())
+                    if count is not None and len(ret) >= count:
+                        return ret[:count]
+        finally:
+            for chunk, future in pending:
+                future.cancel()
+
+    def map_connections(self, constraints, resource, pool=None):
+        """
+        并发执行每个连接限制条件的 get_connection，按 constraints 的顺序返回结果，
+        遇到没有连接的限制条件时取消其余的任务，并返回 (限制条件, None)。
+        进程池中在子进程的资源池副本中执行，结果映射回 pool 中的设备和端口，因此必须传入 pool
+        """
+        if self.kind == 'process':
+            if pool is None or not self._owned:
+                raise ResourceError('connection constraints need the resource pool to run in a process pool')
+            self._replicate(pool)
+            data = _dumps(resource, pool)[0]
+            futures = [self.executor.submit(_get_connection_by_name, constraint, data) for constraint in constraints]
+        else:
+            futures = [self.executor.submit(_get_connection, constraint, resource) for constraint in constraints]
+        try:
+            ret = list()
+            for constraint, future in zip(constraints, futures):
+                conns = future.result()
+                if self.kind == 'process':
+                    conns = _loads(conns, pool.topology)
+                if not any(conns):
+                    return ret, constraint
+                ret.append(conns)
+            return ret, None
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 11:05
+# @Author  : FebSun
+# @FileName: planner.py
+# @Software: PyCharm
+from time import perf_counter
+
+from core.resource import columns
+
+
+class ConstraintStatistics:
+    """
+    记录某一个限制条件（类型和参数都相同）的实测代价和通过率
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.passed = 0
+        self.elapsed = 0.0
+
+    def record(self, elapsed, passed):
+        self.calls += 1
+        self.elapsed += elapsed
+        if passed:
+            self.passed += 1
+
+    @property
+    def cost(self):
+        return self.elapsed / self.calls if self.calls else None
+
+    @property
+    def selectivity(self):
+        return self.passed / self.calls if self.calls else None
+
+
+class PlanStage:
+    """
+    查询计划中的一个阶段，index 阶段通过索引获取候选设备，
+    vector 阶段在列式视图上一次判断所有候选设备，filter 阶段逐个判断限制条件
+    """
+
+    def __init__(self, kind, description, constraint=None, cost=None, selectivity=None):
+        self.kind = kind
+        self.description = description
+        self.constraint = constraint
+        # 统计数据的键，编译时计算一次
+        self.key = None if constraint is None else statistics_key(constraint)
+        self.cost = cost
+        self.selectivity = selectivity
+        self.rows_in = 0
+        self.rows_out = 0
+        self.elapsed = 0.0
+
+    def __str__(self):
+        ret = f"{self.kind:<6} {self.description}"
+        if self.kind == 'filter':
+            cost = 'n/a' if self.cost is None else f"{self.cost * 1e6:.1f}us"
+            selectivity = 'n/a' if self.selectivity is None else f"{self.selectivity:.2f}"
+            ret += f" (est cost={cost}, selectivity={selectivity})"
+        ret += f" rows {self.rows_in}->{self.rows_out}, {self.elapsed * 1e3:.3f}ms"
+        return ret
+
+
+class QueryPlan:
+    """
+    编译后的设备选择计划：先做索引查询，再用列式视图过滤候选设备，最后按代价顺序执行剩余的限制条件，
+    任何一个限制条件不满足时立即跳过该设备
+    """
+
+    def __init__(self, planner, device_type, attributes, stages, empty=False):
+        self.planner = planner
+        self.device_type = device_type
+        self.attributes = attributes
+        self.stages = stages
+        self.empty = empty
+
+    @property
+    def filters(self):
+        return [stage for stage in self.stages if stage.kind == 'filter']
+
+    @property
+    def vectors(self):
+        return [stage for stage in self.stages if stage.kind == 'vector']
+
+    def _vector_filter(self, pool, candidates, exclude):
+        if exclude:
+            candidates = [device for device in candidates if device.name not in exclude]
+        if not candidates:
+            return candidates
+        table = pool.columns()
+        if self.device_type is not None and not self.attributes and not exclude:
+            # 只按类型查询时直接从列式视图中取出候选设备的行号，顺序与类型索引相同
+            rows = columns.numpy.flatnonzero(table.device_column('type').compare('=', self.device_type))
+            candidates = None
+        else:
+            rows = table.device_rows(candidates)
+        mask = None
+        for stage in self.vectors:
+            start = perf_counter()
+            stage.rows_in += len(rows) if mask is None else int(mask.sum())
+            column_mask = stage.constraint.get_column_mask(table)
+            if column_mask is None:
+                # 不支持列式判断时，只对剩余的候选设备逐个判断
+                remaining = rows if mask is None else rows[mask]
+                column_mask = columns.numpy.zeros(len(table.devices), dtype=bool)
+                for row in remaining:
+                    column_mask[row] = stage.constraint.is_meet(table.devices[row])
+            selected = column_mask[rows]
+            mask = selected if mask is None else mask & selected
+            stage.rows_out += int(mask.sum())
+            stage.elapsed += perf_counter() - start
+        if candidates is None:
+            devices = table.devices
+            return [devices[row] for row in rows[mask]]
+        return [candidates[number] for number in columns.numpy.flatnonzero(mask)]
+
+    def candidates(self, pool, exclude=None):
+        """
+        执行索引和列式视图阶段，返回需要逐个判断限制条件的候选设备，exclude 中的设备名称直接跳过
+        """
+        index_stage = self.stages[0]
+        start = perf_counter()
+        if not self.empty:
+            pool._load_candidates(self.device_type)
+        candidates = list() if self.empty else pool.index.devices(self.device_type, **self.attributes)
+        index_stage.elapsed += perf_counter() - start
+        index_stage.rows_out += len(candidates)
+        if self.vectors:
+            return self._vector_filter(pool, candidates, exclude)
+        if exclude:
+            candidates = [device for device in candidates if device.name not in exclude]
+        return candidates
+
+    def accept(self, device):
+        """
+        按代价顺序逐个判断剩余的限制条件，任何一个不满足时返回 False
+        """
+        statistics = self.planner.statistics
+        for stage in self.filters:
+            stage.rows_in += 1
+            start = perf_counter()
+            passed = stage.constraint.is_meet(device)
+            elapsed = perf_counter() - start
+            stage.elapsed += elapsed
+            statistics.setdefault(stage.key, ConstraintStatistics()).record(elapsed, passed)
+            if not passed:
+                return False
+            stage.rows_out += 1
+        return True
+
+    def execute(self, pool, count=None, exclude=None, parallel=None):
+        """
+        执行查询计划，exclude 中的设备名称直接跳过，不再判断限制条件。
+        parallel 为 ParallelEvaluator 时并发判断限制条件，结果顺序与串行执行相同，
+        此时只记录整体的设备数量，不记录每个限制条件的统计数据
+        """
+        candidates = self.candidates(pool, exclude)
+        filters = self.filters
+        if parallel is not None and filters:
+            start = perf_counter()
+            ret = parallel.filter(candidates, [stage.constraint for stage in filters], count, pool)
+            filters[0].rows_in += len(candidates)
+            filters[0].elapsed += perf_counter() - start
+            filters[-1].rows_out += len(ret)
+            return ret
+        ret = list()
+        for device in candidates:
+            if self.accept(device):
+                ret.append(device)
+                if count is not None and len(ret) >= count:
+                    break
+        return ret
+
+    def __str__(self):
+        lines = [f"QueryPlan for device type {self.device_type}"]
+        if self.empty:
+            lines.append("  (constraints conflict with each other, no device can match)")
+        for number, stage in enumerate(self.stages):
+            lines.append(f"  {number}. {stage}")
+        return '\n'.join(lines)
+
+
+class ConstraintPlanner:
+    """
+    把一组限制条件编译成查询计划：
+    能用索引表达的等值条件转换为索引查询，其余条件按实测的代价和通过率排序
+    """
+
+    def __init__(self):
+        self.statistics = dict()
+
+    def compile(self, index, device_type, constraints, attributes=None):
+        attributes = dict(attributes or dict())
+        empty = False
+        residual = list()
+        for constraint in constraints:
+            lookup = constraint.get_index_lookup()
+            if lookup is None:
+                residual.append(constraint)
+                continue
+            conditions, exact = lookup
+            covered = True
+            for attribute, value in conditions.items():
+                if attribute == 'type':
+                    if device_type is not None and device_type != value:
+                        empty = True
+                    device_type = value
+                elif attribute in index.device_attributes:
+                    if attribute in attributes and attributes[attribute] != value:
+                        empty = True
+                    attributes[attribute] = value
+                else:
+                    covered = False
+            if not exact or not covered:
+                residual.append(constraint)
+
+        conditions = [f"type={device_type}"] if device_type is not None else list()
+        conditions += [f"{key}={value}" for key, value in attributes.items()]
+        stages = [PlanStage('index', ', '.join(conditions) or 'full scan')]
+        # 支持列式判断的条件一次过滤全部候选设备，排在逐个判断的条件之前
+        vectors = [constraint for constraint in residual if self.vectorized(constraint)]
+        residual = [constraint for constraint in residual if not self.vectorized(constraint)]
+        for constraint in vectors:
+            stages.append(PlanStage('vector', type(constraint).__name__, constraint))
+        for constraint in sorted(residual, key=self.rank):
+            stage = PlanStage('filter', type(constraint).__name__, constraint)
+            statistics = self.statistics.get(stage.key)
+            if statistics is not None:
+                stage.cost, stage.selectivity = statistics.cost, statistics.selectivity
+            stages.append(stage)
+        return QueryPlan(self, device_type, attributes, stages, empty)
+
+    @staticmethod
+    def vectorized(constraint):
+        from core.resource.pool import Constraint
+
+        return columns.available() and type(constraint).get_column_mask is not Constraint.get_column_mask
+
+    def rank(self, constraint):
+        """
+        限制条件的排序依据 cost / (1 - selectivity)：代价小、过滤掉设备多的条件排在前面，
+        没有统计数据时使用限制条件类声明的 cost
+        """
+        statistics = self.statistics.get(statistics_key(constraint))
+        if statistics is None or not statistics.calls:
+            return constraint.cost
+        # 换算成与类声明的 cost 相同的量级，避免实测和估计值混合比较时失真
+        cost = statistics.cost * 1e6
+        rejected = 1.0 - statistics.selectivity
+        if rejected <= 0:
+            return float('inf')
+        return cost / rejected
+
+
+def statistics_key(constraint):
+    """
+    统计数据按限制条件的 key 区分，同一类型参数不同的限制条件（如不同的速率要求）通过率可能相差很大，
+    没有 get_key 或者 key 不能作为字典的键时按类型统计
+    """
+    get_key = getattr(constraint, 'get_key', None)
+    if get_key is not None:
+        try:
+            key = get_key()
+            hash(key)
+            return key
+        except TypeError:
+            pass
+    return type(constraint)
+
+
+def execute_batch(pool, plans, counts, disjoint=False, exclude=None):
+    """
+    一次遍历执行多个查询计划：各计划的候选设备合并之后按资源池的顺序遍历，
+    每个设备依次判断所有还没有选够的计划，列式视图和限制条件的缓存在计划之间共享。
+    counts 中的 None 表示选择全部满足条件的设备，满足条件的设备不足 count 个的计划返回空列表。
+    disjoint 为 True 时每个设备只分给第一个满足条件的计划，按设备顺序贪心分配，
+    不会为了让后面的计划选够而调整前面的分配，需要整体分配时使用 TopologyMatcher
+    """
+    candidates = [plan.candidates(pool, exclude) for plan in plans]
+    wanted = dict()
+    for number, devices in enumerate(candidates):
+        for device in devices:
+            entry = wanted.get(device.name)
+            if entry is None:
+                wanted[device.name] = (device, [number])
+            else:
+                entry[1].append(number)
+    if len(plans) > 1:
+        # 各计划的候选设备都按资源池的顺序排列，合并之后按设备在索引中的序号排序，只涉及候选设备
+        sequence = pool.index.sequence
+        order = sorted(wanted, key=lambda name: sequence(wanted[name][0]))
+    else:
+        order = list(wanted)
+    ret = [list() for _ in plans]
+    remaining = sum(1 for count in counts if count is None or count > 0)
+    for name in order:
+        if not remaining:
+            break
+        device, numbers = wanted[name]
+        for number in numbers:
+            count = counts[number]
+            if count is not None and len(ret[number]) >= count:
+                continue
+            if plans[number].accept(device):
+                ret[number].append(device)
+                if count is not None and len(ret[number]) >= count:
+                    remaining -= 1
+                if disjoint:
+                    break
+    return [devices if count is None or len(devices) >= count else list() for devices, count in zip(ret, counts)]
@@ -4,24 +4,71 @@
 # @Author  : FebSun
 # @FileName: pool.py
 # @Software: PyCharm
+import hashlib
+import itertools
 import json
 import os
 from datetime import datetime
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from core.resource.cache import ConstraintCache, SelectionCache, selection_key
+from core.resource.columns import ColumnTable
+from core.resource.comm import comm_key, comm_registry
 from core.resource.error import ResourceNotMeetConstraintError
+from core.resource.events import ChangeEvent
+from core.resource.graph import ConnectivityGraph
+from core.resource.index import ResourceIndex
+from core.resource.journal import Journal, file_digest, journal_path
+from core.resource.loader import JsonTopology, LinkReferences, stream_load
+from core.resource.matcher import TopologyMatcher
+from core.resource.planner import ConstraintPlanner, execute_batch
+from core.resource.reservation import ReservationStore
+from core.resource.snapshot import SnapshotTopology, is_snapshot, open_snapshot, read_reserved, reservation_lock, \
+    write_reserved, write_snapshot
 
 _resource_device_mapping = dict()
 _resource_port_mapping = dict()
+_resource_device_attributes = dict()
+_resource_port_attributes = dict()
+_resource_comm_scopes = dict()
+# 资源池的编号，配置接口实例按资源池区分
+_comm_ids = itertools.count(1)
 
 
-def register_resource(category, resource_type, comm_callback):
+def register_resource(category, resource_type, comm_callback, scope=None):
     """
-    注册配置接口实例化的方法或类
+    注册配置接口实例化的方法或类。
+    scope 为 None 时每次 get_comm_instance 都创建新的实例；
+    为 'test'、'session' 或 'process' 时实例被缓存，在对应的作用域结束（comm_registry.end_scope）
+    或者资源被释放时关闭
     """
     if category == 'device':
         _resource_device_mapping[resource_type] = comm_callback
     elif category == 'port':
         _resource_port_mapping[resource_type] = comm_callback
+    _resource_comm_scopes[(category, resource_type)] = scope
+
+
+def _comm_instance(category, resource, comm_callback):
+    scope = _resource_comm_scopes.get((category, resource.type))
+    if scope is None:
+        return comm_callback(resource)
+    return comm_registry.get(comm_key(resource), scope, lambda: comm_callback(resource))
+
+
+def register_attributes(category, resource_type, attributes):
+    """
+    声明某一类型设备或端口的扩展属性，如 Android 设备的 version、ETH 端口的 speed，
+    声明过的属性存储在 __slots__ 中，未声明的属性仍然可以设置，但是存储在额外的字典中
+    """
+    if category == 'device':
+        _resource_device_attributes[resource_type] = tuple(attributes)
+    elif category == 'port':
+        _resource_port_attributes[resource_type] = tuple(attributes)
+    # 已经创建的对象保持原来的类，之后创建的对象使用新的声明
+    _SlottedResource._classes.clear()
 
 
 class ResourceError(Exception):
@@ -33,97 +80,430 @@ class ResourceError(Exception):
         return self.error_info
 
 
-class ResourceDevice:
+_UNSET = object()
+
+
+class _SlottedResource:
     """
-    代表所有测试资源设备的配置类，字段动态定义
+    设备和端口的公共基类：固定字段和声明过的扩展属性存储在 __slots__ 中，
+    其他动态设置的属性存储在 __dict__ 中，__dict__ 只有在第一次设置动态属性时才会创建
     """
 
+    __slots__ = ('__dict__',)
+    _category = None
+    _schema = dict()
+    _classes = dict()
+    _attributes = ()
+
+    @classmethod
+    def _class_for(cls, resource_type):
+        """
+        返回带有该类型扩展属性 slots 的子类，没有声明扩展属性时返回类本身
+        """
+        key = (cls, resource_type)
+        ret = _SlottedResource._classes.get(key)
+        if ret is None:
+            attributes = tuple(attribute for attribute in cls._schema.get(resource_type, ())
+                               if not hasattr(cls, attribute))
+            ret = cls
+            if attributes:
+                ret = type(cls.__name__, (cls,), {
+                    '__slots__': attributes,
+                    '__module__': cls.__module__,
+                    '_attributes': attributes
+                })
+            _SlottedResource._classes[key] = ret
+        return ret
+
+    def _extension_items(self):
+        """
+        返回所有已设置的扩展属性，先是声明过的属性，然后是动态设置的属性
+        """
+        ret = dict()
+        for attribute in self._attributes:
+            value = getattr(self, attribute, _UNSET)
+            if value is not _UNSET:
+                ret[attribute] = value
+        extra = self.__dict__
+        if extra:
+            ret.update(extra)
+        else:
+            # 读取 __dict__ 会创建一个空字典，没有动态属性时删除它以节省内存
+            del self.__dict__
+        return ret
+
+    def __reduce__(self):
+        # 动态生成的子类无法按名称导入，反序列化时按类型重新生成
+        state = dict()
+        for klass in type(self).__mro__:
+            for slot in klass.__dict__.get('__slots__', ()):
+                # 所属资源池是运行时的状态，不参与序列化
+                if slot == '__weakref__' or slot == '__dict__' or slot == '_pool':
+                    continue
+                try:
+                    state[slot] = object.__getattribute__(self, slot)
+                except AttributeError:
+                    pass
+        state.update(self.__dict__)
+        return _restore_resource, (self._category, getattr(self, 'type', None)), state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+
+def _new_resource(base, resource_type):
+    cls = _SlottedResource._classes.get((base, resource_type))
+    if cls is None:
+        cls = base._class_for(resource_type)
+    return object.__new__(cls)
+
+
+# from_dict 中直接赋值的字段，其他字段作为扩展属性设置
+_DEVICE_FIELDS = frozenset(('name', 'type', 'description', 'ports'))
+_PORT_FIELDS = frozenset(('parent', 'type', 'name', 'description', 'remote_ports'))
+
+
+def _restore_resource(category, resource_type):
+    base = ResourceDevice if category == 'device' else DevicePort
+    return object.__new__(base._class_for(resource_type))
+
+
+class ResourceDevice(_SlottedResource):
+    """
+    代表所有测试资源设备的配置类，固定字段之外的属性通过 register_attributes 声明
+    """
+
+    __slots__ = ('name', 'type', 'description', 'ports', '_pool', '__weakref__')
+    _category = 'device'
+    _schema = _resource_device_attributes
+
+    def __new__(cls, name='', *args, **kwargs):
+        if cls is ResourceDevice:
+            resource_type = kwargs.get('type', None)
+            cls = _SlottedResource._classes.get((cls, resource_type)) or cls._class_for(resource_type)
+        return object.__new__(cls)
+
     def __init__(self, name='', *args, **kwargs):
         self.name = name
         self.type = kwargs.get('type', None)
         self.description = kwargs.get('description', None)
         self.ports = dict()
+        # 设备所属的资源池，用于在添加端口时更新资源池的索引
+        self._pool = None
+        for attribute in self._attributes:
+            if attribute in kwargs:
+                setattr(self, attribute, kwargs[attribute])
 
     def add_port(self, name, *args, **kwargs):
         if name in self.ports:
             raise ResourceError(f"Port Name {name} already exists")
-        self.ports[f"{name}"] = DevicePort(self, name, *args, **kwargs)
+        # 直接创建对应类型的子类实例，省去 DevicePort.__new__ 的一次分派
+        port = _new_resource(DevicePort, kwargs.get('type', None))
+        port.__init__(self, name, *args, **kwargs)
+        if self._pool is not None:
+            return self._pool._journaled_add_port(port)
+        self.ports[f"{name}"] = port
+        return port
+
+    def set_attribute(self, name, value):
+        """
+        设置属性，属于资源池时通过 ResourcePool.set_attribute 更新索引并发出修改事件
+        """
+        _set_attribute(self, name, value)
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._pool = None
 
     def to_dict(self):
-        ret = dict()
-        for key, value in self.__dict__.items():
-            if key == 'ports':
-                ret[key] = dict()
-                for port_name, port in value.items():
-                    ret[key][port_name] = port.to_dict()
-            else:
-                ret[key] = value
+        ret = {
+            'name': self.name,
+            'type': self.type,
+            'description': self.description,
+            'ports': {port_name: port.to_dict() for port_name, port in self.ports.items()}
+        }
+        ret.update(self._extension_items())
         return ret
 
     @staticmethod
     def from_dict(dict_obj):
-        ret = ResourceDevice()
+        # 不经过 __init__，固定字段直接赋值，只有扩展属性需要 setattr
+        device_type = dict_obj.get('type', None)
+        ret = _new_resource(ResourceDevice, device_type)
+        ret.name = dict_obj.get('name', '')
+        ret.type = device_type
+        ret.description = dict_obj.get('description', None)
+        ret._pool = None
+        port_from_dict = DevicePort.from_dict
+        ret.ports = {port_name: port_from_dict(port, ret) for port_name, port in dict_obj.get('ports', {}).items()}
         for key, value in dict_obj.items():
-            if key == 'ports':
-                ports = dict()
-                for port_name, port in value.items():
-                    ports[port_name] = DevicePort.from_dict(port, ret)
-                setattr(ret, 'ports', ports)
-            else:
+            if key not in _DEVICE_FIELDS:
                 setattr(ret, key, value)
         return ret
 
     def get_comm_instance(self):
         if self.type not in _resource_device_mapping:
             raise ResourceError(f"type {self.type} is not registered")
-        return _resource_device_mapping[self.type](self)
+        return _comm_instance('device', self, _resource_device_mapping[self.type])
+
+
+class RemotePorts(list):
+    """
+    端口的对端端口列表，列表被修改时更新所属资源池的拓扑版本号。
+    resolver 不为 None 时表示连接关系尚未映射，第一次访问列表时调用 resolver 获取对端端口，
+    resolver 的 references 方法返回对端端口的 (设备名, 端口名)，序列化时不需要映射
+    """
+
+    __slots__ = ('port', 'resolver')
+
+    def __init__(self, port, *args, resolver=None):
+        super().__init__(*args)
+        self.port = port
+        self.resolver = resolver
+
+    def _resolve(self):
+        resolver = self.resolver
+        if resolver is not None:
+            self.resolver = None
+            super().extend(resolver())
+
+    def __reduce__(self):
+        self._resolve()
+        return RemotePorts, (self.port, list(super().__iter__()))
+
+    def references(self):
+        """
+        对端端口的 (设备名, 端口名) 列表，连接关系尚未映射时不会触发映射
+        """
+        if self.resolver is not None:
+            return self.resolver.references()
+        return [(remote_port.parent.name, remote_port.name) for remote_port in super().__iter__()]
+
+    def _changed(self):
+        pool = _resource_pool(self.port)
+        if pool is not None:
+            pool.touch()
+
+    def _add(self, value):
+        # 资源池的 link 和 unlink 自己发出修改事件，不需要 touch
+        self._resolve()
+        super().append(value)
+
+    def _discard(self, value):
+        self._resolve()
+        super().remove(value)
+
+    def __iter__(self):
+        self._resolve()
+        return super().__iter__()
+
+    def __reversed__(self):
+        self._resolve()
+        return super().__reversed__()
+
+    def __len__(self):
+        self._resolve()
+        return super().__len__()
+
+    def __getitem__(self, key):
+        self._resolve()
+        return super().__getitem__(key)
+
+    def __contains__(self, value):
+        self._resolve()
+        return super().__contains__(value)
+
+    def __eq__(self, other):
+        self._resolve()
+        return super().__eq__(other)
+
+    def __add__(self, other):
+        self._resolve()
+        return list(super().__iter__()) + list(other)
+
+    def __repr__(self):
+        self._resolve()
+        return super().__repr__()
+
+    def index(self, *args):
+        self._resolve()
+        return super().index(*args)
+
+    def count(self, value):
+        self._resolve()
+        return super().count(value)
+
+    def copy(self):
+        self._resolve()
+        return list(super().__iter__())
+
+    def append(self, value):
+        self._resolve()
+        super().append(value)
+        self._changed()
+
+    def extend(self, values):
+        self._resolve()
+        super().extend(values)
+        self._changed()
+
+    def insert(self, index, value):
+        self._resolve()
+        super().insert(index, value)
+        self._changed()
+
+    def remove(self, value):
+        self._resolve()
+        super().remove(value)
+        self._changed()
+
+    def pop(self, *args):
+        self._resolve()
+        ret = super().pop(*args)
+        self._changed()
+        return ret
+
+    def clear(self):
+        self.resolver = None
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, key, value):
+        self._resolve()
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        self._resolve()
+        super().__delitem__(key)
+        self._changed()
+
+    def __iadd__(self, values):
+        self._resolve()
+        ret = super().__iadd__(values)
+        self._changed()
+        return ret
+
+    __hash__ = None
 
 
-class DevicePort:
+class DevicePort(_SlottedResource):
     """
-    代表设备的连接端口
+    代表设备的连接端口，remote_ports 在第一次访问时才创建。
+    延迟加载时 _remote_ports 为对端端口的 (设备名, 端口名) 元组，第一次访问时才映射
     """
 
+    __slots__ = ('parent', 'type', 'name', 'description', '_remote_ports')
+    _category = 'port'
+    _schema = _resource_port_attributes
+
+    def __new__(cls, parent_device=None, name='', *args, **kwargs):
+        if cls is DevicePort:
+            resource_type = kwargs.get('type', None)
+            cls = _SlottedResource._classes.get((cls, resource_type)) or cls._class_for(resource_type)
+        return object.__new__(cls)
+
     def __init__(self, parent_device=None, name='', *args, **kwargs):
         self.parent = parent_device
         self.type = kwargs.get('type', None)
         self.name = name
         self.description = kwargs.get('description', None)
-        self.remote_ports = list()
+        self._remote_ports = None
+        for attribute in self._attributes:
+            if attribute in kwargs:
+                setattr(self, attribute, kwargs[attribute])
+
+    @property
+    def remote_ports(self):
+        ret = self._remote_ports
+        if ret is None:
+            ret = self._remote_ports = RemotePorts(self)
+        elif type(ret) is tuple:
+            pool = _resource_pool(self)
+            if pool is None:
+                raise ResourceError(f"port {self.parent.name}:{self.name} is not in a resource pool")
+            ret = self._remote_ports = RemotePorts(self, resolver=LinkReferences(pool.topology, ret, pool.partial))
+        return ret
+
+    @remote_ports.setter
+    def remote_ports(self, value):
+        if isinstance(value, RemotePorts):
+            self._remote_ports = value
+        else:
+            self._remote_ports = RemotePorts(self, value)
+            self._remote_ports._changed()
+
+    def link(self, port):
+        """
+        与另一个端口双向连接，属于资源池时通过 ResourcePool.link 发出修改事件
+        """
+        pool = _resource_pool(self)
+        if pool is None:
+            ResourcePool._connect(self, port)
+        else:
+            pool.link(self, port)
+
+    def unlink(self, port):
+        pool = _resource_pool(self)
+        if pool is None:
+            ResourcePool._disconnect(self, port)
+        else:
+            pool.unlink(self, port)
+
+    def set_attribute(self, name, value):
+        _set_attribute(self, name, value)
+
+    def _references(self):
+        links = self._remote_ports
+        if links is None:
+            return ()
+        if type(links) is tuple and not _resource_pool(self).partial:
+            return links
+        return self.remote_ports.references()
+
+    def __reduce__(self):
+        # 对端端口只记录名称时无法脱离资源池反序列化，先完成映射
+        if type(self._remote_ports) is tuple:
+            self.remote_ports._resolve()
+        return super().__reduce__()
 
     def to_dict(self):
-        ret = dict()
-        for key, value in self.__dict__.items():
-            if key == 'parent':
-                ret[key] = value.name
-            elif key == 'remote_ports':
-                ret[key] = list()
-                for remote_port in value:
-                    # 使用 device 的名称和 port 的名称来表示远端的端口
-                    # 在反序列化的时候可以方便地找到相应的对象名称
-                    ret[key].append(
-                        {
-                            "device": remote_port.parent.name,
-                            "port": remote_port.name
-                        }
-                    )
-            else:
-                ret[key] = value
+        ret = {
+            'parent': self.parent.name,
+            'type': self.type,
+            'name': self.name,
+            'description': self.description,
+            # 使用 device 的名称和 port 的名称来表示远端的端口
+            # 在反序列化的时候可以方便地找到相应的对象名称
+            'remote_ports': [
+                {
+                    "device": device_name,
+                    "port": port_name
+                } for device_name, port_name in self._references()
+            ]
+        }
+        ret.update(self._extension_items())
         return ret
 
     @staticmethod
     def from_dict(dict_obj, parent):
-        ret = DevicePort(parent)
+        port_type = dict_obj.get('type', None)
+        ret = _new_resource(DevicePort, port_type)
+        ret.parent = parent
+        ret.type = port_type
+        ret.name = dict_obj.get('name', '')
+        ret.description = dict_obj.get('description', None)
+        ret._remote_ports = None
         for key, value in dict_obj.items():
-            if key == 'remote_ports' or key == 'parent':
-                continue
-            setattr(ret, key, value)
+            if key not in _PORT_FIELDS:
+                setattr(ret, key, value)
         return ret
 
     def get_comm_instance(self):
         if self.type not in _resource_port_mapping:
             raise ResourceError(f"type {self.type} is not registered")
-        return _resource_port_mapping[self.type](self)
+        return _comm_instance('port', self, _resource_port_mapping[self.type])
 
 
 class ResourcePool:
@@ -137,49 +517,565 @@ class ResourcePool:
         self.information = dict()
         self.file_name = None
         self.owner = None
+        # 只加载了部分设备的资源池不允许保存，避免覆盖资源文件中的其他设备
+        self.partial = False
+        self._reservations = None
+        self.index = ResourceIndex()
+        self.planner = ConstraintPlanner()
+        # 拓扑版本号，任何拓扑修改都会使其增加，从而让限制条件的缓存失效
+        self.version = 0
+        self.constraint_cache = ConstraintCache(lambda: self.version)
+        self.comm_id = next(_comm_ids)
+        # 连接关系图、列式视图和拓扑指纹按修改事件增量更新，无法增量更新时丢弃
+        self._graph = None
+        self._columns = None
+        self._columns_key = None
+        self._digests = None
+        self._digest_sum = 0
+        # 延迟加载的拓扑打开之后修改过的设备名称，指纹只对这些设备求摘要
+        self._source_changes = set()
+        self._subscribers = list()
+        # 修改日志，打开之后的修改只追加到日志中，不再重写整个资源文件
+        self._journal = None
+        self.compact_every = 1000
+        self._load_options = dict()
+        # 跨会话的设备选择结果缓存，enable_selection_cache 之后才使用
+        self.selection_cache = None
+
+    def touch(self):
+        """
+        增加拓扑版本号，直接修改设备属性等无法自动感知的修改之后需要手动调用，
+        订阅者收到 'touch' 事件，派生的数据结构全部重建
+        """
+        self._notify(ChangeEvent('touch'))
+
+    def subscribe(self, callback):
+        """
+        订阅拓扑修改事件，每次修改之后调用 callback(ChangeEvent)，返回 callback 以便取消订阅。
+        只有通过 add_device、add_port、remove_device、link、unlink、set_attribute 的修改有具体的事件，
+        其他修改（包括直接修改 remote_ports）发出 'touch' 事件
+        """
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers.remove(callback)
+
+    def _notify(self, event):
+        self.version += 1
+        if self._graph is not None and not self._graph.apply(event):
+            self._graph = None
+        if self._columns is not None and not self._columns.apply(event):
+            self._columns = None
+        if self._digests is not None:
+            self._update_digests(event)
+        if isinstance(self.topology, SnapshotTopology):
+            devices = event.devices()
+            self._source_changes.update(self.topology.loaded() if devices is None else
+                                        [device.name for device in devices])
+        for callback in list(self._subscribers):
+            callback(event)
 
     def add_device(self, device_name, **kwargs):
         if device_name in self.topology:
             raise ResourceError(f"device {device_name} already exists")
-        self.topology[device_name] = ResourceDevice(device_name)
+        device = ResourceDevice(device_name, **kwargs)
+        with self._journaled(lambda: {'op': 'add_device', 'device': _device_record(device)}):
+            self._add_device(device)
+        return device
+
+    def _add_device(self, device):
+        if device.name in self.topology:
+            raise ResourceError(f"device {device.name} already exists")
+        self.topology[device.name] = device
+        device._pool = self
+        self.index.add_device(device)
+        self._notify(ChangeEvent('add_device', device))
+
+    def remove_device(self, device):
+        """
+        删除设备（设备对象或名称），同时断开其端口的所有连接，打开修改日志时记录到日志中
+        """
+        if not isinstance(device, ResourceDevice):
+            if device not in self.topology:
+                raise ResourceError(f"device {device} does not exist")
+            device = self.topology[device]
+        name = device.name
+        with self._journaled(lambda: {'op': 'remove_device', 'device': name}):
+            self._remove_device(device)
+
+    def _remove_device(self, device):
+        if self.topology.get(device.name) is not device:
+            raise ResourceError(f"device {device.name} is not in the resource pool")
+        for port in device.ports.values():
+            for remote_port in list(port.remote_ports):
+                self._unlink(port, remote_port)
+        del self.topology[device.name]
+        self.index.remove_device(device)
+        device._pool = None
+        self._notify(ChangeEvent('remove_device', device))
+
+    def add_port(self, device_name, port_name, **kwargs):
+        if device_name not in self.topology:
+            raise ResourceError(f"device {device_name} does not exist")
+        return self.topology[device_name].add_port(port_name, **kwargs)
+
+    def _journaled_add_port(self, port):
+        with self._journaled(lambda: {'op': 'add_port', 'device': port.parent.name, 'port': _port_record(port)}):
+            self._add_port(port)
+        return port
+
+    def _add_port(self, port):
+        device = port.parent
+        if port.name in device.ports:
+            raise ResourceError(f"Port Name {port.name} already exists")
+        device.ports[f"{port.name}"] = port
+        self.index.add_port(port)
+        self._notify(ChangeEvent('add_port', port))
+
+    def link(self, port1, port2):
+        """
+        连接两个端口，打开修改日志时记录到日志中。
+        直接修改 remote_ports 同样有效，但是不会记录到日志中
+        """
+        with self._journaled(lambda: {'op': 'link', 'port1': _port_reference(port1),
+                                      'port2': _port_reference(port2)}):
+            self._link(port1, port2)
+
+    def unlink(self, port1, port2):
+        with self._journaled(lambda: {'op': 'unlink', 'port1': _port_reference(port1),
+                                      'port2': _port_reference(port2)}):
+            self._unlink(port1, port2)
+
+    def _link(self, port1, port2):
+        self._connect(port1, port2)
+        self._notify(ChangeEvent('link', port1, port2))
+
+    def _unlink(self, port1, port2):
+        self._disconnect(port1, port2)
+        self._notify(ChangeEvent('unlink', port1, port2))
+
+    @staticmethod
+    def _connect(port1, port2):
+        if port2 in port1.remote_ports:
+            raise ResourceError(f"{port1.parent.name}:{port1.name} is already connected to "
+                                f"{port2.parent.name}:{port2.name}")
+        port1.remote_ports._add(port2)
+        if port1 is not port2:
+            port2.remote_ports._add(port1)
+
+    @staticmethod
+    def _disconnect(port1, port2):
+        if port2 not in port1.remote_ports:
+            raise ResourceError(f"{port1.parent.name}:{port1.name} is not connected to "
+                                f"{port2.parent.name}:{port2.name}")
+        port1.remote_ports._discard(port2)
+        if port1 is not port2 and port1 in port2.remote_ports:
+            port2.remote_ports._discard(port1)
+
+    def set_attribute(self, resource, name, value):
+        """
+        设置设备或端口的属性，同时更新索引和拓扑版本号，打开修改日志时记录到日志中。
+        直接给属性赋值不会记录到日志中，也不会更新索引
+        """
+        if name in ('name', 'type', 'parent', 'ports', 'remote_ports', '_pool', '_remote_ports'):
+            raise ResourceError(f"attribute {name} cannot be changed")
+
+        def record():
+            ret = {'op': 'set', 'device': None, 'attribute': name, 'value': value}
+            if isinstance(resource, DevicePort):
+                ret['device'], ret['port'] = _port_reference(resource)
+            else:
+                ret['device'] = resource.name
+            return ret
+
+        with self._journaled(record):
+            self._set_attribute(resource, name, value)
+
+    def _set_attribute(self, resource, name, value):
+        old = getattr(resource, name, None)
+        if isinstance(resource, DevicePort):
+            self.index.update_port(resource, name, value)
+        else:
+            self.index.update_device(resource, name, value)
+        self._notify(ChangeEvent('set', resource, attribute=name, value=value, old=old))
+
+    def enable_journal(self, compact_every=1000):
+        """
+        在资源文件旁边创建修改日志（<资源文件>.journal），之后的修改和占用只追加到日志中，
+        加载时自动重放日志，日志记录数达到 compact_every 时合并到资源文件中。
+        只有通过 add_device、add_port、link、unlink、set_attribute、reserve、release 的修改会被记录，
+        打开日志之前未保存的修改不会写入日志
+        """
+        if self.file_name is None:
+            raise ResourceError('load a resource file first')
+        self.compact_every = compact_every
+        if self._journal is not None:
+            return
+        journal = Journal(journal_path(self.file_name))
+        with journal.lock():
+            # 其他进程可能已经创建了日志
+            records = journal.open(file_digest(self.file_name)) if Journal.exists(self.file_name) else None
+            if records is None:
+                journal.create(file_digest(self.file_name))
+            self._journal = journal
+            self._replay(records or ())
+
+    @contextmanager
+    def _journaled(self, record):
+        """
+        执行一次修改。打开修改日志时，先在锁内应用其他进程追加的记录，
+        修改成功之后把 record() 返回的记录追加到日志中
+        """
+        journal = self._journal
+        if journal is None:
+            yield
+            return
+        with journal.lock():
+            self._replay(journal.read())
+            yield
+            journal.append([record()])
+            if journal.count >= self.compact_every and not self.partial:
+                self.compact()
+
+    def _replay(self, records):
+        for record in records:
+            self._apply(record)
+
+    def _locate(self, device_name, port_name=None):
+        # 只加载了部分设备时，忽略未加载设备的修改
+        if device_name not in self.topology:
+            if self.partial:
+                return None
+            raise ResourceError(f"device {device_name} does not exist")
+        device = self.topology[device_name]
+        if port_name is None:
+            return device
+        if port_name not in device.ports:
+            raise ResourceError(f"port {device_name}:{port_name} does not exist")
+        return device.ports[port_name]
+
+    def _apply(self, record):
+        """
+        应用一条日志记录
+        """
+        op = record['op']
+        if op == 'reserved':
+            self.reserved = record['value']
+        elif op == 'add_device':
+            self._add_device(ResourceDevice.from_dict(record['device']))
+        elif op == 'add_port':
+            device = self._locate(record['device'])
+            if device is not None:
+                self._add_port(DevicePort.from_dict(record['port'], device))
+        elif op == 'link' or op == 'unlink':
+            port1 = self._locate(*record['port1'])
+            port2 = self._locate(*record['port2'])
+            if port1 is not None and port2 is not None:
+                (self._link if op == 'link' else self._unlink)(port1, port2)
+        elif op == 'set':
+            resource = self._locate(record['device'], record.get('port'))
+            if resource is not None:
+                self._set_attribute(resource, record['attribute'], record['value'])
+        elif op == 'remove_device':
+            device = self._locate(record['device'])
+            if device is not None:
+                self._remove_device(device)
+        else:
+            raise ResourceError(f"unknown journal record {op}")
+
+    def compact(self):
+        """
+        把修改日志合并到资源文件中：先写临时文件再原子替换资源文件，然后创建新的空日志。
+        两次替换之间崩溃时，旧日志的 base 与新的资源文件不一致而被忽略，新的资源文件已经包含全部修改
+        """
+        if self._journal is None:
+            raise ResourceError('journal is not enabled')
+        if self.partial:
+            raise ResourceError("Cannot save a partially loaded resource pool")
+        with self._journal.lock():
+            self._replay(self._journal.read())
+            if is_snapshot(self.file_name):
+                write_snapshot(self, self.file_name)
+            else:
+                temp_name = f"{self.file_name}.tmp"
+                self._dump(temp_name, sync=True)
+                os.replace(temp_name, self.file_name)
+            self._journal.create(file_digest(self.file_name))
+
+    def declare_index(self, attribute, category='device'):
+        """
+        声明需要建立索引的设备属性或端口属性，如 version、speed
+        """
+        self.index.declare(category, attribute)
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        索引只跟随 add_device、add_port、remove_device、set_attribute 等方法的修改，
+        直接对 topology 赋值、删除设备或者直接修改设备属性之后，必须调用此方法重新建立索引
+        """
+        topology = self._loaded_topology()
+        for device in topology.values():
+            device._pool = self
+        if isinstance(self.topology, SnapshotTopology):
+            # 快照中的设备按设备编号加入索引，与创建的先后无关，之后添加的设备排在快照的设备之后
+            self.index.rebuild(topology, self.topology.sequence, self.topology.reader.device_count)
+        else:
+            self.index.rebuild(topology)
+        self.touch()
+
+    def _loaded_topology(self):
+        # 快照延迟加载时只有已经创建的设备参与索引
+        if isinstance(self.topology, SnapshotTopology):
+            return self.topology.loaded()
+        return self.topology
+
+    def _load_candidates(self, device_type):
+        """
+        查询之前创建快照中该类型的全部设备，device_type 为 None 时创建全部设备
+        """
+        if isinstance(self.topology, SnapshotTopology):
+            self.topology.load_type(device_type)
+
+    def _device_loaded(self, device, number=None):
+        device._pool = self
+        self.index.add_device(device, number)
+
+    def _sync_journal(self):
+        # 其他进程在本资源池加载之后打开了修改日志，重新加载以免重写资源文件使日志失效
+        if self._journal is None and Journal.exists(self.file_name):
+            self.load(self.file_name, self.owner, **self._load_options)
+
+    def _journal_reserved(self, reserved):
+        with self._journal.lock():
+            self._replay(self._journal.read())
+            if self.reserved and self.reserved['owner'] != self.owner:
+                raise ResourceError(f"Resource is reserved by {self.reserved['owner']}")
+            with self._journaled(lambda: {'op': 'reserved', 'value': reserved}):
+                self.reserved = reserved
 
     def reserve(self):
         if self.file_name is None:
             raise ResourceError('load a resource file first')
-        self.load(self.file_name, self.owner)
-        self.reserved = {
-            "owner": self.owner,
-            "date": datetime.strftime(datetime.now(), '%Y/%m/%d %H:%M:%S')
-        }
+        self._sync_journal()
+        if self._journal is not None:
+            # 占用信息只追加到修改日志中
+            self._journal_reserved(self._reservation())
+            return
+        if is_snapshot(self.file_name):
+            # 二进制快照只需要原地改写占用信息
+            with reservation_lock(self.file_name):
+                reserved = read_reserved(self.file_name)
+                if reserved and reserved['owner'] != self.owner:
+                    raise ResourceError(f"Resource is reserved by {reserved['owner']}")
+                self.reserved = self._reservation()
+                write_reserved(self.file_name, self.reserved)
+            return
+        self.load(self.file_name, self.owner, lazy=self._load_options.get('lazy', False))
+        self.reserved = self._reservation()
         self.save(self.file_name)
 
     def release(self):
         if self.file_name is None:
             raise ResourceError('load a resource file first')
-        self.load(self.file_name)
-        self.reserved = None
-        self.save(self.file_name)
+        self._sync_journal()
+        if self._journal is not None:
+            self._journal_reserved(None)
+        elif is_snapshot(self.file_name):
+            with reservation_lock(self.file_name):
+                reserved = read_reserved(self.file_name)
+                if reserved and reserved['owner'] != self.owner:
+                    raise ResourceError(f"Resource is reserved by {reserved['owner']}")
+                self.reserved = None
+                write_reserved(self.file_name, None)
+        else:
+            self.load(self.file_name, self.owner, lazy=self._load_options.get('lazy', False))
+            self.reserved = None
+            self.save(self.file_name)
+        # 确认资源由当前 owner 占用并释放之后才关闭本资源池缓存的配置接口实例，
+        # 其他 owner 和其他资源池中同名设备的连接不受影响
+        comm_registry.teardown(pool=self.comm_id)
+
+    def _reservation(self):
+        return {
+            "owner": self.owner,
+            "date": datetime.strftime(datetime.now(), '%Y/%m/%d %H:%M:%S')
+        }
 
-    def load(self, filename, owner):
+    def reservation_store(self):
+        """
+        设备级别的占用记录，保存在资源文件旁边的 SQLite 数据库中
+        """
+        if self._reservations is None:
+            if self.file_name is None:
+                raise ResourceError('load a resource file first')
+            self._reservations = ReservationStore(f"{self.file_name}.reservation.db")
+        return self._reservations
+
+    @staticmethod
+    def _reservation_key(resource):
+        if isinstance(resource, ResourceDevice):
+            return resource.name
+        if isinstance(resource, DevicePort):
+            return resource.parent.name, resource.name
+        return resource
+
+    def _check_owner(self):
+        if self.owner is None:
+            raise ResourceError('owner is required to reserve devices')
+
+    def reserve_devices(self, resources, lease=None):
+        """
+        原子地占用一组设备或端口，任何一个已经被其他人占用时抛出 ResourceError，
+        lease 为租期（秒），过期之后自动释放
+        """
+        self._check_owner()
+        keys = [self._reservation_key(resource) for resource in resources]
+        if not self.reservation_store().reserve(keys, self.owner, lease):
+            raise ResourceError(f"some of {keys} are reserved by others")
+
+    def release_devices(self, resources=None):
+        """
+        批量释放占用的设备或端口，resources 为 None 时释放当前 owner 的全部占用
+        """
+        self._check_owner()
+        store = self.reservation_store()
+        keys = None if resources is None else [self._reservation_key(resource) for resource in resources]
+        released = store.reserved_by(self.owner) if keys is None else keys
+        # 只有整个设备被释放时才关闭设备及其端口的实例，只释放端口时关闭端口的实例
+        devices = {key for key in released if not isinstance(key, tuple)}
+        comm_registry.teardown(devices, self.comm_id)
+        for key in released:
+            if isinstance(key, tuple) and key[0] not in devices:
+                comm_registry.invalidate(('port', self.comm_id) + key)
+        return store.release(self.owner, keys)
+
+    def reserve_any(self, device_type, count, constraints=list(), lease=None, attributes=None, retry=3):
+        """
+        非阻塞地占用任意 count 个满足条件的设备，跳过已被占用（包括自己占用）的设备，
+        并发冲突时重新选择，仍然不足 count 个时返回空列表
+        """
+        self._check_owner()
+        store = self.reservation_store()
+        for _ in range(retry):
+            taken = set(store.owners())
+            devices = self._select(device_type, constraints, attributes, count, exclude=taken)
+            if len(devices) < count:
+                return list()
+            if store.reserve([device.name for device in devices], self.owner, lease):
+                return devices
+        return list()
+
+    def prewarm(self, resources=None, workers=16):
+        """
+        并发创建并连接配置接口实例，用于在用例开始之前建立所有连接。
+        resources 为 None 时预热当前 owner 占用的设备，没有设备级占用并且整个资源池被当前 owner 占用时
+        预热资源池中所有注册过类型的设备，否则不预热任何设备。
+        只对注册时指定了 scope 的类型有意义，返回连接失败的 {资源: 异常}
+        """
+        if resources is None:
+            resources = list()
+            if self.owner is not None and self.file_name is not None:
+                resources = [self.topology[key] for key in self.reservation_store().reserved_by(self.owner)
+                             if not isinstance(key, tuple) and key in self.topology]
+            if not resources and self.reserved and self.reserved['owner'] == self.owner:
+                resources = [device for device in self.topology.values()
+                             if device.type in _resource_device_mapping]
+
+        def warm(resource):
+            try:
+                instance = resource.get_comm_instance()
+                connect = getattr(instance, 'connect', None)
+                if connect is not None:
+                    connect()
+            except Exception as error:
+                comm_registry.invalidate(comm_key(resource))
+                return error
+            return None
+
+        with ThreadPoolExecutor(workers) as executor:
+            errors = list(executor.map(warm, resources))
+        return {resource: error for resource, error in zip(resources, errors) if error is not None}
+
+    def load(self, filename, owner=None, streaming=False, types=None, names=None, lazy=False):
+        """
+        加载资源文件，streaming 为 True 时逐个设备增量解析，
+        指定 types 或 names 时只加载匹配的设备（隐含 streaming）。
+        lazy 为 True 时设备在第一次访问（或者查询该类型）时才创建，端口的连接关系只记录对端的 (设备名, 端口名)，
+        第一次访问 remote_ports 时才映射，只访问少数设备的用例不需要创建整个实验室的设备和连接关系。
+        二进制快照文件以 mmap 方式延迟加载，types 和 names 指定的设备会被预先创建。
+        资源文件旁边有修改日志并且日志的 base 与资源文件一致时，加载之后重放日志
+        """
         if not os.path.exists(filename):
             raise ResourceError(f"Cannot find file {filename}")
+        if self._reservations is not None and filename != self.file_name:
+            self._reservations.close()
+            self._reservations = None
+        if self.selection_cache is not None and filename != self.file_name:
+            self.selection_cache.close()
+            self.selection_cache = None
+        journal = self._journal
+        if journal is not None and journal.path != journal_path(filename):
+            journal.close()
+            journal = None
+        self._journal = None
+        self._load_options = dict(streaming=streaming, types=types, names=names, lazy=lazy)
+        if not Journal.exists(filename):
+            self._load(filename, owner, streaming, types, names, lazy)
+            self.rebuild_index()
+            return
+        journal = journal or Journal(journal_path(filename))
+        with journal.lock():
+            records = journal.open(file_digest(filename))
+            # 日志的 base 不一致说明资源文件已经被整体替换，日志失效
+            self._load(filename, owner, streaming, types, names, lazy, ignore_reserved=records is not None)
+            if records is not None:
+                self._journal = journal
+                self._replay(records)
+                if self.reserved and self.reserved['owner'] != owner:
+                    raise ResourceError(f"Resource is reserved by {self.reserved['owner']}")
+        self.rebuild_index()
+
+    def _load(self, filename, owner, streaming, types, names, lazy=False, ignore_reserved=False):
         self.file_name = filename
         # 初始化
-        self.topology.clear()
-        # self.reserved = False
+        if isinstance(self.topology, SnapshotTopology):
+            self.topology.reader.close()
+        self.topology = dict()
+        self._source_changes = set()
+        self.reserved = None
         self.information = dict()
+        self.partial = False
+
+        if is_snapshot(filename):
+            open_snapshot(self, filename, owner, types, names, ignore_reserved)
+            self.owner = owner
+            return
+
+        if streaming or types is not None or names is not None:
+            stream_load(self, filename, owner, types, names, ignore_reserved=ignore_reserved, lazy=lazy)
+            self.owner = owner
+            return
 
         # 读取资源配置的 JSON 字符串
         with open(filename) as file:
             json_object = json.load(file)
-            if 'reserved' in json_object and json_object['reserved']['owner'] != owner:
+            if not ignore_reserved and json_object.get('reserved') and json_object['reserved']['owner'] != owner:
                 raise ResourceError(f"Resource is reserved by {json_object['reserved']['owner']}")
             self.owner = owner
+        self._from_json(json_object, lazy)
+
+    def _from_json(self, json_object, lazy=False):
+        self.reserved = json_object.get('reserved')
         if 'info' in json_object:
             self.information = json_object['info']
+        if lazy:
+            # 设备在第一次访问时才创建，查询某一类型时创建该类型的全部设备
+            self.topology = JsonTopology(json_object['devices'], on_load=self._device_loaded)
+            return
         for key, value in json_object['devices'].items():
-            device = ResourceDevice.from_dict(value)
-            self.topology[key] = device
+            self.topology[key] = ResourceDevice.from_dict(value)
 
         # 映射所有设备的连接关系
         for key, device in json_object['devices'].items():
@@ -189,53 +1085,215 @@ class ResourcePool:
                     self.topology[key].ports[port_name].remote_ports.append(remote_port_obj)
 
     def save(self, filename):
+        if self.partial:
+            raise ResourceError("Cannot save a partially loaded resource pool")
+        if self._journal is not None and filename == self.file_name:
+            # 保存到打开了修改日志的资源文件时合并日志，直接覆盖会使日志失效
+            self.compact()
+            return
+        self._dump(filename)
+
+    def _dump(self, filename, sync=False):
         with open(filename, mode='w') as file:
-            root_object = dict()
-            root_object['devices'] = dict()
-            root_object['info'] = self.information
-            root_object['reserved'] = self.reserved
-            for device_key, device in self.topology.items():
-                root_object['devices'][device_key] = device.to_dict()
-            json.dump(root_object, file, indent=4)
-
-    def collect_device(self, device_type, count, constraints=list()):
-        ret = list()
-        for key, value in self.topology.items():
-            if value.type == device_type:
-                for constraint in constraints:
-                    if not constraint.is_meet(value):
-                        break
-                    else:
-                        ret.append(value)
-            if len(ret) >= count:
-                return ret
+            json.dump(self._to_json(), file, indent=4)
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def _to_json(self):
+        # reserved 和 info 写在 devices 之前，流式加载时可以先检查占用情况
+        root_object = dict()
+        root_object['reserved'] = self.reserved
+        root_object['info'] = self.information
+        root_object['devices'] = dict()
+        for device_key, device in self.topology.items():
+            root_object['devices'][device_key] = device.to_dict()
+        return root_object
+
+    def save_snapshot(self, filename):
+        """
+        保存为二进制快照，之后的 reserve/release 只需要原地改写占用信息
+        """
+        write_snapshot(self, filename)
+
+    def collect_device(self, device_type, count, constraints=list(), attributes=None, parallel=None):
+        """
+        按查询计划从索引中取出候选设备，再按代价顺序判断限制条件，
+        满足条件的设备不足 count 个时返回空列表。
+        parallel 为 ParallelEvaluator 时并发判断限制条件，凑够 count 个之后取消剩余的判断
+        """
+        ret = self._select(device_type, constraints, attributes, count, parallel=parallel)
+        if len(ret) >= count:
+            return ret
+        return list()
+
+    def collect_all_device(self, device_type, constraints=list(), attributes=None, parallel=None):
+        return self._select(device_type, constraints, attributes, parallel=parallel)
+
+    def view(self, hidden=(), predicate=None):
+        """
+        创建资源池的写时复制视图（PoolView），不复制任何数据。
+        hidden 为需要隐藏的设备或端口，predicate 不为 None 时只保留 predicate(device) 为 True 的设备，
+        在视图中的修改不影响资源池
+        """
+        from core.resource.view import PoolView
+        return PoolView(self, hidden, predicate)
+
+    def collect_devices(self, requests, disjoint=False):
+        """
+        一次遍历完成多个设备选择，requests 为 (device_type, count, constraints) 或
+        (device_type, count, constraints, attributes) 的列表，count 为 None 时选择全部满足条件的设备。
+        返回与 requests 一一对应的设备列表，满足条件的设备不足 count 个时对应的列表为空。
+        disjoint 为 True 时同一个设备不会出现在两个结果中，优先分给靠前的请求
+        """
+        plans = list()
+        counts = list()
+        for request in requests:
+            device_type, count, constraints = request[:3]
+            attributes = request[3] if len(request) > 3 else None
+            plans.append(self.compile(device_type, constraints, attributes))
+            counts.append(count)
+        return execute_batch(self, plans, counts, disjoint)
+
+    def _select(self, device_type, constraints, attributes, count=None, exclude=None, parallel=None):
+        """
+        执行一次设备选择。打开选择缓存时，先按拓扑指纹和限制条件查找上次的结果，
+        命中时只需要按当前的占用和 exclude 过滤；未命中时计算满足条件的全部设备并写入缓存
+        """
+        key = None if self.selection_cache is None else selection_key(device_type, constraints, attributes)
+        if key is None:
+            return self.compile(device_type, constraints, attributes).execute(self, count, exclude, parallel)
+        # 缓存的结果可能来自之前的会话，重新按当前的占用过滤掉其他 owner 占用的设备
+        taken = {name for name, owner in self.reservation_store().owners().items() if owner != self.owner}
+        taken.update(exclude or ())
+        version = self.version
+        fingerprint = self.fingerprint()
+        names = self.selection_cache.get(fingerprint, key)
+        if names is not None:
+            ret = [self.topology[name] for name in names if name not in taken]
         else:
-            return list()
+            ret = self.compile(device_type, constraints, attributes).execute(self, parallel=parallel)
+            # 计算过程中拓扑被修改时结果不可靠，不写入缓存
+            if version == self.version:
+                self.selection_cache.put(fingerprint, key, [device.name for device in ret])
+            if taken:
+                ret = [device for device in ret if device.name not in taken]
+        return ret if count is None else ret[:count]
 
-    def collect_all_device(self, device_type, constraints=list()):
-        ret = list()
-        for key, value in self.topology.items():
-            if value.type == device_type:
-                for constraint in constraints:
-                    if not constraint.is_meet(value):
-                        break
-                    else:
-                        ret.append(value)
-        return ret
+    def enable_selection_cache(self, maxsize=1024):
+        """
+        打开跨会话的设备选择结果缓存（<资源文件>.selection.db），
+        拓扑内容不变时 collect_device、collect_all_device、reserve_any 直接使用之前的选择结果，
+        打开之后这些方法都会跳过其他 owner 占用的设备。
+        结果不只取决于拓扑内容的限制条件（如查询设备实时状态）需要把 cacheable 设为 False，
+        作为参数嵌套在其他限制条件中时同样不会缓存
+        """
+        if self.file_name is None:
+            raise ResourceError('load a resource file first')
+        if self.selection_cache is None:
+            self.selection_cache = SelectionCache(f"{self.file_name}.selection.db", maxsize)
+        self.selection_cache.maxsize = maxsize
+
+    def fingerprint(self):
+        """
+        拓扑内容的指纹（所有设备和端口的属性及连接关系，不包括占用信息）：每个设备的 sha256 之和，
+        修改事件只重新计算涉及的设备。直接修改设备属性之后需要调用 touch。
+        快照和 lazy 加载的拓扑不创建设备，对资源文件的内容和打开之后修改过的设备求摘要
+        """
+        if isinstance(self.topology, SnapshotTopology):
+            source = self.topology.source_digest()
+            if source is not None:
+                digest = hashlib.sha256(source.encode())
+                for name in sorted(self._source_changes):
+                    value = _device_digest(self.topology[name]) if name in self.topology else 0
+                    digest.update(f"{name}:{value:064x};".encode())
+                return digest.hexdigest()
+        if self._digests is None:
+            self._digests = {name: _device_digest(device) for name, device in self.topology.items()}
+            self._digest_sum = sum(self._digests.values()) % _DIGEST_MODULUS
+        return f"{self._digest_sum:064x}"
+
+    def _update_digests(self, event):
+        devices = event.devices()
+        if devices is None:
+            self._digests = None
+            return
+        digests = self._digests
+        for device in devices:
+            self._digest_sum -= digests.pop(device.name, 0)
+            if event.op != 'remove_device':
+                digests[device.name] = _device_digest(device)
+                self._digest_sum += digests[device.name]
+        self._digest_sum %= _DIGEST_MODULUS
 
-    def collect_connection_route(self, resource, constraints=list()):
+    def compile(self, device_type, constraints=list(), attributes=None):
         """
-        获取资源连接路由
+        把限制条件编译成查询计划
+        """
+        return self.planner.compile(self.index, device_type, constraints, attributes)
+
+    def explain(self, constraints, device_type=None, count=None, attributes=None):
+        """
+        执行一次查询并返回查询计划，计划中包含每个阶段的设备数量和耗时，
+        print 返回值即可查看选择过程慢在哪里
+        """
+        plan = self.compile(device_type, constraints, attributes)
+        plan.execute(self, count)
+        return plan
+
+    def graph(self):
+        """
+        资源池的连接关系图，link 和 unlink 增量更新，其他结构修改之后重新生成
+        """
+        if self._graph is None:
+            self._graph = ConnectivityGraph(self.topology.values())
+        return self._graph
+
+    def columns(self):
+        """
+        设备和端口属性的列式视图（ColumnTable），set_attribute 原地更新，
+        增删设备和端口或者已加载的设备数量变化之后重新生成
+        """
+        key = self.index.device_count
+        if self._columns is None or self._columns_key != key:
+            self._columns = ColumnTable(self._loaded_topology().values())
+            self._columns_key = key
+        return self._columns
+
+    def collect_connection_paths(self, resource, target_type=None, max_hops=1, port_types=None, via_types=None,
+                                 count=None):
+        """
+        获取从 resource 出发到 target_type 类型设备的完整路由（Route），按跳数从小到大排列，
+        max_hops 为最多经过的连接数，via_types 限制中间设备的类型，port_types 限制经过的端口类型
+        """
+        return self.graph().paths(resource, target_type, max_hops, port_types, via_types, count)
+
+    def match_topology(self, request, timeout=10, best=False, score=None, exclude=None):
+        """
+        为拓扑请求（TopologyRequest）中的所有角色同时分配设备和连接端口，
+        分配的设备和端口互不重复，找不到时返回 None。
+        best 为 True 时在 timeout 内搜索 score 最小的分配
+        """
+        return TopologyMatcher(self, request, timeout, exclude).solve(best, score)
+
+    def collect_connection_route(self, resource, constraints=list(), parallel=None):
+        """
+        获取资源连接路由，parallel 为 ParallelEvaluator 时并发执行每个限制条件
         """
         # 限制类必须是连接限制 ConnectionConstraint
         for constraint in constraints:
             if not isinstance(constraint, ConnectionConstraint):
                 raise ResourceError("collect_connection_route only accept ConnectionConstraints type")
+        if parallel is not None:
+            results, failed = parallel.map_connections(constraints, resource, self)
+            if failed is not None:
+                raise ResourceNotMeetConstraintError(failed)
+            return [conn for conns in results for conn in conns]
         ret = list()
         for constraint in constraints:
             conns = constraint.get_connection(resource)
             if not any(conns):
-                raise ResourceNotMeetConstraintError([constraint])
+                raise ResourceNotMeetConstraintError(constraint)
             for conn in conns:
                 ret.append(conn)
         return ret
@@ -246,6 +1304,11 @@ class Constraint(metaclass=ABCMeta):
     资源选择器限制条件的基类
     """
 
+    # 单次判断的预估耗时（微秒），查询计划在没有实测数据时按此排序
+    cost = 1
+    # 结果只取决于拓扑内容，可以写入跨会话的选择缓存
+    cacheable = True
+
     def __init__(self):
         self.description = None
 
@@ -253,12 +1316,144 @@ class Constraint(metaclass=ABCMeta):
     def is_meet(self, resource, *args, **kwargs):
         pass
 
+    def get_description(self):
+        return self.description
+
+    def get_key(self):
+        """
+        限制条件的标识：类名加上除 description 以外的所有参数，嵌套的限制条件递归展开，
+        参数相同的两个实例 key 相同。每次调用都重新计算，修改参数之后 key 随之变化
+        """
+        params = tuple(sorted(
+            ((name, _constraint_key(value)) for name, value in self.__dict__.items()
+             if name != 'description' and not name.startswith('_')),
+            key=lambda item: item[0]))
+        return f"{type(self).__module__}.{type(self).__qualname__}", params
+
+    def is_cacheable(self):
+        """
+        限制条件本身以及参数中嵌套的限制条件都可以缓存时返回 True
+        """
+        return self.cacheable and all(_constraint_cacheable(value) for name, value in self.__dict__.items()
+                                      if name != 'description' and not name.startswith('_'))
+
+    def get_index_lookup(self):
+        """
+        返回可以通过资源池索引完成的等值条件 (conditions, exact)，
+        conditions 为 {属性名: 值}，exact 为 True 表示这些条件完全等价于 is_meet，
+        不能使用索引时返回 None
+        """
+        return None
+
+    def get_column_mask(self, table):
+        """
+        在列式视图（ColumnTable）上一次判断所有设备，返回与 table.devices 等长的布尔数组，
+        不支持时返回 None。实现了此方法的限制条件在查询计划中先于逐个判断的条件执行
+        """
+        return None
+
 
 class ConnectionConstraint(Constraint, metaclass=ABCMeta):
     """
     用户获取 remote_port 的限制条件
     """
 
+    cost = 50
+
+    def __init_subclass__(cls, **kwargs):
+        # 子类实现的 is_meet 和 get_connection 自动使用所属资源池的缓存，cacheable 为 False 的子类不缓存
+        super().__init_subclass__(**kwargs)
+        if not cls.cacheable:
+            return
+        for name in ('is_meet', 'get_connection'):
+            method = cls.__dict__.get(name)
+            if method is not None and not getattr(method, '__isabstractmethod__', False) \
+                    and not getattr(method, '_memoized', False):
+                setattr(cls, name, _memoize(method))
+
     @abstractmethod
     def get_connection(self, resource, *args, **kwargs):
         pass
+
+
+def _device_record(device):
+    ret = device.to_dict()
+    del ret['ports']
+    return ret
+
+
+def _port_record(port):
+    ret = port.to_dict()
+    del ret['parent']
+    del ret['remote_ports']
+    return ret
+
+
+def _port_reference(port):
+    return [port.parent.name, port.name]
+
+
+_DIGEST_MODULUS = 1 << 256
+
+
+def _device_digest(device):
+    text = json.dumps(device.to_dict(), sort_keys=True, default=repr)
+    return int.from_bytes(hashlib.sha256(text.encode()).digest(), 'big')
+
+
+def _set_attribute(resource, name, value):
+    pool = _resource_pool(resource)
+    if pool is None:
+        setattr(resource, name, value)
+    else:
+        pool.set_attribute(resource, name, value)
+
+
+def _resource_pool(resource):
+    device = resource.parent if isinstance(resource, DevicePort) else resource
+    return getattr(device, '_pool', None)
+
+
+def _constraint_key(value):
+    if isinstance(value, Constraint):
+        return value.get_key()
+    if isinstance(value, (list, tuple)):
+        return tuple(_constraint_key(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_constraint_key(item) for item in value))
+    if isinstance(value, dict):
+        return tuple(sorted((key, _constraint_key(item)) for key, item in value.items()))
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def _constraint_cacheable(value):
+    if isinstance(value, Constraint):
+        return value.is_cacheable()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return all(_constraint_cacheable(item) for item in value)
+    if isinstance(value, dict):
+        return all(_constraint_cacheable(item) for item in value.values())
+    return True
+
+
+def _memoize(method):
+    """
+    用资源池的 constraint_cache 缓存连接限制条件的结果，
+    资源不属于任何资源池、带有额外参数或者限制条件不可缓存时直接计算。
+    返回列表的副本，调用者修改返回值不影响缓存
+    """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, resource, *args, **kwargs):
+        pool = _resource_pool(resource)
+        if pool is None or args or kwargs or not self.is_cacheable():
+            return method(self, resource, *args, **kwargs)
+        result = pool.constraint_cache.get_or_compute(
+            (name, self.get_key(), resource), lambda: method(self, resource))
+        return list(result) if isinstance(result, list) else result
+
+    wrapper._memoized = True
+    return wrapper
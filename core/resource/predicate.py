@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 04:30
+# @Author  : FebSun
+# @FileName: predicate.py
+# @Software: PyCharm
+from core.resource.columns import OPERATORS, compare_value
+from core.resource.pool import Constraint, DevicePort
+
+
+class AttrConstraint(Constraint):
+    """
+    声明式的属性条件，如 AttrConstraint('version', '>=', 9, device_type='Android')，
+    查询计划通过资源池的列式视图一次判断所有候选设备
+    """
+
+    def __init__(self, attribute, op, value, device_type=None):
+        super().__init__()
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op}")
+        self.attribute = attribute
+        self.op = op
+        self.value = value
+        self.device_type = device_type
+        self.description = f"{attribute} {op} {value}"
+        if device_type is not None:
+            self.description = f"{device_type} {self.description}"
+
+    def get_index_lookup(self):
+        conditions = dict()
+        if self.device_type is not None:
+            conditions['type'] = self.device_type
+        if self.op == '=' or self.op == '==':
+            conditions[self.attribute] = self.value
+            return conditions, True
+        return (conditions, False) if conditions else None
+
+    def is_meet(self, resource, *args, **kwargs):
+        if self.device_type is not None and resource.type != self.device_type:
+            return False
+        return compare_value(self.op, getattr(resource, self.attribute, None), self.value)
+
+    def get_column_mask(self, table):
+        mask = table.device_column(self.attribute).compare(self.op, self.value)
+        if self.device_type is not None:
+            mask &= table.device_column('type').compare('=', self.device_type)
+        return mask
+
+
+class PortAttrConstraint(Constraint):
+    """
+    端口属性条件，如 PortAttrConstraint('speed', '>=', 10000, port_type='ETH')：
+    判断设备时至少有一个端口满足，判断端口时只判断端口本身
+    """
+
+    def __init__(self, attribute, op, value, port_type=None):
+        super().__init__()
+        if op not in OPERATORS:
+            raise ValueError(f"unknown operator {op}")
+        self.attribute = attribute
+        self.op = op
+        self.value = value
+        self.port_type = port_type
+        self.description = f"port {attribute} {op} {value}"
+        if port_type is not None:
+            self.description = f"{port_type} {self.description}"
+
+    def _port_meet(self, port):
+        if self.port_type is not None and port.type != self.port_type:
+            return False
+        return compare_value(self.op, getattr(port, self.attribute, None), self.value)
+
+    def is_meet(self, resource, *args, **kwargs):
+        if isinstance(resource, DevicePort):
+            return self._port_meet(resource)
+        return any(self._port_meet(port) for port in resource.ports.values())
+
+    def get_column_mask(self, table):
+        mask = table.port_column(self.attribute).compare(self.op, self.value)
+        if self.port_type is not None:
+            mask &= table.port_column('type').compare('=', self.port_type)
+        return table.any_port(mask)
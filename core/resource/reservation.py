@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 17:10
+# @Author  : FebSun
+# @FileName: reservation.py
+# @Software: PyCharm
+import sqlite3
+import time
+
+
+class ReservationStore:
+    """
+    基于 SQLite 的设备/端口级占用记录。
+    每次占用在一个 IMMEDIATE 事务中完成检查和写入（compare-and-set），要么全部成功要么全部失败；
+    占用带有租期，过期的占用自动失效
+    """
+
+    def __init__(self, path, lease=3600, timeout=5.0):
+        self.path = path
+        self.lease = lease
+        self.timeout = timeout
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            # isolation_level=None 由我们自己控制事务
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS reservation ("
+                "device TEXT NOT NULL, port TEXT NOT NULL, owner TEXT NOT NULL, "
+                "created REAL NOT NULL, expires REAL NOT NULL, PRIMARY KEY (device, port))")
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _split(resource):
+        """
+        资源表示为设备名称，或者 (设备名称, 端口名称)，端口为空字符串表示整个设备
+        """
+        if isinstance(resource, tuple):
+            return resource
+        return resource, ''
+
+    def reserve(self, resources, owner, lease=None):
+        """
+        原子地占用一组资源，任何一个资源被其他人占用时不做任何修改并返回 False，
+        自己已经占用的资源会延长租期
+        """
+        conn = self._connect()
+        now = time.time()
+        expires = now + (self.lease if lease is None else lease)
+        keys = [self._split(resource) for resource in resources]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM reservation WHERE expires <= ?", (now,))
+            for device, port in keys:
+                # 占用整个设备时与该设备的任何端口冲突，占用端口时与整个设备或同一端口冲突
+                if port:
+                    row = conn.execute(
+                        "SELECT owner FROM reservation WHERE device = ? AND (port = '' OR port = ?) "
+                        "AND owner != ? LIMIT 1", (device, port, owner)).fetchone()
+                else:
+                    row = conn.execute(
+                        "SELECT owner FROM reservation WHERE device = ? AND owner != ? LIMIT 1",
+                        (device, owner)).fetchone()
+                if row is not None:
+                    conn.execute("ROLLBACK")
+                    return False
+            conn.executemany(
+                "INSERT OR REPLACE INTO reservation (device, port, owner, created, expires) VALUES (?, ?, ?, ?, ?)",
+                [(device, port, owner, now, expires) for device, port in keys])
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, owner, resources=None):
+        """
+        批量释放 owner 占用的资源，resources 为 None 时释放 owner 的全部占用，返回释放的数量
+        """
+        conn = self._connect()
+        if resources is None:
+            return conn.execute("DELETE FROM reservation WHERE owner = ?", (owner,)).rowcount
+        keys = [self._split(resource) + (owner,) for resource in resources]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = 0
+            for key in keys:
+                count += conn.execute(
+                    "DELETE FROM reservation WHERE device = ? AND port = ? AND owner = ?", key).rowcount
+            conn.execute("COMMIT")
+            return count
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def renew(self, owner, lease=None):
+        now = time.time()
+        expires = now + (self.lease if lease is None else lease)
+        return self._connect().execute(
+            "UPDATE reservation SET expires = ? WHERE owner = ? AND expires > ?", (expires, owner, now)).rowcount
+
+    def owners(self, devices=None):
+        """
+        返回 {设备名称: 占用者}，端口级别的占用也算作设备被占用
+        """
+        rows = self._connect().execute(
+            "SELECT device, owner FROM reservation WHERE expires > ?", (time.time(),)).fetchall()
+        ret = dict()
+        for device, owner in rows:
+            if devices is None or device in devices:
+                ret[device] = owner
+        return ret
+
+    def reserved_by(self, owner):
+        rows = self._connect().execute(
+            "SELECT device, port FROM reservation WHERE owner = ? AND expires > ? ORDER BY device, port",
+            (owner, time.time())).fetchall()
+        return [device if not port else (device, port) for device, port in rows]
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 05:30
+# @Author  : FebSun
+# @FileName: server.py
+# @Software: PyCharm
+"""
+常驻的资源池服务：服务进程只加载一次资源文件，索引和限制条件缓存对所有测试进程共享，
+测试进程通过本地 Unix socket 调用选择和占用接口：
+
+    python -m core.resource.server pool.json --address /tmp/pool.sock
+
+    rp = ResourcePoolProxy('/tmp/pool.sock')
+    rp.load('pool.json', 'alice')
+    ap = rp.collect_device('AP', 1, constraints)[0]
+
+请求和响应都是 pickle，限制条件对象原样发送到服务进程；设备和端口按名称传递，
+客户端在第一次访问时才从服务进程获取设备的数据，连接关系在访问 remote_ports 时才映射。
+连接必须通过 authkey 认证：没有指定时服务进程生成随机的 authkey，写入只有当前用户可以读取的
+<address>.key，客户端没有指定 authkey 时从该文件读取；socket 的权限同样设为只有当前用户可以访问
+"""
+import argparse
+import io
+import os
+import pickle
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+from core.resource.comm import comm_registry
+from core.resource.error import ResourceNotMeetConstraintError
+from core.resource.loader import lazy_links
+from core.resource.pool import DevicePort, ResourceDevice, ResourceError, ResourcePool
+from core.resource.snapshot import SnapshotTopology
+
+# 客户端可以调用的资源池方法
+OPERATIONS = ('collect_device', 'collect_all_device', 'collect_devices', 'collect_connection_route',
+              'collect_connection_paths', 'match_topology', 'reserve', 'release', 'reserve_devices',
+              'release_devices', 'reserve_any')
+
+
+class PoolServerError(ResourceError):
+    """
+    服务进程中出现的其他异常，error_type 为原始异常的类名
+    """
+
+    def __init__(self, error_type, message):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+def _encode_error(error):
+    if isinstance(error, ResourceError):
+        return 'ResourceError', str(error)
+    if isinstance(error, ResourceNotMeetConstraintError):
+        return 'ResourceNotMeetConstraintError', str(error)
+    return type(error).__name__, str(error)
+
+
+def _decode_error(error_type, message):
+    if error_type == 'ResourceError':
+        return ResourceError(message)
+    if error_type == 'ResourceNotMeetConstraintError':
+        error = ResourceNotMeetConstraintError.__new__(ResourceNotMeetConstraintError)
+        Exception.__init__(error, message)
+        return error
+    return PoolServerError(error_type, message)
+
+
+class _ResourcePickler(pickle.Pickler):
+    """
+    属于 pool 的设备和端口按名称序列化，names 中记录用到的设备名称
+    """
+
+    def __init__(self, file, pool):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.pool = pool
+        self.names = set()
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ResourceDevice) and obj._pool is self.pool:
+            self.names.add(obj.name)
+            return 'device', obj.name
+        if isinstance(obj, DevicePort) and obj.parent is not None and obj.parent._pool is self.pool:
+            self.names.add(obj.parent.name)
+            return 'port', obj.parent.name, obj.name
+        return None
+
+
+class _ResourceUnpickler(pickle.Unpickler):
+    def __init__(self, file, topology):
+        super().__init__(file)
+        self.topology = topology
+
+    def persistent_load(self, pid):
+        device = self.topology[pid[1]]
+        if pid[0] == 'device':
+            return device
+        return device.ports[pid[2]]
+
+
+def key_path(address):
+    """
+    服务进程生成的 authkey 保存的位置
+    """
+    return f"{address}.key"
+
+
+def _write_key(address, authkey):
+    path = key_path(address)
+    if os.path.exists(path):
+        os.unlink(path)
+    # 创建时就只有当前用户可以读写，不依赖进程的 umask
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'wb') as file:
+        file.write(authkey)
+
+
+def _read_key(address):
+    try:
+        with open(key_path(address), 'rb') as file:
+            return file.read()
+    except FileNotFoundError:
+        raise ResourceError(f"cannot find the authkey of {address}, pass authkey explicitly") from None
+
+
+def _dumps(obj, pool):
+    file = io.BytesIO()
+    pickler = _ResourcePickler(file, pool)
+    pickler.dump(obj)
+    return file.getvalue(), pickler.names
+
+
+def _loads(data, topology):
+    return _ResourceUnpickler(io.BytesIO(data), topology).load()
+
+
+class PoolServer:
+    """
+    在 address（Unix socket 路径）上提供资源池服务，每个连接一个线程，
+    所有请求在同一把锁下串行执行。服务进程中的资源池打开修改日志，
+    占用和释放只追加到日志中，不会重新加载资源文件
+    """
+
+    def __init__(self, filename, address, authkey=None, journal=True):
+        self.filename = filename
+        self.address = address
+        self.pool = ResourcePool()
+        self.pool.load(filename, lazy=True)
+        if journal:
+            self.pool.enable_journal()
+        self.lock = threading.Lock()
+        self.listener = None
+        # 没有指定 authkey 时生成随机的 authkey，启动时写入 <address>.key
+        self.authkey = authkey or os.urandom(32)
+        self._generated_key = authkey is None
+        self._thread = None
+        self._closed = False
+
+    def start(self):
+        """
+        在后台线程中开始服务
+        """
+        self._listen()
+        self._thread = threading.Thread(target=self._accept, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._listen()
+        self._accept()
+
+    def _listen(self):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        if self._generated_key:
+            _write_key(self.address, self.authkey)
+        self.listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        os.chmod(self.address, 0o600)
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except AuthenticationError:
+                # 认证失败的连接直接丢弃，继续服务其他客户端
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+            if self._generated_key and os.path.exists(key_path(self.address)):
+                os.unlink(key_path(self.address))
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    request = conn.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                conn.send_bytes(self.handle(request))
+
+    def handle(self, request):
+        """
+        执行一批调用，返回 (拓扑版本号, 用到的设备数据, 每个调用的结果)
+        """
+        with self.lock:
+            pool = self.pool
+            if pool._journal is not None:
+                # 应用不通过服务进程的其他进程追加到日志中的修改
+                with pool._journal.lock():
+                    pool._replay(pool._journal.read())
+            owner, calls = _loads(request, pool.topology)
+            results = list()
+            for method, args, kwargs in calls:
+                try:
+                    results.append((True, self._call(owner, method, args, kwargs)))
+                except Exception as error:
+                    results.append((False, _encode_error(error)))
+            payload, names = _dumps(results, pool)
+            devices = {name: pool.topology[name].to_dict() for name in names}
+            return pickle.dumps((pool.version, devices, payload), pickle.HIGHEST_PROTOCOL)
+
+    def _call(self, owner, method, args, kwargs):
+        pool = self.pool
+        if method == 'open':
+            if pool.reserved and pool.reserved['owner'] != owner:
+                raise ResourceError(f"Resource is reserved by {pool.reserved['owner']}")
+            return {'file': os.path.abspath(self.filename), 'reserved': pool.reserved,
+                    'information': pool.information, 'count': len(pool.topology)}
+        if method == 'names':
+            return list(pool.topology)
+        if method == 'devices':
+            return {name: pool.topology[name].to_dict() for name in args[0] if name in pool.topology}
+        if method not in OPERATIONS:
+            raise ResourceError(f"unsupported operation {method}")
+        # 占用信息按调用者区分
+        pool.owner = owner
+        try:
+            if method == 'reserve' or method == 'release':
+                getattr(pool, method)()
+                return pool.reserved
+            return getattr(pool, method)(*args, **kwargs)
+        finally:
+            pool.owner = None
+
+
+class RemoteTopology(SnapshotTopology):
+    """
+    客户端的拓扑，设备在第一次访问时才从服务进程获取
+    """
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self._loaded = dict()
+        self._added = dict()
+        self._removed = set()
+        self._names = None
+
+    def _all_names(self):
+        if self._names is None:
+            self._names = self.proxy._call('names')
+        return self._names
+
+    def _create(self, name, dict_obj):
+        device = ResourceDevice.from_dict(dict_obj)
+        lazy_links(self.proxy, device, dict_obj)
+        self._loaded[name] = device
+        return device
+
+    def fetch(self, names):
+        """
+        一次获取多个还没有创建的设备
+        """
+        names = [name for name in names if name not in self._loaded]
+        if names:
+            for name, dict_obj in self.proxy._call('devices', names).items():
+                self._create(name, dict_obj)
+
+    def update(self, devices):
+        for name, dict_obj in devices.items():
+            if name not in self._loaded:
+                self._create(name, dict_obj)
+
+    def loaded(self):
+        return dict(self._loaded)
+
+    def source_digest(self):
+        return None
+
+    def load_type(self, device_type):
+        self.fetch(self._all_names())
+
+    def __getitem__(self, name):
+        if name in self._added:
+            return self._added[name]
+        device = self._loaded.get(name)
+        if device is None:
+            self.fetch([name])
+            device = self._loaded.get(name)
+            if device is None:
+                raise KeyError(name)
+        return device
+
+    def __setitem__(self, name, device):
+        raise ResourceError('devices cannot be added through the pool server')
+
+    def __delitem__(self, name):
+        raise ResourceError('devices cannot be removed through the pool server')
+
+    def __contains__(self, name):
+        return name in self._loaded or name in self._all_names()
+
+    def __iter__(self):
+        return iter(list(self._all_names()))
+
+    def __len__(self):
+        return len(self._all_names())
+
+    def clear(self):
+        self._loaded.clear()
+        self._names = None
+
+
+class ResourcePoolProxy(ResourcePool):
+    """
+    通过 PoolServer 使用资源池，接口与 ResourcePool 相同：
+    load 只需要一次往返，选择和占用在服务进程中执行，返回的设备是本地的 ResourceDevice 对象。
+    batch 把多个调用合并成一次往返。服务进程的拓扑被修改之后，本地已经创建的设备被丢弃，之后重新获取
+    """
+
+    def __init__(self, address, authkey=None):
+        super().__init__()
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+        self._server_version = None
+        self._lock = threading.RLock()
+        self.topology = RemoteTopology(self)
+
+    def _connect(self):
+        if self._conn is None:
+            authkey = self.authkey if self.authkey is not None else _read_key(self.address)
+            self._conn = Client(self.address, family='AF_UNIX', authkey=authkey)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def batch(self, calls):
+        """
+        一次往返执行多个调用，calls 为 [(方法名, args, kwargs), ...]，
+        返回每个调用的结果，出错的调用返回异常对象而不是抛出
+        """
+        with self._lock:
+            request, names = _dumps((self.owner, [(method, tuple(args), dict(kwargs))
+                                                  for method, args, kwargs in calls]), self)
+            conn = self._connect()
+            conn.send_bytes(request)
+            version, devices, payload = pickle.loads(conn.recv_bytes())
+            if version != self._server_version:
+                # 服务进程的拓扑已经改变，丢弃本地创建的设备
+                if self._server_version is not None:
+                    self.topology.clear()
+                    self.touch()
+                self._server_version = version
+            self.topology.update(devices)
+            results = _loads(payload, self.topology)
+        return [value if ok else _decode_error(*value) for ok, value in results]
+
+    def _call(self, method, *args, **kwargs):
+        ret, = self.batch([(method, args, kwargs)])
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    def load(self, filename, owner=None, streaming=False, types=None, names=None, lazy=False):
+        """
+        连接服务进程并检查占用情况，filename 必须与服务进程加载的资源文件相同
+        """
+        self.owner = owner
+        self.topology.clear()
+        self._server_version = None
+        header = self._call('open')
+        if os.path.abspath(filename) != header['file']:
+            raise ResourceError(f"pool server at {self.address} serves {header['file']}, not {filename}")
+        self.file_name = filename
+        self.reserved = header['reserved']
+        self.information = header['information']
+
+    def reserve(self):
+        self.reserved = self._call('reserve')
+
+    def release(self):
+        # 客户端创建的设备不属于任何资源池，只关闭已经创建的设备的实例
+        comm_registry.teardown(list(self.topology.loaded()))
+        self.reserved = self._call('release')
+
+    def reserve_devices(self, resources, lease=None):
+        self._check_owner()
+        return self._call('reserve_devices', resources, lease)
+
+    def release_devices(self, resources=None):
+        self._check_owner()
+        if resources is None:
+            comm_registry.teardown(list(self.topology.loaded()))
+        else:
+            comm_registry.teardown([resource.name for resource in resources if isinstance(resource, ResourceDevice)])
+        return self._call('release_devices', resources)
+
+    def reserve_any(self, device_type, count, constraints=list(), lease=None, attributes=None, retry=3):
+        self._check_owner()
+        return self._call('reserve_any', device_type, count, constraints, lease, attributes, retry)
+
+    def collect_device(self, device_type, count, constraints=list(), attributes=None, parallel=None):
+        return self._call('collect_device', device_type, count, constraints, attributes)
+
+    def collect_all_device(self, device_type, constraints=list(), attributes=None, parallel=None):
+        return self._call('collect_all_device', device_type, constraints, attributes)
+
+    def collect_devices(self, requests, disjoint=False):
+        return self._call('collect_devices', requests, disjoint)
+
+    def collect_connection_route(self, resource, constraints=list(), parallel=None):
+        return self._call('collect_connection_route', resource, constraints)
+
+    def collect_connection_paths(self, resource, target_type=None, max_hops=1, port_types=None, via_types=None,
+                                 count=None):
+        return self._call('collect_connection_paths', resource, target_type, max_hops, port_types, via_types, count)
+
+    def match_topology(self, request, timeout=10, best=False, score=None, exclude=None):
+        return self._call('match_topology', request, timeout, best, score, exclude)
+
+    def _unsupported(self, *args, **kwargs):
+        raise ResourceError('the pool server does not support modifying the resource pool')
+
+    save = save_snapshot = enable_journal = enable_selection_cache = compact = _unsupported
+    add_device = remove_device = link = unlink = set_attribute = _journaled_add_port = _unsupported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('filename')
+    parser.add_argument('--address', required=True, help='Unix socket 路径')
+    parser.add_argument('--no-journal', action='store_true', help='占用信息直接写入资源文件')
+    args = parser.parse_args()
+    authkey = os.environ.get('AUTOTEST_POOL_AUTHKEY')
+    server = PoolServer(args.filename, args.address, authkey.encode() if authkey else None,
+                        journal=not args.no_journal)
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
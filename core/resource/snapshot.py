@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 15:40
+# @Author  : FebSun
+# @FileName: snapshot.py
+# @Software: PyCharm
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+
+# 二进制快照文件格式（小端）：
+#   header       magic、版本号、设备数、字符串数以及各个段的偏移
+#   reserved     定长的占用信息槽，reserve/release 时原地改写
+#   strings      字符串表，设备名、端口名、类型名等只存储一次
+#   string index 每个字符串的 (偏移, 长度)
+#   device index 每个设备的 (名称, 类型, 记录偏移, 记录长度)
+#   name order   按名称排序的设备序号，用于二分查找
+#   types        每种设备类型包含的设备序号
+#   records      设备和端口的记录，扩展属性以 JSON 存储
+#   adjacency    端口的连接关系 (设备序号, 端口序号)
+#   info         资源池的 info，JSON 格式
+MAGIC = b'ATRPSNAP'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIIIQQQQQQQQ')
+_RESERVED_SIZE = 512
+_RESERVED_OFFSET = _HEADER.size
+_STRING_INDEX = struct.Struct('<QI')
+_DEVICE_INDEX = struct.Struct('<IIQI')
+_DEVICE_RECORD = struct.Struct('<III')
+_PORT_RECORD = struct.Struct('<IIIIII')
+_LINK = struct.Struct('<II')
+_U32 = struct.Struct('<I')
+_NONE = 0xFFFFFFFF
+
+_DEVICE_FIELDS = ('name', 'type', 'description', 'ports')
+_PORT_FIELDS = ('parent', 'name', 'type', 'description', 'remote_ports')
+
+
+def is_snapshot(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = dict()
+        self.strings = list()
+
+    def intern(self, value):
+        if value is None:
+            return _NONE
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+
+def _extra(dict_obj, fields):
+    extra = {key: value for key, value in dict_obj.items() if key not in fields}
+    return json.dumps(extra, separators=(',', ':')).encode() if extra else b''
+
+
+def _pack_reserved(reserved):
+    data = json.dumps(reserved, separators=(',', ':')).encode() if reserved else b''
+    if len(data) + _U32.size > _RESERVED_SIZE:
+        raise ValueError("reservation information is too long for snapshot")
+    return (_U32.pack(len(data)) + data).ljust(_RESERVED_SIZE, b'\0')
+
+
+def write_snapshot(pool, filename):
+    """
+    把资源池写成二进制快照，先写临时文件再原子替换
+    """
+    strings = _StringTable()
+    names = list(pool.topology.keys())
+    positions = {name: number for number, name in enumerate(names)}
+    port_positions = dict()
+    devices = list()
+    for name in names:
+        device = pool.topology[name]
+        devices.append(device)
+        port_positions[name] = {port_name: number for number, port_name in enumerate(device.ports)}
+
+    records = bytearray()
+    adjacency = list()
+    device_index = list()
+    types = dict()
+    for number, (name, device) in enumerate(zip(names, devices)):
+        types.setdefault(device.type, list()).append(number)
+        dict_obj = device.to_dict()
+        record = bytearray()
+        extra = _extra(dict_obj, _DEVICE_FIELDS)
+        record += _DEVICE_RECORD.pack(strings.intern(device.description), len(device.ports), len(extra))
+        record += extra
+        for port_name, port in device.ports.items():
+            port_extra = _extra(dict_obj['ports'][port_name], _PORT_FIELDS)
+            links = [(positions[remote.parent.name], port_positions[remote.parent.name][remote.name])
+                     for remote in port.remote_ports]
+            record += _PORT_RECORD.pack(strings.intern(port_name), strings.intern(port.type),
+                                        strings.intern(port.description), len(port_extra),
+                                        len(adjacency), len(links))
+            record += port_extra
+            adjacency.extend(links)
+        device_index.append((strings.intern(name), strings.intern(device.type), len(records), len(record)))
+        records += record
+
+    type_data = bytearray(_U32.pack(len(types)))
+    for device_type, numbers in types.items():
+        type_data += _U32.pack(strings.intern(device_type)) + _U32.pack(len(numbers))
+        type_data += struct.pack(f'<{len(numbers)}I', *numbers)
+    string_data = bytearray()
+    string_index = bytearray()
+    for value in strings.strings:
+        data = value.encode()
+        string_index += _STRING_INDEX.pack(len(string_data), len(data))
+        string_data += data
+    name_order = sorted(range(len(names)), key=lambda number: names[number])
+    info = json.dumps(pool.information, separators=(',', ':')).encode()
+
+    sections = [
+        bytes(string_data),
+        bytes(string_index),
+        b''.join(_DEVICE_INDEX.pack(*entry) for entry in device_index),
+        struct.pack(f'<{len(name_order)}I', *name_order),
+        bytes(type_data),
+        bytes(records),
+        b''.join(_LINK.pack(*link) for link in adjacency),
+        _U32.pack(len(info)) + info
+    ]
+    offsets = list()
+    offset = _RESERVED_OFFSET + _RESERVED_SIZE
+    for section in sections:
+        offsets.append(offset)
+        offset += len(section)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(names), len(strings.strings), *offsets)
+
+    temp_name = f"{filename}.tmp"
+    with open(temp_name, 'wb') as file:
+        file.write(header)
+        file.write(_pack_reserved(pool.reserved))
+        for section in sections:
+            file.write(section)
+    os.replace(temp_name, filename)
+
+
+@contextmanager
+def reservation_lock(filename):
+    """
+    占用信息读取、检查和改写期间持有的排他锁（<快照文件>.lock），多个进程同时占用时只有一个能成功
+    """
+    with open(f"{filename}.lock", 'a') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def read_reserved(filename):
+    with open(filename, 'rb') as file:
+        file.seek(_RESERVED_OFFSET)
+        data = file.read(_RESERVED_SIZE)
+    length, = _U32.unpack_from(data)
+    return json.loads(data[_U32.size:_U32.size + length]) if length else None
+
+
+def write_reserved(filename, reserved):
+    """
+    原地改写快照中的占用信息，不需要重写整个文件
+    """
+    with open(filename, 'r+b') as file:
+        with mmap.mmap(file.fileno(), 0) as mapped:
+            mapped[_RESERVED_OFFSET:_RESERVED_OFFSET + _RESERVED_SIZE] = _pack_reserved(reserved)
+            mapped.flush()
+
+
+class SnapshotReader:
+    """
+    以 mmap 方式打开二进制快照，按需解析单个设备
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.device_count, self.string_count, self._strings_offset, self._string_index_offset,
+         self._device_index_offset, self._name_order_offset, self._types_offset, self._records_offset,
+         self._adjacency_offset, self._info_offset) = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a resource snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot version {version}")
+        self._string_cache = dict()
+        self._types = None
+        self._digest = None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def string(self, string_id):
+        if string_id == _NONE:
+            return None
+        value = self._string_cache.get(string_id)
+        if value is None:
+            offset, length = _STRING_INDEX.unpack_from(
+                self._map, self._string_index_offset + string_id * _STRING_INDEX.size)
+            start = self._strings_offset + offset
+            value = self._map[start:start + length].decode()
+            self._string_cache[string_id] = value
+        return value
+
+    def _device_entry(self, number):
+        return _DEVICE_INDEX.unpack_from(self._map, self._device_index_offset + number * _DEVICE_INDEX.size)
+
+    def name(self, number):
+        return self.string(self._device_entry(number)[0])
+
+    def names(self):
+        return [self.name(number) for number in range(self.device_count)]
+
+    def digest(self):
+        """
+        快照内容的 sha256，不包括占用信息槽
+        """
+        if self._digest is None:
+            digest = hashlib.sha256(self._map[:_RESERVED_OFFSET])
+            with memoryview(self._map) as view, view[_RESERVED_OFFSET + _RESERVED_SIZE:] as contents:
+                digest.update(contents)
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def reserved(self):
+        length, = _U32.unpack_from(self._map, _RESERVED_OFFSET)
+        start = _RESERVED_OFFSET + _U32.size
+        return json.loads(self._map[start:start + length]) if length else None
+
+    @property
+    def information(self):
+        length, = _U32.unpack_from(self._map, self._info_offset)
+        start = self._info_offset + _U32.size
+        return json.loads(self._map[start:start + length])
+
+    def find(self, name):
+        """
+        通过按名称排序的序号表二分查找设备，返回设备序号，找不到时返回 None
+        """
+        order = _NameOrder(self)
+        position = bisect_left(order, name)
+        if position < self.device_count and order[position] == name:
+            return order.number(position)
+        return None
+
+    def numbers_of_type(self, device_type):
+        if self._types is None:
+            self._types = dict()
+            offset = self._types_offset
+            count, = _U32.unpack_from(self._map, offset)
+            offset += _U32.size
+            for _ in range(count):
+                type_id, length = struct.unpack_from('<II', self._map, offset)
+                offset += 8
+                self._types[self.string(type_id)] = struct.unpack_from(f'<{length}I', self._map, offset)
+                offset += length * _U32.size
+        return self._types.get(device_type, ())
+
+    def port_name(self, number, position):
+        """
+        读取设备第 position 个端口的名称，不解析设备和端口的扩展属性
+        """
+        offset = self._device_entry(number)[2] + self._records_offset
+        description_id, port_count, extra_length = _DEVICE_RECORD.unpack_from(self._map, offset)
+        offset += _DEVICE_RECORD.size + extra_length
+        for _ in range(position):
+            offset += _PORT_RECORD.size + _PORT_RECORD.unpack_from(self._map, offset)[3]
+        return self.string(_PORT_RECORD.unpack_from(self._map, offset)[0])
+
+    def read_device(self, number):
+        """
+        解析一个设备，返回 (设备字典, 每个端口的连接列表)，连接为 (设备序号, 端口序号)
+        """
+        name_id, type_id, offset, length = self._device_entry(number)
+        offset += self._records_offset
+        description_id, port_count, extra_length = _DEVICE_RECORD.unpack_from(self._map, offset)
+        offset += _DEVICE_RECORD.size
+        dict_obj = {'name': self.string(name_id), 'type': self.string(type_id),
+                    'description': self.string(description_id)}
+        if extra_length:
+            dict_obj.update(json.loads(self._map[offset:offset + extra_length]))
+        offset += extra_length
+        ports = dict()
+        links = dict()
+        for _ in range(port_count):
+            (port_name_id, port_type_id, port_description_id, port_extra_length,
+             link_start, link_count) = _PORT_RECORD.unpack_from(self._map, offset)
+            offset += _PORT_RECORD.size
+            port_name = self.string(port_name_id)
+            port = {'name': port_name, 'type': self.string(port_type_id),
+                    'description': self.string(port_description_id)}
+            if port_extra_length:
+                port.update(json.loads(self._map[offset:offset + port_extra_length]))
+            offset += port_extra_length
+            ports[port_name] = port
+            start = self._adjacency_offset + link_start * _LINK.size
+            links[port_name] = [_LINK.unpack_from(self._map, start + i * _LINK.size) for i in range(link_count)]
+        dict_obj['ports'] = ports
+        return dict_obj, links
+
+
+class _NameOrder:
+    """
+    把按名称排序的序号表包装成序列，供 bisect 使用
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    def __len__(self):
+        return self.reader.device_count
+
+    def number(self, position):
+        return _U32.unpack_from(self.reader._map, self.reader._name_order_offset + position * _U32.size)[0]
+
+    def __getitem__(self, position):
+        return self.reader.name(self.number(position))
+
+
+class SnapshotTopology(MutableMapping):
+    """
+    基于快照的延迟加载拓扑，设备在第一次被访问时才创建，
+    端口的连接关系在第一次访问 remote_ports 时才映射
+    """
+
+    def __init__(self, reader, on_load=None):
+        self.reader = reader
+        self.on_load = on_load
+        self._loaded = dict()
+        self._added = dict()
+        self._removed = set()
+        self._names = None
+
+    def _all_names(self):
+        if self._names is None:
+            self._names = self.reader.names()
+        return self._names
+
+    def loaded(self):
+        """
+        已经创建的设备，按快照中的顺序排列，之后添加的设备排在最后
+        """
+        ret = {name: self._loaded[name] for name in self._all_names()
+               if name in self._loaded and name not in self._removed}
+        ret.update(self._added)
+        return ret
+
+    def _materialize(self, number):
+        from core.resource.pool import ResourceDevice
+
+        dict_obj, links = self.reader.read_device(number)
+        name = self.reader.name(number)
+        device = ResourceDevice.from_dict(dict_obj)
+        self._loaded[name] = device
+        self._attach_links(device, dict_obj, links)
+        if self.on_load is not None:
+            self.on_load(device, number)
+        return device
+
+    def _attach_links(self, device, dict_obj, links):
+        from core.resource.pool import RemotePorts
+
+        for port_name, port in device.ports.items():
+            port.remote_ports = RemotePorts(port, resolver=_SnapshotLinks(self, links[port_name]))
+
+    def source_digest(self):
+        """
+        打开时的拓扑内容的摘要，用于计算指纹而不创建设备
+        """
+        return self.reader.digest()
+
+    def sequence(self, name):
+        """
+        设备在拓扑中的序号，快照中的设备为设备编号，之后添加的设备返回 None
+        """
+        if name in self._added:
+            return None
+        return self.reader.find(name)
+
+    def load_type(self, device_type):
+        """
+        创建某一类型的所有设备，device_type 为 None 时创建全部设备
+        """
+        numbers = range(self.reader.device_count) if device_type is None \
+            else self.reader.numbers_of_type(device_type)
+        for number in numbers:
+            name = self.reader.name(number)
+            if name not in self._loaded and name not in self._removed:
+                self._materialize(number)
+
+    def __getitem__(self, name):
+        if name in self._added:
+            return self._added[name]
+        if name in self._removed:
+            raise KeyError(name)
+        device = self._loaded.get(name)
+        if device is not None:
+            return device
+        number = self.reader.find(name)
+        if number is None:
+            raise KeyError(name)
+        return self._materialize(number)
+
+    def __setitem__(self, name, device):
+        if name in self._added or self.reader.find(name) is None:
+            self._added[name] = device
+        else:
+            self._removed.discard(name)
+            self._loaded[name] = device
+
+    def __delitem__(self, name):
+        if name in self._added:
+            del self._added[name]
+        elif name not in self._removed and self.reader.find(name) is not None:
+            self._removed.add(name)
+            self._loaded.pop(name, None)
+        else:
+            raise KeyError(name)
+
+    def __contains__(self, name):
+        if name in self._added:
+            return True
+        return name not in self._removed and (name in self._loaded or self.reader.find(name) is not None)
+
+    def __iter__(self):
+        for name in self._all_names():
+            if name not in self._removed:
+                yield name
+        yield from list(self._added)
+
+    def __len__(self):
+        return self.reader.device_count - len(self._removed) + len(self._added)
+
+    def clear(self):
+        self._loaded.clear()
+        self._added.clear()
+        self._removed = set(self._all_names())
+
+
+class _SnapshotLinks:
+    """
+    快照中尚未映射的连接关系 (设备序号, 端口序号)，references 不需要创建对端设备
+    """
+
+    __slots__ = ('topology', 'links')
+
+    def __init__(self, topology, links):
+        self.topology = topology
+        self.links = links
+
+    def __call__(self):
+        ret = list()
+        for number, position in self.links:
+            ports = self.topology[self.topology.reader.name(number)].ports
+            ret.append(list(ports.values())[position])
+        return ret
+
+    def references(self):
+        reader = self.topology.reader
+        ret = list()
+        for number, position in self.links:
+            name = reader.name(number)
+            device = self.topology._loaded.get(name)
+            if device is not None:
+                ret.append((name, list(device.ports)[position]))
+            else:
+                ret.append((name, reader.port_name(number, position)))
+        return ret
+
+
+def open_snapshot(pool, filename, owner=None, types=None, names=None, ignore_reserved=False):
+    """
+    以延迟加载的方式把快照打开到资源池中，types 和 names 指定的设备会被预先创建
+    """
+    from core.resource.pool import ResourceError
+
+    reader = SnapshotReader(filename)
+    reserved = reader.reserved
+    if not ignore_reserved and reserved and reserved['owner'] != owner:
+        reader.close()
+        raise ResourceError(f"Resource is reserved by {reserved['owner']}")
+    pool.reserved = reserved
+    pool.information = reader.information
+    pool.topology = SnapshotTopology(reader, on_load=pool._device_loaded)
+    for device_type in types or ():
+        pool.topology.load_type(device_type)
+    for name in names or ():
+        if name in pool.topology:
+            pool.topology[name]
+
+
+def json_to_snapshot(json_file, snapshot_file):
+    from core.resource.loader import stream_load
+    from core.resource.pool import ResourcePool
+
+    pool = ResourcePool()
+    stream_load(pool, json_file, ignore_reserved=True)
+    write_snapshot(pool, snapshot_file)
+
+
+def snapshot_to_json(snapshot_file, json_file):
+    from core.resource.pool import ResourcePool
+
+    pool = ResourcePool()
+    open_snapshot(pool, snapshot_file, ignore_reserved=True)
+    try:
+        pool.save(json_file)
+    finally:
+        pool.topology.reader.close()
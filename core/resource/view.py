@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 07:30
+# @Author  : FebSun
+# @FileName: view.py
+# @Software: PyCharm
+"""
+资源池的写时复制视图（ResourcePool.view）。创建视图不复制任何数据，
+设备和端口在第一次访问时才包装成视图对象，没有在视图中修改过的属性直接从资源池中的对象读取。
+在视图中隐藏设备或端口、修改连接关系和属性只影响视图本身，资源池不变
+"""
+from collections.abc import Mapping
+
+from core.resource.pool import DevicePort, ResourceDevice, ResourceError, ResourcePool
+
+
+class _ResourceView:
+    """
+    设备视图和端口视图的公共部分：没有在视图中设置过的属性从资源池中的对象读取
+    """
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(object.__getattribute__(self, '_base'), name)
+
+    def _extension_items(self):
+        ret = self._base._extension_items()
+        ret.update(self.__dict__)
+        return ret
+
+    def __reduce__(self):
+        raise TypeError(f"{type(self).__name__} cannot be pickled, use the resource pool objects instead")
+
+
+class DeviceView(_ResourceView, ResourceDevice):
+    """
+    视图中的设备，ports 只包含视图中没有被隐藏的端口
+    """
+
+    __slots__ = ('_base',)
+
+    def __init__(self, view, base):
+        self._base = base
+        self._pool = view
+        self.name = base.name
+
+    @property
+    def ports(self):
+        return self._pool._ports_of(self)
+
+
+class PortView(_ResourceView, DevicePort):
+    """
+    视图中的端口，remote_ports 只包含视图中可见的对端端口。
+    在视图中修改连接关系之后 _links 为视图自己的对端端口列表，否则每次从资源池中的端口映射
+    """
+
+    __slots__ = ('_base', '_links')
+
+    def __init__(self, base, parent):
+        self._base = base
+        self._links = None
+        self.parent = parent
+        self.name = base.name
+
+    def _all_links(self):
+        if self._links is not None:
+            return self._links
+        view = self.parent._pool
+        return [view._port(port) for port in self._base.remote_ports]
+
+    @property
+    def remote_ports(self):
+        view = self.parent._pool
+        return [port for port in self._all_links() if view._port_visible(port)]
+
+    @remote_ports.setter
+    def remote_ports(self, value):
+        self._links = list(value)
+        self.parent._pool.touch()
+
+    def _references(self):
+        return [(port.parent.name, port.name) for port in self.remote_ports]
+
+
+class _ViewTopology(Mapping):
+    """
+    视图的 topology：按资源池中的顺序返回没有被隐藏的设备视图
+    """
+
+    def __init__(self, view, topology):
+        self.view = view
+        self.topology = topology
+
+    def __getitem__(self, name):
+        device = self.view._device(self.topology[name])
+        if not self.view._device_visible(device):
+            raise KeyError(name)
+        return device
+
+    def __iter__(self):
+        view = self.view
+        for name, device in self.topology.items():
+            if view._device_visible(view._device(device)):
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class _ViewIndex:
+    """
+    视图的索引：查询资源池的索引，去掉隐藏的设备，在视图中修改过属性的设备重新判断条件
+    """
+
+    def __init__(self, view):
+        self.view = view
+
+    @property
+    def _base(self):
+        return self.view.base.index
+
+    @property
+    def device_attributes(self):
+        return self._base.device_attributes
+
+    @property
+    def port_attributes(self):
+        return self._base.port_attributes
+
+    @property
+    def device_count(self):
+        return self._base.device_count
+
+    @staticmethod
+    def _match(resource, attributes):
+        return all(getattr(resource, attribute, None) == value for attribute, value in attributes.items())
+
+    def devices(self, device_type=None, **attributes):
+        view = self.view
+        conditions = dict(attributes)
+        if device_type is not None:
+            conditions['type'] = device_type
+        ret = list()
+        seen = set()
+        for device in self._base.devices(device_type, **attributes):
+            device = view._device(device)
+            if device.name in view._changed:
+                seen.add(device.name)
+                if not self._match(device, conditions):
+                    continue
+            if view._device_visible(device):
+                ret.append(device)
+        # 在视图中修改属性之后才满足条件的设备按资源池的顺序排在最后
+        extra = list()
+        for name in view._changed:
+            if name not in seen and name in view.topology:
+                device = view.topology[name]
+                if self._match(device, conditions):
+                    extra.append(device)
+        extra.sort(key=self.sequence)
+        return ret + extra
+
+    def ports(self, port_type=None, device_type=None, **attributes):
+        view = self.view
+        conditions = dict(attributes)
+        if port_type is not None:
+            conditions['type'] = port_type
+        ret = list()
+        for port in self._base.ports(port_type, device_type, **attributes):
+            port = view._port(port)
+            if port.parent.name in view._changed and not self._match(port, conditions):
+                continue
+            if view._port_visible(port):
+                ret.append(port)
+        return ret
+
+    def count(self, device_type):
+        return len(self.devices(device_type))
+
+    def sequence(self, device):
+        return self._base.sequence(device)
+
+
+class PoolView(ResourcePool):
+    """
+    资源池的写时复制视图，支持资源池所有的 collect_* 方法、match_topology 和设备级占用，
+    限制条件收到的是设备视图和端口视图。
+    hide 隐藏设备或端口，link、unlink、set_attribute 只修改视图，资源池的其他修改方法不可用。
+    资源池在视图创建之后的修改在视图中同样可见
+    """
+
+    def __init__(self, base, hidden=(), predicate=None):
+        super().__init__()
+        self.base = base
+        self.predicate = predicate
+        self.file_name = base.file_name
+        self.owner = base.owner
+        self.reserved = base.reserved
+        self.information = base.information
+        self.partial = base.partial
+        # 视图中的设备与资源池中的设备使用相同的配置接口实例
+        self.comm_id = base.comm_id
+        self.topology = _ViewTopology(self, base.topology)
+        self.index = _ViewIndex(self)
+        # 共享资源池中限制条件的实测代价
+        self.planner = base.planner
+        self._hidden = set()
+        # 在视图中修改过属性的设备（包括其端口）名称，按修改的先后排列
+        self._changed = dict()
+        self._resources = dict()
+        # 视图不发出修改事件，派生的数据结构按版本号（包括资源池的版本号）重新生成
+        self._derived_version = None
+        self.hide(*hidden)
+
+    @property
+    def version(self):
+        return self.base.version, self._changes
+
+    @version.setter
+    def version(self, value):
+        self._changes = value
+
+    def touch(self):
+        self._changes += 1
+
+    def _check_derived(self):
+        if self._derived_version != self.version:
+            self._graph = None
+            self._columns = None
+            self._digests = None
+            self._derived_version = self.version
+
+    def graph(self):
+        self._check_derived()
+        return super().graph()
+
+    def columns(self):
+        self._check_derived()
+        return super().columns()
+
+    def fingerprint(self):
+        self._check_derived()
+        return super().fingerprint()
+
+    def resource(self, resource):
+        """
+        返回资源池中的设备或端口在视图中对应的对象
+        """
+        if isinstance(resource, PortView) and resource.parent._pool is self:
+            return resource
+        if isinstance(resource, DeviceView) and resource._pool is self:
+            return resource
+        if isinstance(resource, DevicePort):
+            return self._port(resource)
+        if isinstance(resource, ResourceDevice):
+            return self._device(resource)
+        raise ResourceError(f"{resource} is not a device or port")
+
+    def _device(self, device):
+        ret = self._resources.get(id(device))
+        if ret is None:
+            ret = self._resources[id(device)] = DeviceView(self, device)
+        return ret
+
+    def _port(self, port):
+        ret = self._resources.get(id(port))
+        if ret is None:
+            ret = self._resources[id(port)] = PortView(port, self._device(port.parent))
+        return ret
+
+    def _ports_of(self, device):
+        hidden = self._hidden
+        return {name: self._port(port) for name, port in device._base.ports.items()
+                if (device.name, name) not in hidden}
+
+    def _device_visible(self, device):
+        if device.name in self._hidden:
+            return False
+        return self.predicate is None or self.predicate(device)
+
+    def _port_visible(self, port):
+        device = port.parent
+        return (device.name, port.name) not in self._hidden and self._device_visible(device)
+
+    @staticmethod
+    def _key(resource):
+        if isinstance(resource, str) or isinstance(resource, tuple):
+            return resource
+        return ResourcePool._reservation_key(resource)
+
+    def hide(self, *resources):
+        """
+        在视图中隐藏设备或端口，resources 为设备、端口、设备名称或者 (设备名称, 端口名称)
+        """
+        for resource in resources:
+            self._hidden.add(self._key(resource))
+        self.touch()
+
+    def show(self, *resources):
+        for resource in resources:
+            self._hidden.discard(self._key(resource))
+        self.touch()
+
+    def link(self, port1, port2):
+        """
+        在视图中连接两个端口，第一次修改端口的连接关系时复制该端口的对端端口列表
+        """
+        port1 = self.resource(port1)
+        port2 = self.resource(port2)
+        if port2 in port1._all_links():
+            raise ResourceError(f"{port1.parent.name}:{port1.name} is already connected to "
+                                f"{port2.parent.name}:{port2.name}")
+        port1._links = port1._all_links() + [port2]
+        if port1 is not port2:
+            port2._links = port2._all_links() + [port1]
+        self.touch()
+
+    def unlink(self, port1, port2):
+        port1 = self.resource(port1)
+        port2 = self.resource(port2)
+        if port2 not in port1._all_links():
+            raise ResourceError(f"{port1.parent.name}:{port1.name} is not connected to "
+                                f"{port2.parent.name}:{port2.name}")
+        port1._links = [port for port in port1._all_links() if port is not port2]
+        if port1 is not port2:
+            port2._links = [port for port in port2._all_links() if port is not port1]
+        self.touch()
+
+    def remove_device(self, device):
+        """
+        视图中删除设备等同于隐藏设备
+        """
+        self.hide(device)
+
+    def set_attribute(self, resource, name, value):
+        """
+        在视图中设置设备或端口的属性，资源池中的对象不变
+        """
+        if name in ('name', 'parent', 'ports', 'remote_ports', '_pool', '_remote_ports', '_base', '_links'):
+            raise ResourceError(f"attribute {name} cannot be changed")
+        resource = self.resource(resource)
+        setattr(resource, name, value)
+        self._changed[resource.parent.name if isinstance(resource, DevicePort) else resource.name] = None
+        self.touch()
+
+    def collect_connection_paths(self, resource, target_type=None, max_hops=1, port_types=None, via_types=None,
+                                 count=None):
+        return super().collect_connection_paths(self.resource(resource), target_type, max_hops, port_types,
+                                                via_types, count)
+
+    def collect_connection_route(self, resource, constraints=list(), parallel=None):
+        return super().collect_connection_route(self.resource(resource), constraints, parallel)
+
+    def reservation_store(self):
+        return self.base.reservation_store()
+
+    def _loaded_topology(self):
+        return _ViewTopology(self, self.base._loaded_topology())
+
+    def _load_candidates(self, device_type):
+        self.base._load_candidates(device_type)
+
+    def _unsupported(self, *args, **kwargs):
+        raise ResourceError('a resource pool view only supports hide, link, unlink and set_attribute')
+
+    load = save = save_snapshot = enable_journal = enable_selection_cache = compact = _unsupported
+    reserve = release = add_device = add_port = _journaled_add_port = _unsupported
+    declare_index = rebuild_index = subscribe = _unsupported
@@ -4,6 +4,7 @@
 # @Author  : FebSun
 # @FileName: constraint.py
 # @Software: PyCharm
+from core.resource.graph import ConnectivityGraph, component
 from core.resource.pool import Constraint, ConnectionConstraint, DevicePort, ResourceDevice
 
 
@@ -21,6 +22,13 @@ class PhoneMustBeAndroidConstraint(Constraint):
         else:
             self.description = f"Phone Type must be Android"
 
+    def get_index_lookup(self):
+        if self.version_op is None:
+            return {'type': 'Android'}, True
+        if self.version_op == '=':
+            return {'type': 'Android', 'version': self.version}, True
+        return {'type': 'Android'}, False
+
     def is_meet(self, resource, *args, **kwargs):
         # 首先判断资源类型是否是 ResourceType，type 的值是否是 Android
         if isinstance(resource, ResourceDevice) and resource.type == 'Android':
@@ -74,7 +82,7 @@ class ApMustHaveStaConnected(ConnectionConstraint):
 
     def get_connection(self, resource, *args, **kwargs):
         if not isinstance(resource, ResourceDevice) or resource.type != 'AP':
-            return False
+            return list()
         for port_key, port in resource.ports.items():
             if port.type != 'WIFI':
                 continue
@@ -131,7 +139,7 @@ class DeviceMustHaveTrafficGeneratorConnected(ConnectionConstraint):
 
     def get_connection(self, resource, *args, **kwargs):
         if not isinstance(resource, ResourceDevice):
-            return False
+            return list()
         meet_port = list()
         for port_key, port in resource.ports.items():
             # 假设测试仪表端口连在 ETH 端口上，跳过非 ETH 端口的判断
@@ -147,8 +155,8 @@ class DeviceMustHaveTrafficGeneratorConnected(ConnectionConstraint):
                     else:
                         meet_port.append(remote_port)
         if self.port_count:
-            if len(meet_port) > self.port_count:
-                return meet_port[0, self.port_count]
+            if len(meet_port) >= self.port_count:
+                return meet_port[0:self.port_count]
         else:
             if len(meet_port) > 0:
                 return meet_port[0:1]
@@ -169,3 +177,37 @@ class TrafficGeneratorSpeedMustGreaterThen(Constraint):
         if not isinstance(resource, DevicePort) or resource.parent.type != 'TrafficGen':
             return False
         return getattr(resource, 'speed', None) is not None and getattr(resource, 'speed') >= self.speed
+
+
+class DeviceMustReachDevice(ConnectionConstraint):
+    """
+    判断设备是否能在 max_hops 个连接之内到达 count 台指定类型的设备，
+    例如经过最多 2 台交换机连接到测试仪表：
+    DeviceMustReachDevice('TrafficGen', max_hops=3, via_types=['Switch'])
+    """
+
+    def __init__(self, target_type, max_hops=1, via_types=None, port_types=None, count=1):
+        super().__init__()
+        self.target_type = target_type
+        self.max_hops = max_hops
+        self.via_types = frozenset(via_types) if via_types is not None else None
+        self.port_types = frozenset(port_types) if port_types is not None else None
+        self.count = count
+        self.description = f"Device Must reach {count} {target_type} within {max_hops} hops"
+        if via_types is not None:
+            self.description += f" via {', '.join(sorted(self.via_types))}"
+
+    def is_meet(self, resource, *args, **kwargs):
+        return any(self.get_connection(resource))
+
+    def get_connection(self, resource, *args, **kwargs):
+        if not isinstance(resource, ResourceDevice):
+            return list()
+        if resource._pool is not None:
+            graph = resource._pool.graph()
+        else:
+            graph = ConnectivityGraph(component(resource))
+        routes = graph.paths(resource, self.target_type, self.max_hops, self.port_types, self.via_types, self.count)
+        if len(routes) < self.count:
+            return list()
+        return routes
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 21:40
+# @Author  : FebSun
+# @FileName: conftest.py
+# @Software: PyCharm
+import pytest
+
+from core.resource.pool import ResourcePool
+
+
+def build_lab(count, stations=lambda number: True, traffic_generator=None):
+    """
+    ap{i} 的 WIFI 端口连接 sta{i}，stations(i) 为 False 时该 AP 没有 STA。
+    traffic_generator 为 'ap' 或 'sta' 时先创建测试仪 tg，端口 ETH1/{i}（奇数 10000M，偶数 1000M）
+    连接 AP 或 STA 的 ETH 端口
+    """
+    rp = ResourcePool()
+    tg = None if traffic_generator is None else rp.add_device('tg', type='TrafficGen')
+    for i in range(count):
+        ap = rp.add_device(f'ap{i}', type='AP')
+        ap.add_port('WIFI', type='WIFI')
+        if traffic_generator == 'ap':
+            rp.link(ap.add_port('ETH', type='ETH'), _tg_port(tg, i))
+        if not stations(i):
+            continue
+        sta = rp.add_device(f'sta{i}', type='STA')
+        rp.link(ap.ports['WIFI'], sta.add_port('WIFI', type='WIFI'))
+        if traffic_generator == 'sta':
+            rp.link(sta.add_port('ETH', type='ETH'), _tg_port(tg, i))
+    return rp
+
+
+def _tg_port(tg, number):
+    port = tg.add_port(f'ETH1/{number}', type='ETH')
+    port.speed = 10000 if number % 2 else 1000
+    return port
+
+
+def build_sta_lab(sta_count=3, tg_ports=((1000, 'sta0'), (1000, 'sta1'), (1000, 'sta2'))):
+    """
+    ap1 的 WIFI 端口连接 sta_count 个 STA，tg_ports 为测试仪端口 PORT1/1/{n} 的 (速率, 连接的 STA)
+    """
+    rp = ResourcePool()
+    ap = rp.add_device('ap1', type='AP')
+    ap.add_port('WIFI', type='WIFI')
+    tg = rp.add_device('tg', type='TrafficGen')
+    for i in range(sta_count):
+        sta = rp.add_device(f'sta{i}', type='STA')
+        rp.link(ap.ports['WIFI'], sta.add_port('WIFI', type='WIFI'))
+        sta.add_port('ETH1/1', type='ETH')
+    for number, (speed, sta_name) in enumerate(tg_ports):
+        port = tg.add_port(f'PORT1/1/{number}', type='ETH')
+        port.speed = speed
+        rp.link(rp.topology[sta_name].ports['ETH1/1'], port)
+    return rp
+
+
+@pytest.fixture
+def lab():
+    return build_lab
+
+
+@pytest.fixture
+def sta_lab():
+    return build_sta_lab
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 22:20
+# @Author  : FebSun
+# @FileName: ssh_server.py
+# @Software: PyCharm
+import hashlib
+import os
+import shlex
+import socket
+import threading
+import time
+import paramiko
+
+_host_key = None
+
+
+def host_key():
+    global _host_key
+    if _host_key is None:
+        _host_key = paramiko.RSAKey.generate(1024)
+    return _host_key
+
+
+class _Server(paramiko.ServerInterface):
+    def __init__(self, owner):
+        self.owner = owner
+        self.shells = dict()
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.owner.username, self.owner.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            self.shells[chanid] = threading.Event()
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return self.owner.shell
+
+    def check_channel_shell_request(self, channel):
+        self.shells[channel.get_id()].set()
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        # 只支持 sha256sum，用于校验传输的文件
+        command = shlex.split(command.decode())
+        if not self.owner.exec_checksum or len(command) != 2 or command[0] != 'sha256sum':
+            return False
+        threading.Thread(target=self._sha256sum, args=(channel, command[1]), daemon=True).start()
+        return True
+
+    def _sha256sum(self, channel, path):
+        try:
+            with open(self.owner.local_path(path), 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            channel.sendall(f"{digest}  {path}\n".encode())
+            channel.send_exit_status(0)
+        except OSError:
+            channel.send_exit_status(1)
+        channel.close()
+
+
+class _SftpHandle(paramiko.SFTPHandle):
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+
+class _SftpServer(paramiko.SFTPServerInterface):
+    """
+    把 SFTP 路径映射到 SshServer.root 目录下
+    """
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.owner = server.owner
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self.owner.local_path(path)))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    lstat = stat
+
+    def remove(self, path):
+        try:
+            os.remove(self.owner.local_path(path))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        return paramiko.SFTP_OK
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self.owner.local_path(path), flags, 0o644)
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            mode = 'rb'
+        handle = _SftpHandle(flags)
+        handle.filename = path
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+
+class SshServer:
+    """
+    测试用的本地 SSH 服务器，shell 中每收到一行就回显 "echo: <行>" 和提示符 "$ "，
+    "seq <n>" 输出 1 到 n 每行一个数字，delay 为每次回显之前等待的秒数。
+    root 不为 None 时提供以 root 为根目录的 SFTP，exec_checksum 为 True 时支持执行 sha256sum，
+    shell 为 False 时拒绝 pty 请求
+    """
+
+    def __init__(self, username='admin', password='admin', delay=0, root=None, exec_checksum=True):
+        self.username = username
+        self.password = password
+        self.delay = delay
+        self.root = root
+        self.exec_checksum = exec_checksum
+        self.shell = True
+        self.connections = 0
+        self.transports = list()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(16)
+        self.host, self.port = self._socket.getsockname()
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                sock, address = self._socket.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock):
+        transport = paramiko.Transport(sock)
+        transport.add_server_key(host_key())
+        if self.root is not None:
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, _SftpServer)
+        server = _Server(self)
+        self.transports.append(transport)
+        try:
+            transport.start_server(server=server)
+        except Exception:
+            return
+        while transport.is_active():
+            channel = transport.accept(1)
+            if channel is not None:
+                threading.Thread(target=self._shell, args=(server, channel), daemon=True).start()
+
+    def _shell(self, server, channel):
+        if not server.shells[channel.get_id()].wait(5):
+            return
+        try:
+            self._echo(channel)
+        except (OSError, EOFError, paramiko.SSHException):
+            # 客户端已经断开
+            pass
+
+    def _echo(self, channel):
+        channel.sendall(b'$ ')
+        buffer = b''
+        while True:
+            data = channel.recv(4096)
+            if not data:
+                break
+            buffer += data
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                line = line.rstrip(b'\r')
+                if line == b'exit':
+                    channel.close()
+                    return
+                time.sleep(self.delay)
+                if line.startswith(b'seq '):
+                    channel.sendall(b''.join(b'%d\r\n' % number for number in range(1, int(line[4:]) + 1)) + b'$ ')
+                else:
+                    channel.sendall(b'echo: ' + line + b'\r\n$ ')
+        channel.close()
+
+    def local_path(self, path):
+        return os.path.join(self.root, path.lstrip('/'))
+
+    def drop_connections(self):
+        """
+        模拟网络中断，关闭所有已经建立的 SSH 连接
+        """
+        for transport in self.transports:
+            transport.close()
+        self.transports = list()
+
+    def close(self):
+        self._closed = True
+        self.drop_connections()
+        self._socket.close()
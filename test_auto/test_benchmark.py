@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 02:10
+# @Author  : FebSun
+# @FileName: test_benchmark.py
+# @Software: PyCharm
+import json
+
+from benchmark.suite import compare, run
+from benchmark.topology import TopologySpec, generate
+
+
+def test_generate_is_deterministic():
+    spec = TopologySpec(aps=20, stas_per_ap=3, traffic_generators=2, tg_ports=8, seed=7)
+    rp1, rp2 = generate(spec), generate(spec)
+    assert len(rp1.topology) == spec.devices
+    assert [device.to_dict() for device in rp1.topology.values()] == \
+        [device.to_dict() for device in rp2.topology.values()]
+
+
+def test_suite_output_and_compare():
+    spec = TopologySpec(aps=10, stas_per_ap=2, traffic_generators=2, tg_ports=4)
+    result = run(spec, repeat=1, only=['load_json', 'collect_all_device_nested'])
+    assert set(result['results']) == {'load_json', 'collect_all_device_nested'}
+    json.dumps(result)
+    baseline = json.loads(json.dumps(result))
+    baseline['results']['load_json']['min_seconds'] /= 10
+    assert 'load_json' in compare(result, baseline, 0.2)
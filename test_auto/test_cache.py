@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 13:50
+# @Author  : FebSun
+# @FileName: test_cache.py
+# @Software: PyCharm
+from core.resource.cache import ConstraintCache
+from core.resource.pool import ConnectionConstraint
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    TrafficGeneratorSpeedMustGreaterThen
+
+
+def nested_constraint(speed=1000):
+    return ApMustHaveStaConnected(
+        sta_constraints=[DeviceMustHaveTrafficGeneratorConnected(
+            speed_consrtaint=TrafficGeneratorSpeedMustGreaterThen(speed))],
+        sta_count=3)
+
+
+def test_constraint_key_depends_on_parameters():
+    assert nested_constraint().get_key() == nested_constraint().get_key()
+    assert nested_constraint().get_key() != nested_constraint(10000).get_key()
+
+
+def test_nested_connection_evaluated_once(sta_lab):
+    rp = sta_lab()
+    constraint = nested_constraint()
+    assert [d.name for d in rp.collect_all_device('AP', [constraint])] == ['ap1']
+    misses = rp.constraint_cache.misses
+    routes = rp.collect_connection_route(rp.topology['ap1'], [nested_constraint()])
+    assert len(routes) == 3
+    assert rp.constraint_cache.misses == misses
+    assert rp.constraint_cache.hits > 0
+
+
+class LiveConnection(ConnectionConstraint):
+    cacheable = False
+    calls = 0
+
+    def is_meet(self, resource, *args, **kwargs):
+        return bool(self.get_connection(resource))
+
+    def get_connection(self, resource, *args, **kwargs):
+        LiveConnection.calls += 1
+        return list(resource.ports['WIFI'].remote_ports)
+
+
+def test_cached_results_are_copies(sta_lab):
+    rp = sta_lab()
+    constraint = nested_constraint()
+    connection = constraint.get_connection(rp.topology['ap1'])
+    connection.clear()
+    assert len(constraint.get_connection(rp.topology['ap1'])) == 3
+    # 修改参数之后 key 随之变化，不会命中修改之前的结果
+    key = constraint.get_key()
+    constraint.sta_count = 4
+    assert constraint.get_key() != key
+    assert not constraint.is_meet(rp.topology['ap1'])
+
+
+def test_uncacheable_constraint_not_memoized(sta_lab):
+    rp = sta_lab()
+    constraint = LiveConnection()
+    for _ in range(2):
+        assert constraint.is_meet(rp.topology['ap1'])
+    assert LiveConnection.calls == 2
+    assert len(rp.constraint_cache) == 0
+
+
+def test_topology_change_invalidates_cache(sta_lab):
+    rp = sta_lab()
+    constraint = nested_constraint()
+    assert constraint.is_meet(rp.topology['ap1'])
+    rp.topology['sta0'].ports['WIFI'].remote_ports.clear()
+    rp.topology['ap1'].ports['WIFI'].remote_ports.remove(rp.topology['sta0'].ports['WIFI'])
+    assert not constraint.is_meet(rp.topology['ap1'])
+
+
+def test_lru_eviction():
+    version = 0
+    cache = ConstraintCache(lambda: version, maxsize=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get_or_compute(key, lambda: key)
+    assert cache.info()['size'] == 2
+    assert cache.get_or_compute('b', lambda: 'new') == 'new'
+    assert (cache.hits, cache.misses) == (1, 4)
+    version = 1
+    cache.get_or_compute('a', lambda: 'a')
+    assert len(cache) == 1
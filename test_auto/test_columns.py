@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 04:50
+# @Author  : FebSun
+# @FileName: test_columns.py
+# @Software: PyCharm
+import pytest
+
+from core.resource.columns import Column
+from core.resource.pool import Constraint, ResourcePool
+from core.resource.predicate import AttrConstraint, PortAttrConstraint
+from product.resource.constraint import PhoneMustBeAndroidConstraint
+
+numpy = pytest.importorskip('numpy')
+
+
+class NameConstraint(Constraint):
+    def __init__(self, names):
+        super().__init__()
+        self.names = names
+        self.checked = list()
+        self.description = f"name in {names}"
+
+    def is_meet(self, resource, *args, **kwargs):
+        self.checked.append(resource.name)
+        return resource.name in self.names
+
+
+def build_pool():
+    rp = ResourcePool()
+    for i in range(12):
+        phone = rp.add_device(f'phone{i}', type='Android')
+        # 部分手机没有版本号
+        phone.version = 7 + i % 6 if i % 4 else None
+    for i in range(4):
+        tg = rp.add_device(f'tg{i}', type='TrafficGen')
+        tg.add_port('ETH1/1', type='ETH').speed = 1000
+        tg.add_port('ETH1/2', type='ETH').speed = 10000 if i % 2 else 1000
+        tg.add_port('MGMT', type='MGMT').speed = 100000
+    return rp
+
+
+def test_column_compare_matches_scalar():
+    values = [3, None, 7, 10, 7]
+    column = Column(values)
+    assert column.numeric
+    for op in ('=', '!=', '>', '>=', '<', '<='):
+        expected = [value is not None and PhoneMustBeAndroidConstraint(op, 7).is_meet(_phone(value))
+                    for value in values]
+        assert list(column.compare(op, 7)) == expected
+    assert list(column.compare('!=', 'x')) == [True, False, True, True, True]
+    strings = Column(['1.0', None, '2.0', 3])
+    assert not strings.numeric
+    assert list(strings.compare('=', '2.0')) == [False, False, True, False]
+    # 无法比较的类型返回 False
+    assert list(strings.compare('>', '1.5')) == [False, False, True, False]
+
+
+def _phone(version):
+    rp = ResourcePool()
+    phone = rp.add_device('phone', type='Android')
+    phone.version = version
+    return phone
+
+
+def test_attr_constraint_matches_scalar_constraint():
+    rp = build_pool()
+    for op in ('>', '>=', '<', '<=', '!='):
+        constraint = AttrConstraint('version', op, 9, device_type='Android')
+        plan = rp.compile(None, [constraint])
+        assert [stage.kind for stage in plan.stages] == ['index', 'vector']
+        expected = rp.collect_all_device(None, [PhoneMustBeAndroidConstraint(op, 9)])
+        assert plan.execute(rp) == expected
+        assert [device for device in rp.topology.values() if constraint.is_meet(device)] == expected
+
+
+def test_port_attr_constraint():
+    rp = build_pool()
+    constraint = PortAttrConstraint('speed', '>=', 10000, port_type='ETH')
+    assert [device.name for device in rp.collect_all_device('TrafficGen', [constraint])] == ['tg1', 'tg3']
+    assert [device.name for device in rp.collect_all_device(None, [PortAttrConstraint('speed', '>', 10000)])] == \
+        ['tg0', 'tg1', 'tg2', 'tg3']
+    assert constraint.is_meet(rp.topology['tg1'].ports['ETH1/2'])
+    assert not constraint.is_meet(rp.topology['tg1'].ports['MGMT'])
+
+
+def test_mixed_constraints_check_remaining_candidates():
+    rp = build_pool()
+    scalar = NameConstraint({'phone3', 'phone5', 'phone6'})
+    devices = rp.collect_device(None, 1, [scalar, AttrConstraint('version', '>=', 10, device_type='Android')])
+    assert [device.name for device in devices] == ['phone3']
+    # 只有通过列式判断的设备才逐个判断
+    assert scalar.checked == ['phone3']
+    plan = rp.explain([AttrConstraint('version', '>=', 10), scalar], 'Android')
+    assert [stage.kind for stage in plan.stages] == ['index', 'vector', 'filter']
+    assert (plan.stages[1].rows_in, plan.stages[1].rows_out) == (12, 5)
+
+
+def test_columns_follow_topology_version():
+    rp = build_pool()
+    constraint = AttrConstraint('version', '>=', 12)
+    assert [device.name for device in rp.collect_all_device(None, [constraint])] == ['phone5', 'phone11']
+    rp.set_attribute(rp.topology['phone0'], 'version', 12)
+    assert [device.name for device in rp.collect_all_device(None, [constraint])] == ['phone0', 'phone5', 'phone11']
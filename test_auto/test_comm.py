@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 01:20
+# @Author  : FebSun
+# @FileName: test_comm.py
+# @Software: PyCharm
+import threading
+import time
+
+import pytest
+
+from core.resource.comm import comm_key, comm_registry, using_comm
+from core.resource.pool import ResourceError, ResourcePool, register_resource
+from core.resource.snapshot import json_to_snapshot
+
+
+class FakeComm:
+    created = 0
+    lock = threading.Lock()
+
+    def __init__(self, resource):
+        with FakeComm.lock:
+            FakeComm.created += 1
+        self.resource = resource
+        self.connected = False
+        self.closed = False
+
+    def connect(self):
+        if self.resource.name == 'broken':
+            raise ConnectionError('unreachable')
+        time.sleep(0.2)
+        self.connected = True
+
+    def disconnect(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def registry():
+    FakeComm.created = 0
+    register_resource('device', 'CommTestAP', FakeComm, scope='test')
+    register_resource('device', 'CommTestSW', FakeComm, scope='session')
+    register_resource('port', 'CommTestETH', FakeComm, scope='test')
+    register_resource('device', 'CommTestSTA', FakeComm)
+    yield
+    comm_registry.end_scope('process')
+
+
+def build_pool(tmp_path):
+    rp = ResourcePool()
+    for i in range(4):
+        rp.add_device(f'ap{i}', type='CommTestAP').add_port('ETH1/1', type='CommTestETH')
+    rp.add_device('sw', type='CommTestSW')
+    rp.add_device('sta', type='CommTestSTA')
+    file_name = str(tmp_path / 'pool.json')
+    rp.save(file_name)
+    rp = ResourcePool()
+    rp.load(file_name, 'alice')
+    return rp
+
+
+def test_scopes(tmp_path):
+    rp = build_pool(tmp_path)
+    ap, sw, sta = rp.topology['ap0'], rp.topology['sw'], rp.topology['sta']
+    assert ap.get_comm_instance() is ap.get_comm_instance()
+    assert ap.ports['ETH1/1'].get_comm_instance() is not ap.get_comm_instance()
+    # 没有指定 scope 的类型保持原来的行为
+    assert sta.get_comm_instance() is not sta.get_comm_instance()
+    ap_comm, sw_comm = ap.get_comm_instance(), sw.get_comm_instance()
+    comm_registry.end_scope('test')
+    assert ap_comm.closed and not sw_comm.closed
+    assert ap.get_comm_instance() is not ap_comm
+    assert sw.get_comm_instance() is sw_comm
+    comm_registry.end_scope('session')
+    assert sw_comm.closed
+
+
+def test_release_and_error_cleanup(tmp_path):
+    rp = build_pool(tmp_path)
+    ap0, ap1 = rp.topology['ap0'], rp.topology['ap1']
+    rp.reserve_devices([ap0, ap1])
+    comm0, port_comm, comm1 = ap0.get_comm_instance(), ap0.ports['ETH1/1'].get_comm_instance(), \
+        ap1.get_comm_instance()
+    rp.release_devices([ap0])
+    assert comm0.closed and port_comm.closed and not comm1.closed
+    with pytest.raises(RuntimeError):
+        with using_comm(ap1) as comm:
+            assert comm is comm1
+            raise RuntimeError('device hang')
+    assert comm1.closed
+    assert ap1.get_comm_instance() is not comm1
+
+
+def test_release_checks_owner_before_teardown(tmp_path):
+    rp = build_pool(tmp_path)
+    other = ResourcePool()
+    other.load(rp.file_name, 'bob')
+    rp.reserve()
+    comm = rp.topology['ap0'].get_comm_instance()
+    # 其他 owner 释放失败时不关闭当前 owner 的连接
+    with pytest.raises(ResourceError):
+        other.release()
+    assert not comm.closed
+    rp.release()
+    assert comm.closed
+
+
+def test_release_only_closes_own_pool(tmp_path):
+    rp = build_pool(tmp_path)
+    # 另一个资源文件中的同名设备
+    other_file = str(tmp_path / 'other.json')
+    rp.save(other_file)
+    other = ResourcePool()
+    other.load(other_file, 'bob')
+    comm, other_comm = rp.topology['ap0'].get_comm_instance(), other.topology['ap0'].get_comm_instance()
+    assert comm is not other_comm
+    rp.reserve()
+    rp.release()
+    assert comm.closed and not other_comm.closed
+
+    # 快照资源池释放时不创建设备
+    snapshot_file = str(tmp_path / 'pool.snap')
+    json_to_snapshot(rp.file_name, snapshot_file)
+    snapshot = ResourcePool()
+    snapshot.load(snapshot_file, 'alice')
+    comm = snapshot.topology['ap1'].get_comm_instance()
+    snapshot.reserve()
+    snapshot.release()
+    assert comm.closed
+    assert list(snapshot.topology.loaded()) == ['ap1']
+
+
+def test_prewarm_in_parallel(tmp_path):
+    rp = build_pool(tmp_path)
+    # 没有占用任何资源时不预热
+    assert rp.prewarm() == dict()
+    assert FakeComm.created == 0
+    rp.reserve()
+    rp.add_device('broken', type='CommTestAP')
+    start = time.monotonic()
+    errors = rp.prewarm(workers=8)
+    # 6 个设备每个连接 0.2 秒，并发执行
+    assert time.monotonic() - start < 0.6
+    assert list(errors) == [rp.topology['broken']]
+    assert all(rp.topology[f'ap{i}'].get_comm_instance().connected for i in range(4))
+    # 连接失败的实例不会被缓存
+    assert comm_key(rp.topology['broken']) not in comm_registry
+    rp.reserve_devices([rp.topology['ap2']])
+    FakeComm.created = 0
+    comm_registry.teardown(pool=rp.comm_id)
+    rp.prewarm()
+    assert FakeComm.created == 1
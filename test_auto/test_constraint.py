@@ -1,4 +1,5 @@
 from core.resource.pool import *
+from product.resource.constraint import *
 
 ap1 = ResourceDevice(name='ap1', type='AP')
 ap1.add_port('ETH1/1', type='ETH')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 08:50
+# @Author  : FebSun
+# @FileName: test_events.py
+# @Software: PyCharm
+import pytest
+
+from core.resource.pool import ResourceDevice, ResourceError, ResourcePool
+from product.resource.constraint import ApMustHaveStaConnected
+
+
+def test_change_events(lab):
+    rp = lab(3)
+    events = list()
+    rp.subscribe(events.append)
+    ap = rp.add_device('ap9', type='AP')
+    port = ap.add_port('WIFI', type='WIFI')
+    port.link(rp.topology['sta0'].ports['WIFI'])
+    port.set_attribute('channel', 36)
+    ap.set_attribute('version', '2.0')
+    rp.remove_device('ap9')
+    assert [repr(event) for event in events] == [
+        'ChangeEvent(add_device, ap9)',
+        'ChangeEvent(add_port, ap9:WIFI)',
+        'ChangeEvent(link, ap9:WIFI, sta0:WIFI)',
+        'ChangeEvent(set, ap9:WIFI, channel=36)',
+        'ChangeEvent(set, ap9, version=\'2.0\')',
+        'ChangeEvent(unlink, ap9:WIFI, sta0:WIFI)',
+        'ChangeEvent(remove_device, ap9)']
+    assert [device.name for device in events[2].devices()] == ['ap9', 'sta0']
+    assert 'ap9' not in rp.topology and ap._pool is None
+    assert len(rp.topology['sta0'].ports['WIFI'].remote_ports) == 1
+    assert rp.collect_all_device('AP', [ApMustHaveStaConnected()]) == [rp.topology[f'ap{i}'] for i in range(3)]
+    # 直接修改 remote_ports 只能发出 touch 事件
+    rp.topology['ap0'].ports['WIFI'].remote_ports.append(rp.topology['sta1'].ports['WIFI'])
+    assert events[-1].op == 'touch' and events[-1].devices() is None
+    rp.unsubscribe(events.append)
+    with pytest.raises(ResourceError):
+        rp.remove_device('ap9')
+
+
+def test_derived_structures_follow_changes(lab):
+    rp = lab(3)
+    graph = rp.graph()
+    columns = rp.columns()
+    columns.device_column('version')
+    rp.unlink(rp.topology['ap1'].ports['WIFI'], rp.topology['sta1'].ports['WIFI'])
+    rp.link(rp.topology['ap1'].ports['WIFI'], rp.topology['sta2'].ports['WIFI'])
+    rp.set_attribute(rp.topology['sta2'], 'version', 3)
+    # 连接和属性的修改增量更新，不重新生成
+    assert rp.graph() is graph and rp.columns() is columns
+    assert [route.target.name for route in rp.collect_connection_paths(rp.topology['ap1'], 'STA')] == ['sta2']
+    assert [route.target.name for route in rp.collect_connection_paths(rp.topology['sta2'], 'AP')] == \
+        ['ap2', 'ap1']
+    assert list(columns.device_column('version').compare('=', 3)) == [False, False, False, False, False, True]
+    rp.remove_device(rp.topology['ap2'])
+    assert rp.graph() is not graph and rp.columns() is not columns
+    assert [route.target.name for route in rp.collect_connection_paths(rp.topology['sta2'], 'AP')] == ['ap1']
+
+
+def test_fingerprint_and_journal(lab, tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    lab(3).save(filename)
+    rp = ResourcePool()
+    rp.load(filename)
+    rp.enable_journal()
+    fingerprint = rp.fingerprint()
+    rp.topology['ap0'].ports['WIFI'].set_attribute('channel', 36)
+    rp.remove_device('sta1')
+    assert rp.fingerprint() != fingerprint
+    other = ResourcePool()
+    other.load(filename)
+    assert 'sta1' not in other.topology
+    assert len(other.topology['ap1'].ports['WIFI'].remote_ports) == 0
+    # 增量更新的指纹与重新计算的相同
+    assert other.fingerprint() == rp.fingerprint()
+
+
+def test_mutation_without_pool():
+    ap = ResourceDevice('ap', type='AP')
+    sta = ResourceDevice('sta', type='STA')
+    ap.add_port('WIFI', type='WIFI').link(sta.add_port('WIFI', type='WIFI'))
+    assert ap.ports['WIFI'].remote_ports[0] is sta.ports['WIFI']
+    sta.set_attribute('version', 1)
+    sta.ports['WIFI'].unlink(ap.ports['WIFI'])
+    assert len(ap.ports['WIFI'].remote_ports) == 0 and sta.version == 1
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 23:10
+# @Author  : FebSun
+# @FileName: test_fanout.py
+# @Software: PyCharm
+import asyncio
+import time
+import pytest
+from core.resource.comm import comm_registry
+from core.resource.pool import ResourcePool, register_resource
+from test_auto.ssh_server import SshServer
+from thirdpart.commandline.fanout import fan_out, fan_out_all
+from thirdpart.commandline.pool import SshConnectionPool
+from thirdpart.commandline.ssh import AsyncSshClient
+
+
+@pytest.fixture
+def server():
+    server = SshServer(delay=0.3)
+    yield server
+    server.close()
+
+
+def build_pool(server, count, pool):
+    register_resource('device', 'FanOutSTA', lambda device: AsyncSshClient(
+        server.host, server.port, server.username, server.password, pool=pool))
+    rp = ResourcePool()
+    for i in range(count):
+        rp.add_device(f'sta{i}', type='FanOutSTA')
+    return rp
+
+
+def test_async_client(server):
+    pool = SshConnectionPool()
+
+    async def run():
+        async with AsyncSshClient(server.host, server.port, server.username, server.password, pool=pool) as client:
+            assert 'echo: hello' in await client.send_and_wait('hello', r'echo: hello', timeout=5)
+            with pytest.raises(TimeoutError):
+                await client.send_and_wait('slow', r'never', timeout=0.1)
+
+    asyncio.run(run())
+    pool.close_all()
+
+
+def test_fan_out_runs_concurrently(server):
+    pool = SshConnectionPool()
+    rp = build_pool(server, 6, pool)
+    devices = list(rp.topology.values())
+    start = time.monotonic()
+    results = fan_out_all(devices, 'uname', r'echo: uname', timeout=10, concurrency=6)
+    # 6 台设备每台 0.3 秒，串行至少需要 1.8 秒
+    assert time.monotonic() - start < 1.5
+    assert [result.device for result in results] == devices
+    assert all(result.ok and 'echo: uname' in result.output for result in results)
+    pool.close_all()
+
+
+def test_fan_out_timeout_and_order(server):
+    pool = SshConnectionPool()
+    rp = build_pool(server, 3, pool)
+
+    async def run():
+        return [result async for result in
+                fan_out(rp.topology.values(), 'uname', r'never', timeout=0.5, concurrency=2)]
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(result.error, TimeoutError) for result in results)
+    pool.close_all()
+
+
+class EchoComm:
+    def __init__(self, device):
+        self.closed = False
+
+    def connect(self):
+        pass
+
+    def send_and_wait(self, string, wait_for, timeout):
+        return f"echo: {string}"
+
+    def disconnect(self):
+        self.closed = True
+
+
+def test_fan_out_keeps_cached_instances():
+    register_resource('device', 'FanOutCached', EchoComm, scope='test')
+    register_resource('device', 'FanOutPlain', EchoComm)
+    rp = ResourcePool()
+    cached = rp.add_device('cached', type='FanOutCached')
+    plain = rp.add_device('plain', type='FanOutPlain')
+    plain_comm = EchoComm(plain)
+    plain.get_comm_instance = lambda: plain_comm
+    results = fan_out_all([cached, plain], 'uname', r'echo', timeout=5)
+    assert all(result.ok for result in results)
+    # 资源池缓存的实例由作用域关闭，其他实例执行之后断开
+    comm = cached.get_comm_instance()
+    assert not comm.closed and plain_comm.closed
+    comm_registry.end_scope('test')
+    assert comm.closed
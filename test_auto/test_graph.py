@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 20:20
+# @Author  : FebSun
+# @FileName: test_graph.py
+# @Software: PyCharm
+from core.resource.pool import ResourcePool
+from product.resource.constraint import DeviceMustReachDevice
+
+
+def build_pool():
+    """
+    ap1 - sw1 - sw2 - tg
+    ap2 - tg
+    ap3 - phone - tg
+    """
+    rp = ResourcePool()
+    for name, device_type in (('ap1', 'AP'), ('ap2', 'AP'), ('ap3', 'AP'), ('sw1', 'Switch'),
+                              ('sw2', 'Switch'), ('phone', 'STA'), ('tg', 'TrafficGen')):
+        rp.add_device(name, type=device_type)
+        for number in range(1, 4):
+            rp.add_port(name, f'ETH1/{number}', type='ETH')
+    rp.add_port('ap3', 'WIFI', type='WIFI')
+    rp.add_port('phone', 'WIFI', type='WIFI')
+    for device1, port1, device2, port2 in (('ap1', 'ETH1/1', 'sw1', 'ETH1/1'), ('sw1', 'ETH1/2', 'sw2', 'ETH1/1'),
+                                           ('sw2', 'ETH1/2', 'tg', 'ETH1/1'), ('ap2', 'ETH1/1', 'tg', 'ETH1/2'),
+                                           ('ap3', 'WIFI', 'phone', 'WIFI'), ('phone', 'ETH1/1', 'tg', 'ETH1/3')):
+        rp.link(rp.topology[device1].ports[port1], rp.topology[device2].ports[port2])
+    return rp
+
+
+def test_paths_return_full_route():
+    rp = build_pool()
+    routes = rp.collect_connection_paths(rp.topology['ap1'], 'TrafficGen', max_hops=3)
+    assert len(routes) == 1
+    assert [device.name for device in routes[0].devices] == ['ap1', 'sw1', 'sw2', 'tg']
+    assert routes[0].hops[-1][1].name == 'ETH1/1'
+    assert rp.collect_connection_paths(rp.topology['ap1'], 'TrafficGen', max_hops=2) == list()
+
+
+def test_reachability_filters():
+    rp = build_pool()
+    graph = rp.graph()
+    reachable = graph.reachable(rp.topology['tg'], max_hops=2)
+    assert {device.name: hops for device, hops in reachable.items()} == \
+        {'sw2': 1, 'ap2': 1, 'phone': 1, 'sw1': 2, 'ap3': 2}
+    # 只允许经过交换机，phone 不能作为中间设备
+    reachable = graph.reachable(rp.topology['tg'], max_hops=3, via_types={'Switch'})
+    assert 'ap3' not in {device.name for device in reachable}
+    assert graph.shortest_path(rp.topology['ap3'], rp.topology['tg'], port_types={'ETH'}) is None
+    assert len(graph.shortest_path(rp.topology['ap3'], rp.topology['tg'])) == 2
+
+
+def test_graph_follows_topology_changes():
+    rp = build_pool()
+    assert rp.graph() is rp.graph()
+    rp.link(rp.topology['ap1'].ports['ETH1/2'], rp.topology['tg'].ports['ETH1/3'])
+    assert len(rp.collect_connection_paths(rp.topology['ap1'], 'TrafficGen')) == 1
+
+
+def test_reach_constraint():
+    rp = build_pool()
+    constraint = DeviceMustReachDevice('TrafficGen', max_hops=3, via_types=['Switch'])
+    assert [d.name for d in rp.collect_all_device('AP', [constraint])] == ['ap1', 'ap2']
+    routes = rp.collect_connection_route(rp.topology['ap1'], [constraint])
+    assert [device.name for device in routes[0].devices] == ['ap1', 'sw1', 'sw2', 'tg']
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 10:30
+# @Author  : FebSun
+# @FileName: test_index.py
+# @Software: PyCharm
+import json
+
+from core.resource.pool import ResourcePool
+from product.resource.constraint import PhoneMustBeAndroidConstraint
+
+
+def build_pool():
+    rp = ResourcePool()
+    rp.declare_index('version')
+    rp.declare_index('speed', category='port')
+    for i in range(4):
+        rp.add_device(f'ap{i}', type='AP')
+        rp.add_port(f'ap{i}', 'WIFI', type='WIFI')
+    for i in range(3):
+        phone = rp.add_device(f'phone{i}', type='Android')
+        phone.version = 8 + i
+    rp.rebuild_index()
+    tg = rp.add_device('tg', type='TrafficGen')
+    port = tg.add_port('PORT1/1/1', type='ETH')
+    port.speed = 1000
+    rp.rebuild_index()
+    return rp
+
+
+def test_collect_by_type():
+    rp = build_pool()
+    assert [d.name for d in rp.collect_all_device('AP')] == ['ap0', 'ap1', 'ap2', 'ap3']
+    assert [d.name for d in rp.collect_device('AP', 2)] == ['ap0', 'ap1']
+    assert rp.collect_device('AP', 5) == list()
+
+
+def test_collect_by_attribute():
+    rp = build_pool()
+    assert [d.name for d in rp.collect_all_device('Android', attributes={'version': 9})] == ['phone1']
+    devices = rp.collect_all_device('Android', [PhoneMustBeAndroidConstraint('>=', 9)])
+    assert [d.name for d in devices] == ['phone1', 'phone2']
+    assert [p.name for p in rp.index.ports('ETH', speed=1000)] == ['PORT1/1/1']
+
+
+def test_index_follows_add_port_and_direct_assignment():
+    rp = build_pool()
+    rp.topology['ap0'].add_port('ETH1/1', type='ETH')
+    assert [p.parent.name for p in rp.index.ports('ETH', device_type='AP')] == ['ap0']
+    other = ResourcePool()
+    other.topology['ap9'] = rp.topology['ap0']
+    other.rebuild_index()
+    assert [d.name for d in other.collect_all_device('AP')] == ['ap0']
+
+
+def test_index_after_load(tmp_path):
+    rp = build_pool()
+    file_name = str(tmp_path / 'pool.json')
+    rp.save(file_name)
+    with open(file_name) as file:
+        assert '_pool' not in json.load(file)['devices']['ap0']
+    loaded = ResourcePool()
+    loaded.declare_index('version')
+    loaded.load(file_name)
+    assert [d.name for d in loaded.collect_all_device('Android', attributes={'version': 10})] == ['phone2']
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 02:50
+# @Author  : FebSun
+# @FileName: test_instrument.py
+# @Software: PyCharm
+from core.resource.instrument import instrumentation
+from core.resource.pool import ResourcePool
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    PhoneMustBeAndroidConstraint, TrafficGeneratorSpeedMustGreaterThen
+
+
+def build_file(lab, tmp_path):
+    file_name = str(tmp_path / 'pool.json')
+    lab(2, traffic_generator='sta').save(file_name)
+    return file_name
+
+
+def test_disabled_has_no_wrappers():
+    is_meet = PhoneMustBeAndroidConstraint.is_meet
+    with instrumentation.enable():
+        assert PhoneMustBeAndroidConstraint.is_meet is not is_meet
+    assert PhoneMustBeAndroidConstraint.is_meet is is_meet
+    assert ResourcePool.load.__name__ == 'load' and not hasattr(ResourcePool.load, '_instrumented')
+
+
+def test_stats_hooks_and_rejections(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    events = list()
+    constraint = ApMustHaveStaConnected([DeviceMustHaveTrafficGeneratorConnected(
+        TrafficGeneratorSpeedMustGreaterThen(10000))])
+    hook = instrumentation.add_hook(lambda category, name, elapsed, obj: events.append((category, name)))
+    try:
+        with instrumentation.enable(trace=True, profile=True):
+            rp = ResourcePool()
+            rp.load(file_name, 'alice')
+            devices = rp.collect_device('AP', 1, [constraint])
+    finally:
+        instrumentation.remove_hook(hook)
+    assert [device.name for device in devices] == ['ap1']
+    stats = instrumentation.stats
+    assert stats[('pool', 'load')].calls == 1
+    assert stats[('pool', 'collect_device')].calls == 1
+    assert stats[('constraint', 'ApMustHaveStaConnected')].rejected == 1
+    # 嵌套调用的耗时计入外层的 elapsed，不计入外层的 self_elapsed
+    outer = stats[('connection', 'ApMustHaveStaConnected')]
+    assert outer.self_elapsed <= outer.elapsed
+    assert ('pool', 'load') in events
+    rejected = [(rejection.resource.name, type(rejection.constraint).__name__, rejection.depth)
+                for rejection in instrumentation.rejections]
+    assert ('ap0', 'ApMustHaveStaConnected', 0) in rejected
+    assert any(name == 'sta0' and depth > 0 for name, constraint_name, depth in rejected)
+    assert 'collect_device' in instrumentation.report()
+    assert 'collect_device' in instrumentation.profile_report()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 03:30
+# @Author  : FebSun
+# @FileName: test_journal.py
+# @Software: PyCharm
+import json
+import os
+
+import pytest
+
+from core.resource.journal import file_digest
+from core.resource.pool import ResourceError, ResourcePool
+
+
+def build_pool():
+    rp = ResourcePool()
+    for i in range(3):
+        ap = rp.add_device(f'ap{i}', type='AP')
+        ap.add_port('ETH1/1', type='ETH')
+    tg = rp.add_device('tg', type='TrafficGen')
+    for i in range(3):
+        tg.add_port(f'ETH1/{i}', type='ETH')
+    return rp
+
+
+def journaled_pool(filename, owner='alice'):
+    build_pool().save(filename)
+    rp = ResourcePool()
+    rp.load(filename, owner)
+    rp.enable_journal()
+    return rp
+
+
+def test_journal_replay(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    digest = file_digest(filename)
+    ap = rp.add_device('ap9', type='AP', description='new')
+    ap.add_port('ETH1/1', type='ETH')
+    rp.link(ap.ports['ETH1/1'], rp.topology['tg'].ports['ETH1/0'])
+    rp.set_attribute(rp.topology['tg'].ports['ETH1/0'], 'speed', 10000)
+    rp.set_attribute(rp.topology['ap0'], 'version', '2.0')
+    # 修改只追加到日志中，资源文件不变
+    assert file_digest(filename) == digest
+
+    other = ResourcePool()
+    other.load(filename, 'alice')
+    ap = other.topology['ap9']
+    assert ap.description == 'new'
+    remote = ap.ports['ETH1/1'].remote_ports[0]
+    assert (remote.parent.name, remote.name, remote.speed) == ('tg', 'ETH1/0', 10000)
+    assert remote.remote_ports[0] is ap.ports['ETH1/1']
+    assert other.topology['ap0'].version == '2.0'
+
+    rp.unlink(rp.topology['ap9'].ports['ETH1/1'], rp.topology['tg'].ports['ETH1/0'])
+    other.load(filename, 'alice')
+    assert len(other.topology['ap9'].ports['ETH1/1'].remote_ports) == 0
+
+
+def test_journal_updates_index(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    rp.declare_index('version')
+    rp.set_attribute(rp.topology['ap1'], 'version', '2.0')
+    assert list(rp.index.devices('AP', version='2.0')) == [rp.topology['ap1']]
+    rp.set_attribute(rp.topology['ap1'], 'version', '3.0')
+    assert list(rp.index.devices('AP', version='2.0')) == []
+
+
+def test_journal_reservation(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    digest = file_digest(filename)
+    rp.reserve()
+    assert file_digest(filename) == digest
+    with pytest.raises(ResourceError):
+        ResourcePool().load(filename, 'bob')
+    bob = ResourcePool()
+    bob.load(filename, 'alice')
+    bob.owner = 'bob'
+    with pytest.raises(ResourceError):
+        bob.reserve()
+    rp.release()
+    bob.load(filename, 'bob')
+    bob.reserve()
+    assert bob.reserved['owner'] == 'bob'
+
+
+def test_journal_torn_record(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    rp.set_attribute(rp.topology['ap0'], 'version', '2.0')
+    # 模拟写到一半时进程崩溃
+    with open(f"{filename}.journal", 'ab') as file:
+        file.write(b'{"op":"set","device":"ap1","attrib')
+    other = ResourcePool()
+    other.load(filename, 'alice')
+    assert other.topology['ap0'].version == '2.0'
+    assert getattr(other.topology['ap1'], 'version', None) is None
+
+
+def test_journal_append_after_torn_record(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    journaled_pool(filename)
+    with open(f"{filename}.journal", 'ab') as file:
+        file.write(b'{"op":"set","device":"ap1","attrib')
+    rp = ResourcePool()
+    rp.load(filename, 'alice')
+    rp.set_attribute(rp.topology['ap2'], 'version', '7')
+    rp.add_device('ap9', type='AP')
+    other = ResourcePool()
+    other.load(filename, 'alice')
+    assert other.topology['ap2'].version == '7'
+    assert 'ap9' in other.topology
+    assert getattr(other.topology['ap1'], 'version', None) is None
+
+
+def test_journal_compaction(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    rp.compact_every = 3
+    for i in range(4):
+        rp.set_attribute(rp.topology[f'ap{i % 3}'], 'version', str(i))
+    # 第 3 条记录之后合并到资源文件中，日志中只剩 1 条记录
+    with open(filename) as file:
+        assert json.load(file)['devices']['ap2']['version'] == '2'
+    with open(f"{filename}.journal") as file:
+        assert len(file.readlines()) == 2
+    other = ResourcePool()
+    other.load(filename, 'alice')
+    assert other.topology['ap0'].version == '3'
+    assert not os.path.exists(f"{filename}.tmp")
+
+
+def test_stale_journal_ignored(tmp_path):
+    filename = str(tmp_path / 'pool.json')
+    rp = journaled_pool(filename)
+    rp.set_attribute(rp.topology['ap0'], 'version', '2.0')
+    # 资源文件被整体替换之后，旧日志的 base 不一致
+    replaced = build_pool()
+    replaced.add_device('ap9', type='AP')
+    replaced.save(filename)
+    other = ResourcePool()
+    other.load(filename, 'alice')
+    assert getattr(other.topology['ap0'], 'version', None) is None
+    assert other._journal is None
+
+
+def test_journal_shared_between_pools(tmp_path):
+    filename = str(tmp_path / 'pool.snap')
+    build_pool().save_snapshot(filename)
+    rp1 = ResourcePool()
+    rp1.load(filename, 'alice')
+    rp1.enable_journal(compact_every=2)
+    rp2 = ResourcePool()
+    rp2.load(filename, 'alice')
+    assert rp2._journal is not None
+    rp1.add_port('ap0', 'ETH1/2', type='ETH')
+    rp1.set_attribute(rp1.topology['ap0'].ports['ETH1/2'], 'speed', 1000)
+    # rp1 合并了日志，rp2 读完旧日志之后继续读取新的日志
+    rp1.set_attribute(rp1.topology['ap1'], 'version', '2.0')
+    rp2.set_attribute(rp2.topology['ap2'], 'version', '3.0')
+    assert rp2.topology['ap0'].ports['ETH1/2'].speed == 1000
+    assert rp2.topology['ap1'].version == '2.0'
+    with pytest.raises(ResourceError):
+        rp2.add_device('ap0', type='AP')
+    rp3 = ResourcePool()
+    rp3.load(filename, 'alice')
+    assert (rp3.topology['ap1'].version, rp3.topology['ap2'].version) == ('2.0', '3.0')
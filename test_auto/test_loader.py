@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 15:00
+# @Author  : FebSun
+# @FileName: test_loader.py
+# @Software: PyCharm
+import pytest
+
+from core.resource.pool import ResourceError, ResourcePool
+from core.resource.loader import stream_load
+
+
+def build_file(lab, tmp_path):
+    rp = lab(20)
+    rp.information = {'lab': 'bj'}
+    for i in range(1, 20):
+        # 连接到后面才出现的设备，验证延迟映射
+        rp.link(rp.topology[f'sta{i - 1}'].ports['WIFI'], rp.topology[f'ap{i}'].ports['WIFI'])
+    file_name = str(tmp_path / 'pool.json')
+    rp.save(file_name)
+    return file_name
+
+
+def remote_names(pool):
+    return {
+        (name, port_name): [(remote.parent.name, remote.name) for remote in port.remote_ports]
+        for name, device in pool.topology.items() for port_name, port in device.ports.items()
+    }
+
+
+def test_streaming_matches_eager_load(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    eager = ResourcePool()
+    eager.load(file_name)
+    streamed = ResourcePool()
+    streamed.topology.clear()
+    stream_load(streamed, file_name, chunk_size=64)
+    assert streamed.information == {'lab': 'bj'}
+    assert list(streamed.topology) == list(eager.topology)
+    assert remote_names(streamed) == remote_names(eager)
+
+
+def test_filtered_load(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    rp = ResourcePool()
+    rp.load(file_name, types=['AP'], names=['sta3'])
+    assert len(rp.collect_all_device('AP')) == 20
+    assert [d.name for d in rp.collect_all_device('STA')] == ['sta3']
+    assert [p.parent.name for p in rp.topology['ap3'].ports['WIFI'].remote_ports] == ['sta3']
+    assert [p.parent.name for p in rp.topology['sta3'].ports['WIFI'].remote_ports] == ['ap3', 'ap4']
+    with pytest.raises(ResourceError):
+        rp.save(file_name)
+
+
+def test_streaming_load_checks_owner(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    rp = ResourcePool()
+    rp.load(file_name, owner='alice')
+    rp.reserve()
+    with pytest.raises(ResourceError):
+        ResourcePool().load(file_name, owner='bob', streaming=True)
+
+
+def test_lazy_load_resolves_on_access(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    eager = ResourcePool()
+    eager.load(file_name)
+    lazy = ResourcePool()
+    lazy.load(file_name, lazy=True)
+    # 设备在第一次访问时才创建
+    assert lazy.topology.loaded() == dict()
+    assert [device.name for device in lazy.collect_all_device('STA')] == \
+        [device.name for device in eager.collect_all_device('STA')]
+    assert {device.type for device in lazy.topology.loaded().values()} == {'STA'}
+    # 序列化不需要映射连接关系
+    assert [device.to_dict() for device in lazy.topology.values()] == \
+        [device.to_dict() for device in eager.topology.values()]
+    port = lazy.topology['ap3'].ports['WIFI']
+    assert type(port._remote_ports) is tuple
+    remote = port.remote_ports[0]
+    assert (remote.parent.name, remote.name) == ('sta3', 'WIFI')
+    assert remote.parent is lazy.topology['sta3']
+    # 只映射访问过的端口
+    assert type(lazy.topology['ap5'].ports['WIFI']._remote_ports) is tuple
+    assert remote_names(lazy) == remote_names(eager)
+
+
+def test_lazy_filtered_load(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    rp = ResourcePool()
+    rp.load(file_name, types=['AP'], names=['sta3'], lazy=True)
+    assert rp.topology['sta3'].to_dict()['ports']['WIFI']['remote_ports'] == \
+        [{'device': 'ap3', 'port': 'WIFI'}, {'device': 'ap4', 'port': 'WIFI'}]
+    assert [p.parent.name for p in rp.topology['ap3'].ports['WIFI'].remote_ports] == ['sta3']
+    assert [p.parent.name for p in rp.topology['sta3'].ports['WIFI'].remote_ports] == ['ap3', 'ap4']
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 21:30
+# @Author  : FebSun
+# @FileName: test_matcher.py
+# @Software: PyCharm
+from core.resource.matcher import TopologyRequest
+from product.resource.constraint import TrafficGeneratorSpeedMustGreaterThen
+
+
+def build_request(sta_count=3):
+    request = TopologyRequest()
+    request.add_role('ap', 'AP')
+    request.add_role('tg', 'TrafficGen', exclusive=False)
+    for i in range(sta_count):
+        request.add_role(f'sta{i}', 'STA')
+        request.add_link('ap', f'sta{i}', 'WIFI', 'WIFI', exclusive=False)
+        request.add_link(f'sta{i}', 'tg', 'ETH', 'ETH',
+                         remote_port_constraints=[TrafficGeneratorSpeedMustGreaterThen(1000)])
+    return request
+
+
+def test_disjoint_assignment(sta_lab):
+    rp = sta_lab()
+    match = rp.match_topology(build_request())
+    assert match['ap'].name == 'ap1'
+    assert sorted(match[f'sta{i}'].name for i in range(3)) == ['sta0', 'sta1', 'sta2']
+    tg_ports = [remote.name for port, remote in match.links[1::2]]
+    assert len(set(tg_ports)) == 3
+
+
+def test_backtracks_when_greedy_choice_fails(sta_lab):
+    # sta0 连接了两个测试仪表端口，但只有 sta1 的端口满足速率要求时，贪心选择会重复使用端口
+    rp = sta_lab(tg_ports=((1000, 'sta0'), (1000, 'sta1'), (100, 'sta2'), (1000, 'sta2')))
+    match = rp.match_topology(build_request())
+    assert match is not None
+    assert len({id(remote) for port, remote in match.links}) == len(match.links)
+
+
+def test_no_match_and_exclude(sta_lab):
+    rp = sta_lab(tg_ports=((1000, 'sta0'), (1000, 'sta1'), (100, 'sta2')))
+    assert rp.match_topology(build_request()) is None
+    assert rp.match_topology(build_request(2)) is not None
+    assert rp.match_topology(build_request(2), exclude=['sta0']) is None
+
+
+def test_best_match(sta_lab):
+    rp = sta_lab(sta_count=4, tg_ports=((1000, 'sta0'), (1000, 'sta1'), (1000, 'sta2'), (1000, 'sta3')))
+    match = rp.match_topology(build_request(2), best=True,
+                              score=lambda m: -sum(int(m[f'sta{i}'].name[-1]) for i in range(2)))
+    assert {match['sta0'].name, match['sta1'].name} == {'sta2', 'sta3'}
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 21:50
+# @Author  : FebSun
+# @FileName: test_parallel.py
+# @Software: PyCharm
+import threading
+import pytest
+from core.resource.error import ResourceNotMeetConstraintError
+from core.resource.parallel import ParallelEvaluator
+from core.resource.pool import Constraint, ResourceError, ResourcePool
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    DeviceMustReachDevice
+
+
+class EvenConstraint(Constraint):
+    def __init__(self):
+        super().__init__()
+        self.description = "device number is even"
+
+    def is_meet(self, resource, *args, **kwargs):
+        return int(resource.name[3:]) % 2 == 0
+
+
+class CountingConstraint(Constraint):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def is_meet(self, resource, *args, **kwargs):
+        with self.lock:
+            self.calls += 1
+        return True
+
+
+def build_pool(count=200):
+    rp = ResourcePool()
+    for i in range(count):
+        rp.add_device(f'dev{i}', type='AP')
+    return rp
+
+
+def test_thread_order_matches_serial():
+    rp = build_pool()
+    serial = rp.collect_all_device('AP', [EvenConstraint()])
+    with ParallelEvaluator('thread', workers=4, chunk_size=7) as parallel:
+        assert rp.collect_all_device('AP', [EvenConstraint()], parallel=parallel) == serial
+        assert rp.collect_device('AP', 5, [EvenConstraint()], parallel=parallel) == serial[:5]
+        assert rp.collect_device('AP', 500, [EvenConstraint()], parallel=parallel) == list()
+
+
+def test_count_cancels_remaining_chunks():
+    rp = build_pool(1000)
+    constraint = CountingConstraint()
+    with ParallelEvaluator('thread', workers=2, chunk_size=10) as parallel:
+        devices = rp.collect_device('AP', 3, [constraint], parallel=parallel)
+    assert [device.name for device in devices] == ['dev0', 'dev1', 'dev2']
+    assert constraint.calls < 1000
+
+
+def test_process_pool():
+    rp = build_pool(50)
+    with ParallelEvaluator('process', workers=2, chunk_size=8) as parallel:
+        devices = rp.collect_all_device('AP', [EvenConstraint()], parallel=parallel)
+    # 子进程只返回序号，结果仍然是资源池中的设备对象
+    assert devices == rp.collect_all_device('AP', [EvenConstraint()])
+    assert devices[0] is rp.topology['dev0']
+
+
+def test_process_pool_sends_names_for_linked_devices():
+    rp = ResourcePool()
+    for i in range(20):
+        rp.add_device(f'ap{i}', type='AP')
+        rp.add_port(f'ap{i}', 'WIFI', type='WIFI')
+        if i % 3:
+            rp.add_device(f'sta{i}', type='STA')
+            rp.add_port(f'sta{i}', 'WIFI', type='WIFI')
+            rp.link(rp.topology[f'ap{i}'].ports['WIFI'], rp.topology[f'sta{i}'].ports['WIFI'])
+    serial = rp.collect_all_device('AP', [ApMustHaveStaConnected()])
+    with ParallelEvaluator('process', workers=2, chunk_size=4) as parallel:
+        assert rp.collect_all_device('AP', [ApMustHaveStaConnected()], parallel=parallel) == serial
+        # 资源池修改之后子进程中的副本随之更新
+        rp.link(rp.topology['ap0'].ports['WIFI'], rp.topology['sta1'].ports['WIFI'])
+        devices = rp.collect_all_device('AP', [ApMustHaveStaConnected()], parallel=parallel)
+        assert devices == [rp.topology['ap0']] + serial
+        # 没有资源池时不能把有连接关系的设备传给子进程
+        with pytest.raises(ResourceError):
+            parallel.filter(list(rp.topology.values()), [ApMustHaveStaConnected()])
+
+
+def test_connection_route():
+    rp = ResourcePool()
+    rp.add_device('ap', type='AP')
+    rp.add_device('tg', type='TrafficGen')
+    rp.add_port('ap', 'ETH1/1', type='ETH')
+    rp.add_port('tg', 'ETH1/1', type='ETH', speed=10000)
+    rp.link(rp.topology['ap'].ports['ETH1/1'], rp.topology['tg'].ports['ETH1/1'])
+    constraints = [DeviceMustHaveTrafficGeneratorConnected(), DeviceMustReachDevice('TrafficGen')]
+    with ParallelEvaluator('thread', workers=2) as parallel:
+        ret = rp.collect_connection_route(rp.topology['ap'], constraints, parallel=parallel)
+        assert ret == rp.collect_connection_route(rp.topology['ap'], constraints)
+        with pytest.raises(ResourceNotMeetConstraintError):
+            rp.collect_connection_route(rp.topology['ap'], [DeviceMustReachDevice('STA')], parallel=parallel)
+
+
+def test_process_pool_connection_route():
+    rp = ResourcePool()
+    rp.add_device('ap', type='AP')
+    rp.add_device('tg', type='TrafficGen')
+    rp.add_port('ap', 'ETH1/1', type='ETH')
+    rp.add_port('tg', 'ETH1/1', type='ETH', speed=10000)
+    rp.link(rp.topology['ap'].ports['ETH1/1'], rp.topology['tg'].ports['ETH1/1'])
+    constraints = [DeviceMustHaveTrafficGeneratorConnected(), DeviceMustReachDevice('TrafficGen')]
+    with ParallelEvaluator('process', workers=2) as parallel:
+        ret = rp.collect_connection_route(rp.topology['ap'], constraints, parallel=parallel)
+        # 子进程返回的端口和路由映射回资源池中的对象
+        assert ret[0] is rp.topology['tg'].ports['ETH1/1']
+        assert ret[1].hops == [(rp.topology['ap'].ports['ETH1/1'], rp.topology['tg'].ports['ETH1/1'])]
+        with pytest.raises(ResourceError):
+            parallel.map_connections(constraints, rp.topology['ap'])
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 11:40
+# @Author  : FebSun
+# @FileName: test_planner.py
+# @Software: PyCharm
+from core.resource.pool import Constraint, ResourcePool
+from product.resource.constraint import PhoneMustBeAndroidConstraint
+
+
+class CountingConstraint(Constraint):
+    def __init__(self, accept, cost=1):
+        super().__init__()
+        self.accept = accept
+        self.cost = cost
+        self.calls = 0
+        self.description = f"name in {accept}"
+
+    def is_meet(self, resource, *args, **kwargs):
+        self.calls += 1
+        return resource.name in self.accept
+
+
+class ExpensiveConstraint(CountingConstraint):
+    pass
+
+
+def build_pool():
+    rp = ResourcePool()
+    rp.declare_index('version')
+    for i in range(10):
+        phone = rp.add_device(f'phone{i}', type='Android')
+        phone.version = i
+        rp.add_device(f'ap{i}', type='AP')
+    rp.rebuild_index()
+    return rp
+
+
+def test_index_lookup_replaces_constraint():
+    rp = build_pool()
+    plan = rp.compile(None, [PhoneMustBeAndroidConstraint('=', 3)])
+    assert plan.device_type == 'Android'
+    assert plan.attributes == {'version': 3}
+    assert plan.filters == list()
+    assert [d.name for d in plan.execute(rp)] == ['phone3']
+    assert rp.compile('AP', [PhoneMustBeAndroidConstraint()]).execute(rp) == list()
+
+
+def test_cheap_constraint_runs_first_and_short_circuits():
+    rp = build_pool()
+    expensive = ExpensiveConstraint({f'ap{i}' for i in range(10)}, cost=100)
+    cheap = CountingConstraint({'ap1', 'ap2'})
+    devices = rp.collect_all_device('AP', [expensive, cheap])
+    assert [d.name for d in devices] == ['ap1', 'ap2']
+    assert cheap.calls == 10
+    assert expensive.calls == 2
+
+
+def test_explain_reports_stages():
+    rp = build_pool()
+    constraint = PhoneMustBeAndroidConstraint('>=', 7)
+    plan = rp.explain([constraint])
+    assert [stage.kind for stage in plan.stages] == ['index', 'filter']
+    assert plan.stages[0].rows_out == 10
+    assert plan.stages[1].rows_out == 3
+    assert 'PhoneMustBeAndroidConstraint' in str(plan)
+    # 有统计数据之后，计划中带有实测的代价和通过率
+    assert rp.compile(None, [constraint]).filters[0].selectivity == 0.3
+
+
+def test_statistics_follow_constraint_parameters():
+    rp = build_pool()
+    rp.explain([PhoneMustBeAndroidConstraint('>=', 7)])
+    # 同一类型参数不同的限制条件分别统计通过率
+    assert rp.compile(None, [PhoneMustBeAndroidConstraint('>=', 7)]).filters[0].selectivity == 0.3
+    assert rp.compile(None, [PhoneMustBeAndroidConstraint('>=', 2)]).filters[0].selectivity is None
+    rp.explain([PhoneMustBeAndroidConstraint('>=', 2)])
+    assert rp.compile(None, [PhoneMustBeAndroidConstraint('>=', 2)]).filters[0].selectivity == 0.8
+
+
+def test_collect_devices_matches_separate_calls():
+    rp = build_pool()
+    requests = [('AP', 2, [CountingConstraint({'ap3', 'ap5', 'ap7'})]),
+                ('Android', None, [PhoneMustBeAndroidConstraint('>', 6)]),
+                (None, 3, [CountingConstraint({'ap1', 'phone1', 'phone2'})]),
+                ('Android', 1, [], {'version': 4}),
+                ('AP', 4, [CountingConstraint({'ap1'})])]
+    expected = [rp.collect_all_device(request[0], request[2], *request[3:]) if request[1] is None else
+                rp.collect_device(*request) for request in requests]
+    assert rp.collect_devices(requests) == expected
+    assert [[d.name for d in devices] for devices in expected] == \
+        [['ap3', 'ap5'], ['phone7', 'phone8', 'phone9'], ['phone1', 'ap1', 'phone2'], ['phone4'], []]
+
+
+def test_collect_devices_only_visits_candidates():
+    rp = build_pool()
+    for i in range(5000):
+        rp.add_device(f'switch{i}', type='Switch')
+    # 修改属性之后设备在属性索引中的位置变化，结果仍然按资源池的顺序排列
+    rp.set_attribute(rp.topology['phone2'], 'version', 8)
+    queries = list()
+    devices = rp.index.devices
+
+    def recording(device_type=None, **attributes):
+        queries.append((device_type, attributes))
+        return devices(device_type, **attributes)
+
+    rp.index.devices = recording
+    requests = [('AP', None, [CountingConstraint({'ap2', 'ap4'})]),
+                ('Android', None, [], {'version': 8}),
+                ('Android', 2, [PhoneMustBeAndroidConstraint('<', 3)])]
+    result = rp.collect_devices(requests)
+    assert [[d.name for d in devices] for devices in result] == \
+        [['ap2', 'ap4'], ['phone2', 'phone8'], ['phone0', 'phone1']]
+    assert all(device_type is not None or attributes for device_type, attributes in queries)
+
+
+def test_collect_devices_disjoint():
+    rp = build_pool()
+    first = CountingConstraint({'ap1', 'ap2', 'ap3'})
+    second = CountingConstraint({'ap2', 'ap3', 'ap4'})
+    devices = rp.collect_devices([('AP', 2, [first]), ('AP', 2, [second]), ('AP', None, [])], disjoint=True)
+    assert [[d.name for d in result] for result in devices] == \
+        [['ap1', 'ap2'], ['ap3', 'ap4'], ['ap0', 'ap5', 'ap6', 'ap7', 'ap8', 'ap9']]
+    # 选够之后不再判断
+    assert first.calls == 3
+    assert second.calls == 3
+    overlap = rp.collect_devices([('AP', 2, [first]), ('AP', 2, [first])])
+    assert overlap[0] == overlap[1]
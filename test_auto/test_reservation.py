@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 17:40
+# @Author  : FebSun
+# @FileName: test_reservation.py
+# @Software: PyCharm
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.resource.pool import ResourceError, ResourcePool
+from core.resource.reservation import ReservationStore
+
+
+def build_file(tmp_path):
+    rp = ResourcePool()
+    for i in range(6):
+        ap = rp.add_device(f'ap{i}', type='AP')
+        ap.add_port('ETH1/1', type='ETH')
+    file_name = str(tmp_path / 'pool.json')
+    rp.save(file_name)
+    return file_name
+
+
+def open_pool(file_name, owner):
+    rp = ResourcePool()
+    rp.load(file_name, owner)
+    return rp
+
+
+def test_reserve_devices_is_all_or_nothing(tmp_path):
+    file_name = build_file(tmp_path)
+    alice, bob = open_pool(file_name, 'alice'), open_pool(file_name, 'bob')
+    alice.reserve_devices([alice.topology['ap0'], alice.topology['ap1'].ports['ETH1/1']])
+    with pytest.raises(ResourceError):
+        bob.reserve_devices([bob.topology['ap2'], bob.topology['ap1']])
+    bob.reserve_devices([bob.topology['ap2']])
+    assert alice.reservation_store().owners() == {'ap0': 'alice', 'ap1': 'alice', 'ap2': 'bob'}
+    assert alice.release_devices() == 2
+    bob.reserve_devices([bob.topology['ap1']])
+
+
+def test_reserve_any_skips_reserved(tmp_path):
+    file_name = build_file(tmp_path)
+    alice, bob = open_pool(file_name, 'alice'), open_pool(file_name, 'bob')
+    assert [d.name for d in alice.reserve_any('AP', 2)] == ['ap0', 'ap1']
+    assert [d.name for d in bob.reserve_any('AP', 3)] == ['ap2', 'ap3', 'ap4']
+    assert bob.reserve_any('AP', 2) == list()
+
+
+def test_parallel_reserve_any_is_disjoint(tmp_path):
+    file_name = build_file(tmp_path)
+    pools = [open_pool(file_name, f'job{i}') for i in range(6)]
+    with ThreadPoolExecutor(6) as executor:
+        results = list(executor.map(lambda rp: rp.reserve_any('AP', 1), pools))
+    names = [devices[0].name for devices in results if devices]
+    assert len(names) == len(set(names))
+
+
+def test_lease_expires(tmp_path):
+    store = ReservationStore(str(tmp_path / 'r.db'))
+    assert store.reserve(['ap0'], 'alice', lease=0.05)
+    assert not store.reserve(['ap0'], 'bob')
+    time.sleep(0.1)
+    assert store.reserve(['ap0'], 'bob')
+    assert store.reserved_by('bob') == ['ap0']
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 06:30
+# @Author  : FebSun
+# @FileName: test_selection_cache.py
+# @Software: PyCharm
+from core.resource.cache import selection_key
+from core.resource.pool import Constraint, ResourcePool
+from core.resource.snapshot import json_to_snapshot
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    PhoneMustBeAndroidConstraint, TrafficGeneratorSpeedMustGreaterThen
+
+
+class CountingConstraint(ApMustHaveStaConnected):
+    calls = 0
+
+    def is_meet(self, resource, *args, **kwargs):
+        CountingConstraint.calls += 1
+        return super().is_meet(resource, *args, **kwargs)
+
+
+class Live(Constraint):
+    cacheable = False
+
+    def is_meet(self, resource, *args, **kwargs):
+        return True
+
+
+def build_file(lab, tmp_path):
+    file_name = str(tmp_path / 'pool.json')
+    lab(6, stations=lambda number: number % 3, traffic_generator='ap').save(file_name)
+    return file_name
+
+
+def cached_pool(file_name, owner='alice'):
+    rp = ResourcePool()
+    rp.load(file_name, owner)
+    rp.enable_selection_cache()
+    return rp
+
+
+def test_selection_key():
+    key = selection_key('AP', [DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(1000))])
+    assert key == selection_key(
+        'AP', [DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(1000))])
+    # 嵌套的限制条件参数不同时 key 不同
+    assert key != selection_key(
+        'AP', [DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(10000))])
+    assert selection_key('AP', [ApMustHaveStaConnected([PhoneMustBeAndroidConstraint('>', 8)])]) != \
+        selection_key('AP', [ApMustHaveStaConnected([PhoneMustBeAndroidConstraint('>', 9)])])
+    assert selection_key('AP', [], {'version': object()}) is None
+    # 嵌套的限制条件不可缓存时整个选择不可缓存
+    assert selection_key('AP', [Live()]) is None
+    assert selection_key('AP', [ApMustHaveStaConnected(sta_constraints=[Live()])]) is None
+    assert selection_key('AP', [ApMustHaveStaConnected(sta_constraints=[PhoneMustBeAndroidConstraint('>', 8)])])
+
+
+def test_selection_cache_across_sessions(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    constraints = [CountingConstraint(),
+                   DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(10000))]
+    rp = cached_pool(file_name)
+    expected = [device.name for device in rp.collect_all_device('AP', constraints)]
+    assert expected == ['ap1', 'ap5']
+    assert rp.selection_cache.misses == 1
+
+    # 新的会话直接使用缓存的结果，不再判断限制条件
+    CountingConstraint.calls = 0
+    rp = cached_pool(file_name)
+    assert [device.name for device in rp.collect_device('AP', 1, constraints)] == ['ap1']
+    assert [device.name for device in rp.collect_all_device('AP', constraints)] == expected
+    assert rp.collect_device('AP', 3, constraints) == list()
+    assert CountingConstraint.calls == 0
+    assert rp.selection_cache.hits == 3
+
+    # 跳过其他人占用的设备
+    bob = cached_pool(file_name, 'bob')
+    bob.reserve_devices([bob.topology['ap1']])
+    assert [device.name for device in rp.reserve_any('AP', 1, constraints)] == ['ap5']
+    assert rp.reserve_any('AP', 1, constraints) == list()
+    # collect 同样按当前的占用重新过滤缓存的结果，自己占用的设备不过滤
+    assert [device.name for device in rp.collect_all_device('AP', constraints)] == ['ap5']
+    assert [device.name for device in bob.collect_all_device('AP', constraints)] == ['ap1']
+    assert CountingConstraint.calls == 0
+
+
+def test_selection_cache_follows_topology(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    constraints = [ApMustHaveStaConnected()]
+    rp = cached_pool(file_name)
+    fingerprint = rp.fingerprint()
+    assert [device.name for device in rp.collect_all_device('AP', constraints)] == ['ap1', 'ap2', 'ap4', 'ap5']
+    rp.unlink(rp.topology['ap1'].ports['WIFI'], rp.topology['sta1'].ports['WIFI'])
+    assert rp.fingerprint() != fingerprint
+    assert [device.name for device in rp.collect_all_device('AP', constraints)] == ['ap2', 'ap4', 'ap5']
+    assert rp.selection_cache.misses == 2
+    rp.save(file_name)
+    other = cached_pool(file_name)
+    assert other.fingerprint() == rp.fingerprint()
+    assert [device.name for device in other.collect_all_device('AP', constraints)] == ['ap2', 'ap4', 'ap5']
+    assert other.selection_cache.hits == 1
+
+
+def test_selection_cache_eviction(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    rp = ResourcePool()
+    rp.load(file_name)
+    rp.enable_selection_cache(maxsize=2)
+    for speed in (100, 1000, 10000, 100):
+        constraint = DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(speed))
+        rp.collect_all_device('AP', [constraint])
+        if speed == 10000:
+            assert len(rp.selection_cache) == 2
+    assert rp.selection_cache.info()['hits'] == 0
+
+
+def test_lazy_fingerprint(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    snapshot_file = str(tmp_path / 'pool.snap')
+    json_to_snapshot(file_name, snapshot_file)
+    for source, lazy in ((snapshot_file, False), (file_name, True)):
+        rp = ResourcePool()
+        rp.load(source, 'alice', lazy=lazy)
+        fingerprint = rp.fingerprint()
+        # 计算指纹不创建设备，占用信息不影响指纹
+        assert rp.topology.loaded() == {}
+        rp.reserve()
+        assert rp.fingerprint() == fingerprint
+        rp.release()
+        other = ResourcePool()
+        other.load(source, 'bob', lazy=lazy)
+        assert other.fingerprint() == fingerprint
+        other.set_attribute(other.topology['ap1'], 'location', 'lab2')
+        assert other.fingerprint() != fingerprint
+        assert list(other.topology.loaded()) == ['ap1']
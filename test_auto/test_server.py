@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 06:00
+# @Author  : FebSun
+# @FileName: test_server.py
+# @Software: PyCharm
+import os
+import stat
+import subprocess
+import sys
+import time
+from multiprocessing import AuthenticationError
+
+import pytest
+
+from core.resource.error import ResourceNotMeetConstraintError
+from core.resource.pool import ResourceError, ResourcePool
+from core.resource.server import PoolServer, ResourcePoolProxy, key_path
+from product.resource.constraint import ApMustHaveStaConnected, PhoneMustBeAndroidConstraint
+
+
+def build_file(lab, tmp_path):
+    rp = lab(5, stations=lambda number: number % 2 == 0)
+    for i in range(3):
+        rp.add_device(f'phone{i}', type='Android').version = 8 + i
+    file_name = str(tmp_path / 'pool.json')
+    rp.save(file_name)
+    return file_name
+
+
+@pytest.fixture
+def server(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    server = PoolServer(file_name, str(tmp_path / 'pool.sock')).start()
+    yield server
+    server.close()
+
+
+def proxy(server, owner='alice'):
+    rp = ResourcePoolProxy(server.address)
+    rp.load(server.filename, owner)
+    return rp
+
+
+def test_proxy_selection(server):
+    rp = proxy(server)
+    # load 之后本地没有任何设备
+    assert rp.topology.loaded() == dict()
+    assert [d.name for d in rp.collect_all_device(None, [PhoneMustBeAndroidConstraint('>=', 9)])] == \
+        ['phone1', 'phone2']
+    ap = rp.collect_device('AP', 1, [ApMustHaveStaConnected()])[0]
+    assert ap.name == 'ap0'
+    assert ap is rp.topology['ap0']
+    sta = ap.ports['WIFI'].remote_ports[0].parent
+    assert sta.name == 'sta0'
+    assert sta.ports['WIFI'].remote_ports[0].parent is ap
+    route = rp.collect_connection_route(ap, [ApMustHaveStaConnected()])
+    assert route[0][0] is sta.ports['WIFI']
+    with pytest.raises(ResourceNotMeetConstraintError):
+        rp.collect_connection_route(rp.topology['ap1'], [ApMustHaveStaConnected()])
+    assert len(rp.topology) == 11
+
+
+def test_proxy_batch(server):
+    rp = proxy(server)
+    results = rp.batch([('collect_all_device', ('AP',), {}),
+                        ('collect_device', ('STA', 5), {}),
+                        ('reserve_devices', ([],), {'lease': 10}),
+                        ('save', (), {})])
+    assert [d.name for d in results[0]] == ['ap0', 'ap1', 'ap2', 'ap3', 'ap4']
+    assert results[1] == list()
+    assert isinstance(results[3], ResourceError)
+    with pytest.raises(ResourceError):
+        rp.save(server.filename)
+
+
+def test_proxy_reservation(server):
+    alice = proxy(server, 'alice')
+    bob = proxy(server, 'bob')
+    alice.reserve_devices([alice.topology['ap0']])
+    with pytest.raises(ResourceError):
+        bob.reserve_devices([bob.topology['ap0']])
+    assert [d.name for d in bob.reserve_any('AP', 2)] == ['ap1', 'ap2']
+    alice.reserve()
+    assert alice.reserved['owner'] == 'alice'
+    with pytest.raises(ResourceError):
+        bob.reserve()
+    with pytest.raises(ResourceError):
+        proxy(server, 'bob')
+    # 占用记录在修改日志中，不经过服务进程的资源池同样可以看到
+    with pytest.raises(ResourceError):
+        ResourcePool().load(server.filename, 'bob')
+    alice.release()
+    bob.reserve()
+    assert proxy(server, 'bob').reserved['owner'] == 'bob'
+
+
+def test_server_requires_authkey(server):
+    # socket 和自动生成的 authkey 只有当前用户可以访问
+    assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(key_path(server.address)).st_mode) == 0o600
+    with pytest.raises(AuthenticationError):
+        ResourcePoolProxy(server.address, authkey=b'guess').load(server.filename, 'mallory')
+    assert proxy(server).reserved is None
+    address = server.address
+    server.close()
+    assert not os.path.exists(key_path(address))
+
+
+def test_server_process(lab, tmp_path):
+    file_name = build_file(lab, tmp_path)
+    address = str(tmp_path / 'pool.sock')
+    process = subprocess.Popen([sys.executable, '-m', 'core.resource.server', file_name, '--address', address],
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        deadline = time.time() + 10
+        while not os.path.exists(address) and time.time() < deadline:
+            time.sleep(0.05)
+        rp = ResourcePoolProxy(address)
+        rp.load(file_name, 'alice')
+        assert [d.name for d in rp.collect_all_device('Android')] == ['phone0', 'phone1', 'phone2']
+        rp.close()
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 19:10
+# @Author  : FebSun
+# @FileName: test_slots.py
+# @Software: PyCharm
+import pickle
+
+from core.resource.pool import ResourceDevice, register_attributes
+
+
+def build_device():
+    register_attributes('device', 'SlotPhone', ['version'])
+    register_attributes('port', 'SlotETH', ['speed'])
+    device = ResourceDevice('phone1', type='SlotPhone', version=10)
+    device.owner = 'lab'
+    port = device.add_port('ETH1/1', type='SlotETH')
+    port.speed = 1000
+    port.vlan = 10
+    device.add_port('WIFI', type='WIFI')
+    device.ports['ETH1/1'].remote_ports.append(device.ports['WIFI'])
+    return device
+
+
+def test_declared_attributes_use_slots():
+    device = build_device()
+    assert isinstance(device, ResourceDevice)
+    assert 'version' in type(device).__slots__
+    assert 'speed' in type(device.ports['ETH1/1']).__slots__
+    assert getattr(ResourceDevice('ap1', type='AP'), 'version', None) is None
+
+
+def test_to_dict_from_dict_round_trip():
+    device = build_device()
+    dict_obj = device.to_dict()
+    assert dict_obj['version'] == 10
+    assert dict_obj['owner'] == 'lab'
+    assert dict_obj['ports']['ETH1/1']['speed'] == 1000
+    assert dict_obj['ports']['ETH1/1']['vlan'] == 10
+    assert dict_obj['ports']['ETH1/1']['remote_ports'] == [{'device': 'phone1', 'port': 'WIFI'}]
+    copy = ResourceDevice.from_dict(dict_obj)
+    assert type(copy) is type(device)
+    assert type(copy.ports['ETH1/1']) is type(device.ports['ETH1/1'])
+    assert copy.ports['ETH1/1'].parent is copy
+    copy_dict = copy.to_dict()
+    # from_dict 不映射连接关系，由资源池负责
+    copy_dict['ports']['ETH1/1']['remote_ports'] = dict_obj['ports']['ETH1/1']['remote_ports']
+    assert copy_dict == dict_obj
+
+
+def test_pickle_generated_class():
+    device = build_device()
+    copy = pickle.loads(pickle.dumps(device))
+    assert copy.version == 10 and copy.owner == 'lab'
+    assert copy.ports['ETH1/1'].remote_ports[0] is copy.ports['WIFI']
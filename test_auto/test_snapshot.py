@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 16:30
+# @Author  : FebSun
+# @FileName: test_snapshot.py
+# @Software: PyCharm
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.resource.pool import ResourceError, ResourcePool
+from core.resource.predicate import AttrConstraint
+from core.resource.snapshot import json_to_snapshot, read_reserved, snapshot_to_json
+from product.resource.constraint import ApMustHaveStaConnected
+
+
+def build_pool(lab):
+    rp = lab(10)
+    rp.information = {'lab': 'sh'}
+    for i in range(10):
+        ap = rp.topology[f'ap{i}']
+        ap.description = f'AP {i}'
+        ap.version = '1.0'
+        rp.topology[f'sta{i}'].ports['WIFI'].speed = 300
+    return rp
+
+
+def test_json_snapshot_round_trip(lab, tmp_path):
+    json_file = str(tmp_path / 'pool.json')
+    snapshot_file = str(tmp_path / 'pool.snap')
+    back_file = str(tmp_path / 'back.json')
+    build_pool(lab).save(json_file)
+    json_to_snapshot(json_file, snapshot_file)
+    snapshot_to_json(snapshot_file, back_file)
+    with open(json_file) as file1, open(back_file) as file2:
+        assert json.load(file1) == json.load(file2)
+
+
+def test_snapshot_materializes_touched_devices(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    rp = ResourcePool()
+    rp.load(snapshot_file)
+    assert len(rp.topology) == 20
+    assert rp.topology.loaded() == dict()
+    ap = rp.topology['ap3']
+    assert (ap.version, ap.description) == ('1.0', 'AP 3')
+    assert list(rp.topology.loaded()) == ['ap3']
+    remote = ap.ports['WIFI'].remote_ports[0]
+    assert (remote.parent.name, remote.speed) == ('sta3', 300)
+    assert sorted(rp.topology.loaded()) == ['ap3', 'sta3']
+    assert remote.remote_ports[0] is ap.ports['WIFI']
+
+
+def test_snapshot_selection(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    rp = ResourcePool()
+    rp.load(snapshot_file, types=['AP'])
+    assert len(rp.collect_all_device('AP', [ApMustHaveStaConnected()])) == 10
+    assert len(rp.collect_device('STA', 2)) == 2
+
+
+def test_snapshot_index_follows_snapshot_order(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    rp = ResourcePool()
+    rp.load(snapshot_file)
+    # 先访问的设备不会排在前面
+    rp.topology['sta3']
+    rp.topology['sta1']
+    rp.add_device('sta10', type='STA')
+    assert [device.name for device in rp.index.devices('STA')] == ['sta1', 'sta3', 'sta10']
+    names = [f'sta{i}' for i in range(11)]
+    assert [device.name for device in rp.collect_all_device('STA')] == names
+    assert [device.name for device in rp.collect_all_device('STA', [AttrConstraint('type', '=', 'STA')])] == names
+    rp.rebuild_index()
+    assert [device.name for device in rp.index.devices('STA')] == names
+
+
+def test_snapshot_reserve_in_place(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    rp = ResourcePool()
+    rp.load(snapshot_file, owner='alice')
+    rp.reserve()
+    assert read_reserved(snapshot_file)['owner'] == 'alice'
+    with pytest.raises(ResourceError):
+        ResourcePool().load(snapshot_file, owner='bob')
+    rp.release()
+    assert read_reserved(snapshot_file) is None
+
+
+def test_snapshot_reserve_is_exclusive(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    pools = list()
+    for i in range(8):
+        rp = ResourcePool()
+        rp.load(snapshot_file, owner=f'user{i}')
+        pools.append(rp)
+    barrier = threading.Barrier(len(pools))
+
+    def reserve(rp):
+        barrier.wait()
+        try:
+            rp.reserve()
+            return rp.owner
+        except ResourceError:
+            return None
+
+    # 同时占用时只有一个成功，文件中记录的是成功的 owner
+    with ThreadPoolExecutor(len(pools)) as executor:
+        owners = [owner for owner in executor.map(reserve, pools) if owner is not None]
+    assert len(owners) == 1
+    assert read_reserved(snapshot_file)['owner'] == owners[0]
+
+
+def test_snapshot_to_dict_does_not_materialize_remote_devices(lab, tmp_path):
+    snapshot_file = str(tmp_path / 'pool.snap')
+    build_pool(lab).save_snapshot(snapshot_file)
+    rp = ResourcePool()
+    rp.load(snapshot_file)
+    assert rp.topology['ap3'].to_dict()['ports']['WIFI']['remote_ports'] == [{'device': 'sta3', 'port': 'WIFI'}]
+    assert list(rp.topology.loaded()) == ['ap3']
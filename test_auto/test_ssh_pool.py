@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 22:30
+# @Author  : FebSun
+# @FileName: test_ssh_pool.py
+# @Software: PyCharm
+import time
+import paramiko
+import pytest
+from test_auto.ssh_server import SshServer
+from thirdpart.commandline.pool import SshConnectionPool, SshPoolError
+from thirdpart.commandline.ssh import SshClient
+
+
+@pytest.fixture
+def server():
+    server = SshServer()
+    yield server
+    server.close()
+
+
+def make_client(server, pool):
+    return SshClient(server.host, server.port, server.username, server.password, pool=pool)
+
+
+def test_clients_share_transport(server):
+    pool = SshConnectionPool()
+    client1, client2 = make_client(server, pool), make_client(server, pool)
+    client1.connect()
+    client2.connect()
+    assert client1.ssh is client2.ssh
+    assert 'echo: hello' in client1.send_and_wait('hello', r'echo: hello')
+    assert 'echo: world' in client2.send_and_wait('world', r'echo: world')
+    client1.disconnect()
+    client2.disconnect()
+    # 归还之后再次连接不需要重新握手
+    client1.connect()
+    client1.disconnect()
+    assert server.connections == 1
+    assert pool.created == 1
+    pool.close_all()
+
+
+def test_shell_failure_keeps_shared_transport(server):
+    pool = SshConnectionPool()
+    client1, client2 = make_client(server, pool), make_client(server, pool)
+    client1.connect()
+    server.shell = False
+    with pytest.raises(paramiko.SSHException):
+        client2.connect()
+    # 连接本身正常，其他客户端继续使用
+    assert client1.ssh.get_transport().is_active()
+    assert 'echo: hello' in client1.send_and_wait('hello', r'echo: hello')
+    assert pool.created == 1
+    client1.disconnect()
+    pool.close_all()
+
+
+def test_limits(server):
+    pool = SshConnectionPool(max_per_host=1, max_sessions=1)
+    client = make_client(server, pool)
+    client.connect()
+    with pytest.raises(SshPoolError):
+        pool.acquire(server.host, server.port, server.username, server.password, timeout=0.2)
+    client.disconnect()
+    entry = pool.acquire(server.host, server.port, server.username, server.password, timeout=0.2)
+    pool.release(entry)
+    pool.close_all()
+
+
+def test_idle_eviction_and_health_check(server):
+    pool = SshConnectionPool(idle_timeout=0.1, check_interval=0)
+    client = make_client(server, pool)
+    client.connect()
+    client.disconnect()
+    time.sleep(0.2)
+    pool.evict_idle()
+    assert pool.connections() == 0
+
+    pool.idle_timeout = 300
+    client.connect()
+    client.disconnect()
+    server.drop_connections()
+    # 断开的连接在下次取出时被发现并重新建立
+    client.connect()
+    assert 'echo: again' in client.send_and_wait('again', r'echo: again', timeout=5)
+    client.disconnect()
+    assert pool.connections() == 1
+    assert server.connections == 3
+    pool.close_all()
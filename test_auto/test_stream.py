@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 23:50
+# @Author  : FebSun
+# @FileName: test_stream.py
+# @Software: PyCharm
+import re
+from test_auto.ssh_server import SshServer
+from thirdpart.commandline.pool import SshConnectionPool
+from thirdpart.commandline.ssh import SshClient
+from thirdpart.commandline.stream import OutputBuffer, compile_patterns
+
+
+def test_match_across_chunks_and_multiple_patterns():
+    buffer = OutputBuffer()
+    patterns = compile_patterns([r'Password:', r'router# $', re.compile('error', re.I)])
+    buffer.feed(b'show version\r\nrou')
+    assert buffer.search(patterns) is None
+    buffer.feed(b'ter# ')
+    number, match = buffer.search(patterns)
+    assert number == 1 and match.group() == b'router# '
+
+    buffer = OutputBuffer()
+    buffer.feed(b'ERROR: bad command\r\nrouter# ')
+    # 多个模式同时匹配时返回最先出现的
+    assert buffer.search(patterns)[0] == 2
+
+
+def test_bounded_size_and_lines():
+    buffer = OutputBuffer(max_size=1024)
+    lines = list()
+    for number in range(10000):
+        buffer.feed(b'%d\n' % number)
+        lines.extend(buffer.lines())
+        assert len(buffer) <= 1024
+    assert lines == [b'%d' % number for number in range(10000)]
+    buffer.feed(b'x' * 5000)
+    assert len(buffer) == 1024
+    assert buffer.dropped > 0
+    assert list(buffer.lines(final=True)) == [b'x' * 1024]
+
+
+def test_ssh_lines_and_expect():
+    server = SshServer()
+    pool = SshConnectionPool()
+    client = SshClient(server.host, server.port, server.username, server.password, pool=pool)
+    client.connect()
+    client.expect(r'\$ $', timeout=5)
+    # 缓冲区只有 4KB，输出约 110KB
+    lines = list(client.send_and_read_lines('seq 20000', r'(?m)^\$ $', timeout=10, max_size=4096))
+    assert lines == [str(number) for number in range(1, 20001)]
+    output = client.send_and_wait('hello', [r'not found', r'echo: hello'], timeout=5)
+    assert 'echo: hello' in output
+    client.disconnect()
+    pool.close_all()
+    server.close()
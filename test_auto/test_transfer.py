@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 00:40
+# @Author  : FebSun
+# @FileName: test_transfer.py
+# @Software: PyCharm
+import asyncio
+import os
+import pytest
+from test_auto.ssh_server import SshServer
+from thirdpart.commandline.pool import SshConnectionPool
+from thirdpart.commandline.ssh import AsyncSshClient, SshClient
+from thirdpart.commandline.transfer import TransferStats, send_to_many
+
+DATA = os.urandom(3 * (1 << 20) + 123)
+
+
+@pytest.fixture
+def pool():
+    pool = SshConnectionPool()
+    yield pool
+    pool.close_all()
+
+
+def make_server(tmp_path, name='dut', **kwargs):
+    root = tmp_path / name
+    root.mkdir()
+    return SshServer(root=str(root), **kwargs)
+
+
+def make_client(server, pool):
+    return SshClient(server.host, server.port, server.username, server.password, pool=pool)
+
+
+def test_send_file_and_resume(tmp_path, pool):
+    server = make_server(tmp_path)
+    image = tmp_path / 'image.bin'
+    image.write_bytes(DATA)
+    client = make_client(server, pool)
+    progress = list()
+    stats = client.send_binary(str(image), '/image.bin', chunk_size=1 << 20,
+                               progress=lambda done, total: progress.append(done))
+    assert (tmp_path / 'dut' / 'image.bin').read_bytes() == DATA
+    assert stats.transferred == len(DATA) and stats.throughput > 0
+    assert progress[-1] == len(DATA)
+
+    # 中断的传输从已有的位置继续
+    (tmp_path / 'dut' / 'image.bin').write_bytes(DATA[:1000000])
+    stats = client.send_binary(DATA, '/image.bin')
+    assert stats.offset == 1000000 and stats.transferred == len(DATA) - 1000000
+    assert (tmp_path / 'dut' / 'image.bin').read_bytes() == DATA
+
+    # 已有内容不一致时从头传输
+    (tmp_path / 'dut' / 'image.bin').write_bytes(b'x' * 1000)
+    assert client.send_binary(memoryview(DATA), '/image.bin').offset == 0
+    assert (tmp_path / 'dut' / 'image.bin').read_bytes() == DATA
+
+    # 已有部分的末尾一致、前面损坏时，续传校验失败之后从头重新传输
+    (tmp_path / 'dut' / 'image.bin').write_bytes(b'x' * 1000 + DATA[1000:2000000])
+    stats = client.send_binary(DATA, '/image.bin')
+    assert stats.offset == 0 and stats.transferred == len(DATA) * 2 - 2000000
+    assert (tmp_path / 'dut' / 'image.bin').read_bytes() == DATA
+    client.disconnect()
+    server.close()
+
+
+def test_receive_binary(tmp_path, pool):
+    # 设备不支持 sha256sum 时通过 SFTP 读回校验
+    server = make_server(tmp_path, exec_checksum=False)
+    (tmp_path / 'dut' / 'log.bin').write_bytes(DATA)
+    client = make_client(server, pool)
+    assert client.receive_binary('/log.bin') == DATA
+    destination = tmp_path / 'log.bin'
+    destination.write_bytes(DATA[:12345])
+    stats = client.receive_binary('/log.bin', str(destination))
+    assert stats.offset == 12345
+    assert destination.read_bytes() == DATA
+    client.disconnect()
+    server.close()
+
+
+def test_send_to_many(tmp_path, pool):
+    servers = [make_server(tmp_path, f'dut{i}') for i in range(3)]
+    image = tmp_path / 'image.bin'
+    image.write_bytes(DATA)
+    clients = [make_client(server, pool) for server in servers]
+    results = send_to_many(clients, str(image), '/image.bin', workers=3)
+    assert all(isinstance(result, TransferStats) for result in results)
+    for i in range(3):
+        assert (tmp_path / f'dut{i}' / 'image.bin').read_bytes() == DATA
+    for client, server in zip(clients, servers):
+        client.disconnect()
+        server.close()
+
+
+def test_async_client_binary(tmp_path, pool):
+    server = make_server(tmp_path)
+
+    async def run():
+        client = AsyncSshClient(server.host, server.port, server.username, server.password, pool=pool)
+        stats = await client.send_binary(DATA, '/image.bin')
+        assert stats.transferred == len(DATA)
+        assert await client.receive_binary('/image.bin') == DATA
+        await client.disconnect()
+
+    asyncio.run(run())
+    assert (tmp_path / 'dut' / 'image.bin').read_bytes() == DATA
+    server.close()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 07:50
+# @Author  : FebSun
+# @FileName: test_view.py
+# @Software: PyCharm
+import pytest
+
+from core.resource.error import ResourceNotMeetConstraintError
+from core.resource.pool import ResourceDevice, ResourceError
+from core.resource.predicate import AttrConstraint
+from product.resource.constraint import ApMustHaveStaConnected, DeviceMustHaveTrafficGeneratorConnected, \
+    TrafficGeneratorSpeedMustGreaterThen
+
+
+def build_pool(lab):
+    rp = lab(4, traffic_generator='ap')
+    for i in range(4):
+        ap = rp.topology[f'ap{i}']
+        ap.description = f'ap {i}'
+        ap.version = i
+    return rp
+
+
+def names(devices):
+    return [device.name for device in devices]
+
+
+def test_view_hides_devices_and_ports(lab):
+    rp = build_pool(lab)
+    version = rp.version
+    view = rp.view(hidden=['sta0', ('tg', 'ETH1/3')])
+    assert 'sta0' not in view.topology and len(view.topology) == 8
+    assert names(view.collect_all_device('AP', [ApMustHaveStaConnected()])) == ['ap1', 'ap2', 'ap3']
+    assert names(view.collect_all_device('AP', [DeviceMustHaveTrafficGeneratorConnected(
+        TrafficGeneratorSpeedMustGreaterThen(10000))])) == ['ap1']
+    assert list(view.topology['tg'].ports) == ['ETH1/0', 'ETH1/1', 'ETH1/2']
+    ap = view.topology['ap1']
+    assert isinstance(ap, ResourceDevice)
+    assert ap.ports['WIFI'].remote_ports[0].parent is view.topology['sta1']
+    with pytest.raises(ResourceNotMeetConstraintError):
+        view.collect_connection_route(rp.topology['ap0'], [ApMustHaveStaConnected()])
+    route = view.collect_connection_route(rp.topology['ap2'], [ApMustHaveStaConnected()])
+    assert route[0][0] is view.topology['sta2'].ports['WIFI']
+    # 资源池本身不受影响
+    assert rp.version == version
+    assert names(rp.collect_all_device('AP', [ApMustHaveStaConnected()])) == ['ap0', 'ap1', 'ap2', 'ap3']
+    assert names(rp.view(predicate=lambda device: device.type != 'STA').collect_all_device(
+        'AP', [ApMustHaveStaConnected()])) == []
+
+
+def test_view_copy_on_write(lab):
+    rp = build_pool(lab)
+    view = rp.view()
+    view.unlink(view.topology['ap0'].ports['WIFI'], view.topology['sta0'].ports['WIFI'])
+    view.link(rp.topology['ap0'].ports['WIFI'], rp.topology['sta3'].ports['WIFI'])
+    view.set_attribute(rp.topology['ap2'], 'version', 9)
+    view.set_attribute(rp.topology['tg'].ports['ETH1/0'], 'speed', 40000)
+    constraint = DeviceMustHaveTrafficGeneratorConnected(TrafficGeneratorSpeedMustGreaterThen(10000))
+    assert names(view.collect_all_device('AP', [constraint])) == ['ap0', 'ap1', 'ap3']
+    sta = view.topology['ap0'].ports['WIFI'].remote_ports[0].parent
+    assert sta.name == 'sta3'
+    assert len(view.topology['sta0'].ports['WIFI'].remote_ports) == 0
+    assert names(view.collect_all_device('AP', [AttrConstraint('version', '>=', 3)])) == ['ap2', 'ap3']
+    assert view.topology['ap2'].description == 'ap 2'
+    assert view.topology['ap2'].to_dict()['version'] == 9
+
+    assert rp.topology['ap0'].ports['WIFI'].remote_ports[0].parent.name == 'sta0'
+    assert len(rp.topology['sta3'].ports['WIFI'].remote_ports) == 1
+    assert rp.topology['ap2'].version == 2
+    assert rp.topology['tg'].ports['ETH1/0'].speed == 1000
+    assert names(rp.collect_all_device('AP', [constraint])) == ['ap1', 'ap3']
+    # 资源池的修改在视图中同样可见
+    rp.set_attribute(rp.topology['ap1'], 'version', 7)
+    assert names(view.collect_all_device('AP', [AttrConstraint('version', '>=', 3)])) == ['ap1', 'ap2', 'ap3']
+    with pytest.raises(ResourceError):
+        view.add_device('ap9', type='AP')
+    with pytest.raises(ResourceError):
+        view.topology['ap0'].add_port('ETH2', type='ETH')
+
+
+def test_view_indexed_attributes(lab):
+    rp = build_pool(lab)
+    rp.declare_index('version')
+    view = rp.view(hidden=['ap3'])
+    view.set_attribute(rp.topology['ap0'], 'version', 2)
+    results = view.collect_devices([('AP', None, [], {'version': 2}), ('AP', 1, [])], disjoint=True)
+    assert [names(devices) for devices in results] == [['ap0', 'ap2'], ['ap1']]
+    assert names(rp.collect_all_device('AP', attributes={'version': 2})) == ['ap2']
+    # 修改属性之后才满足条件的设备按资源池的顺序排列，与修改的先后无关
+    view.set_attribute(rp.topology['ap1'], 'version', 7)
+    view.set_attribute(rp.topology['ap0'], 'version', 7)
+    assert names(view.index.devices('AP', version=7)) == ['ap0', 'ap1']
@@ -41,3 +41,48 @@ class CommandLine(metaclass=ABCMeta):
     @abstractmethod
     def _login(self):
         pass
+
+
+class AsyncCommandLine(metaclass=ABCMeta):
+    """
+    CommandLine 的异步版本，用于同时操作大量设备
+    """
+
+    @abstractmethod
+    async def send(self, string):
+        pass
+
+    @abstractmethod
+    async def send_and_wait(self, string, wait_for, timeout=60, **kwargs):
+        pass
+
+    @abstractmethod
+    async def receive(self):
+        pass
+
+    @abstractmethod
+    async def send_binary(self, binary):
+        pass
+
+    @abstractmethod
+    async def receive_binary(self):
+        pass
+
+    @abstractmethod
+    async def connect(self):
+        pass
+
+    @abstractmethod
+    async def disconnect(self):
+        pass
+
+    @abstractmethod
+    async def _login(self):
+        pass
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 23:00
+# @Author  : FebSun
+# @FileName: fanout.py
+# @Software: PyCharm
+import asyncio
+import time
+from core.resource.comm import comm_key, comm_registry
+from .base import AsyncCommandLine
+
+
+class FanOutResult:
+    """
+    一台设备的执行结果，失败或超时时 output 为 None，error 为对应的异常
+    """
+
+    def __init__(self, device, output=None, error=None, elapsed=0.0):
+        self.device = device
+        self.output = output
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else f"{type(self.error).__name__}: {self.error}"
+        return f"FanOutResult({getattr(self.device, 'name', self.device)}, {status}, {self.elapsed:.3f}s)"
+
+
+async def _call(comm, method, *args):
+    """
+    异步接口直接等待，同步的 CommandLine 放到线程池中执行
+    """
+    if isinstance(comm, AsyncCommandLine):
+        return await getattr(comm, method)(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, getattr(comm, method), *args)
+
+
+async def _run(device, string, wait_for, timeout, semaphore, disconnect):
+    async with semaphore:
+        start = time.monotonic()
+        comm = None
+        cached = False
+        try:
+            comm = device.get_comm_instance()
+            # 资源池缓存的实例由作用域统一关闭，执行完之后不断开
+            cached = comm_key(device) in comm_registry
+            # timeout 包括建立连接的时间
+            output = await asyncio.wait_for(_send_and_wait(comm, string, wait_for, timeout), timeout)
+            return FanOutResult(device, output, elapsed=time.monotonic() - start)
+        except Exception as error:
+            return FanOutResult(device, error=error, elapsed=time.monotonic() - start)
+        finally:
+            if comm is not None and disconnect and not cached:
+                try:
+                    await _call(comm, 'disconnect')
+                except Exception:
+                    pass
+
+
+async def _send_and_wait(comm, string, wait_for, timeout):
+    await _call(comm, 'connect')
+    return await _call(comm, 'send_and_wait', string, wait_for, timeout)
+
+
+async def fan_out(devices, string, wait_for, timeout=60, concurrency=32, disconnect=True):
+    """
+    在多台设备（ResourceDevice 或 DevicePort）上同时执行 send_and_wait，
+    最多同时操作 concurrency 台设备，每台设备单独计算超时，按完成的先后顺序产生 FanOutResult。
+    disconnect 为 True 时执行之后断开连接，资源池按作用域缓存的实例除外：
+
+        async for result in fan_out(devices, 'iw dev wlan0 link', r'\\$ $', timeout=10):
+            print(result)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [asyncio.ensure_future(_run(device, string, wait_for, timeout, semaphore, disconnect))
+             for device in devices]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def fan_out_all(devices, string, wait_for, timeout=60, concurrency=32, disconnect=True):
+    """
+    fan_out 的同步入口，返回与 devices 顺序相同的结果列表
+    """
+
+    async def collect():
+        results = {id(result.device): result async for result in
+                   fan_out(devices, string, wait_for, timeout, concurrency, disconnect)}
+        return [results[id(device)] for device in devices]
+
+    return asyncio.run(collect())
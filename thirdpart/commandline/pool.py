@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 22:10
+# @Author  : FebSun
+# @FileName: pool.py
+# @Software: PyCharm
+import atexit
+import os
+import threading
+import time
+import paramiko
+
+
+class SshPoolError(Exception):
+    pass
+
+
+class PooledTransport:
+    """
+    连接池中的一个 SSH 连接，多个 SshClient 在同一个 transport 上各自打开 channel
+    """
+
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.transport = client.get_transport()
+        self.users = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+
+    def is_active(self):
+        return self.transport is not None and self.transport.is_active()
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception:
+            pass
+
+
+class SshConnectionPool:
+    """
+    进程内共享的 SSH 连接池，以 (host, port, username) 为键：
+    每个连接最多同时提供 max_sessions 个 channel，每个键最多建立 max_per_host 个连接，
+    达到上限时等待其他用户归还；空闲超过 idle_timeout 秒的连接被关闭，
+    连接空闲超过 check_interval 秒之后再次取出时先做一次健康检查
+    """
+
+    def __init__(self, max_per_host=4, max_sessions=8, idle_timeout=300, keepalive=30, check_interval=30,
+                 connect_timeout=10):
+        self.max_per_host = max_per_host
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.check_interval = check_interval
+        self.connect_timeout = connect_timeout
+        self.created = 0
+        self._entries = dict()
+        self._connecting = dict()
+        self._condition = threading.Condition()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # fork 出来的子进程不能使用父进程的连接，直接丢弃而不关闭
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._entries = dict()
+            self._connecting = dict()
+
+    def _healthy(self, entry):
+        if not entry.is_active():
+            return False
+        now = time.monotonic()
+        if now - entry.last_checked < self.check_interval:
+            return True
+        try:
+            entry.transport.send_ignore()
+        except Exception:
+            return False
+        entry.last_checked = now
+        return True
+
+    def acquire(self, host, port, username, password=None, timeout=None, **kwargs):
+        """
+        取出一个可以打开新 channel 的连接，用完之后必须调用 release 归还，
+        kwargs 原样传递给 paramiko.SSHClient.connect
+        """
+        key = (host, port, username)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._check_fork()
+            while True:
+                self._evict_idle()
+                entries = self._entries.setdefault(key, list())
+                candidates = list()
+                for entry in list(entries):
+                    if entry.users >= self.max_sessions:
+                        continue
+                    if self._healthy(entry):
+                        candidates.append(entry)
+                    elif entry.users <= 0:
+                        entries.remove(entry)
+                        entry.close()
+                # 优先复用使用者最少的连接
+                if candidates:
+                    entry = min(candidates, key=lambda item: item.users)
+                    entry.users += 1
+                    entry.last_used = time.monotonic()
+                    return entry
+                if len(entries) + self._connecting.get(key, 0) < self.max_per_host:
+                    self._connecting[key] = self._connecting.get(key, 0) + 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise SshPoolError(f"no ssh connection to {username}@{host}:{port} available")
+                self._condition.wait(remaining)
+        # 握手和登录比较慢，在锁外进行
+        try:
+            entry = PooledTransport(key, self._connect(host, port, username, password, **kwargs))
+        except BaseException:
+            with self._condition:
+                self._connecting[key] -= 1
+                self._condition.notify_all()
+            raise
+        with self._condition:
+            self._connecting[key] -= 1
+            entry.users = 1
+            self._entries.setdefault(key, list()).append(entry)
+            self.created += 1
+        return entry
+
+    def _connect(self, host, port, username, password, **kwargs):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        kwargs.setdefault('timeout', self.connect_timeout)
+        client.connect(host, port, username, password, **kwargs)
+        if self.keepalive:
+            client.get_transport().set_keepalive(self.keepalive)
+        return client
+
+    def release(self, entry):
+        """
+        归还连接，连接已经断开时从连接池中移除
+        """
+        with self._condition:
+            entry.users -= 1
+            entry.last_used = time.monotonic()
+            if not entry.is_active():
+                entries = self._entries.get(entry.key, list())
+                if entry in entries:
+                    entries.remove(entry)
+                if entry.users <= 0:
+                    entry.close()
+            self._evict_idle()
+            self._condition.notify_all()
+
+    def discard(self, entry):
+        """
+        归还一个已经不可用的连接，连接被关闭并从连接池中移除，其他使用者的 channel 也会随之关闭
+        """
+        with self._condition:
+            entry.users -= 1
+            entries = self._entries.get(entry.key, list())
+            if entry in entries:
+                entries.remove(entry)
+            entry.close()
+            self._condition.notify_all()
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for key, entries in self._entries.items():
+            for entry in list(entries):
+                if entry.users <= 0 and now - entry.last_used >= self.idle_timeout:
+                    entries.remove(entry)
+                    entry.close()
+
+    def evict_idle(self):
+        with self._condition:
+            self._evict_idle()
+
+    def connections(self, host=None, port=None, username=None):
+        """
+        连接池中的连接数量，参数为 None 时不作为过滤条件
+        """
+        with self._condition:
+            return sum(len(entries) for key, entries in self._entries.items()
+                       if all(want is None or want == value for want, value in zip((host, port, username), key)))
+
+    def close_all(self):
+        with self._condition:
+            for entries in self._entries.values():
+                for entry in entries:
+                    entry.close()
+            self._entries = dict()
+            self._condition.notify_all()
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool():
+    """
+    进程内默认的连接池，进程退出时关闭所有连接
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = SshConnectionPool()
+            atexit.register(_default_pool.close_all)
+        return _default_pool
@@ -4,26 +4,261 @@
 # @Author  : FebSun
 # @FileName: ssh.py
 # @Software: PyCharm
+import asyncio
+import time
+from functools import partial
 import paramiko
-from .base import CommandLine
+from .base import AsyncCommandLine, CommandLine
+from .pool import get_default_pool
+from .stream import OutputBuffer, compile_patterns
+from .transfer import receive_file, send_file
 
 
 class SshClient(CommandLine):
-    def __init__(self, host, port, username, password, **kwargs):
+    def __init__(self, host, port, username, password, pool=None, **kwargs):
         self.host = host
         self.port = port
         self.username = username
         self.password = password
+        # 默认使用进程内共享的连接池，同一台设备的多个 SshClient 复用同一个 SSH 连接
+        self.pool = pool or get_default_pool()
+        self.connect_kwargs = kwargs
         self.ssh = None
         self.session = None
+        self._sftp = None
+        self._entry = None
 
     def connect(self):
-        if self.ssh is None:
+        if self.session is None:
+            for attempt in range(2):
+                self._entry = self.pool.acquire(self.host, self.port, self.username, self.password,
+                                                **self.connect_kwargs)
+                self.ssh = self._entry.client
+                try:
+                    self.session = self._entry.transport.open_session()
+                    self._login()
+                    return
+                except (paramiko.SSHException, OSError, EOFError):
+                    if self.session is not None and self._entry.transport.is_active():
+                        # 连接正常、只是打开 shell 失败时不丢弃共享的连接，其他客户端还在使用
+                        self.disconnect()
+                        raise
+                    # 健康检查不一定能及时发现断开的连接，丢弃该连接后用新连接重试一次
+                    self.pool.discard(self._entry)
+                    self._entry = None
+                    self.disconnect()
+                    if attempt:
+                        raise
+                except BaseException:
+                    self.disconnect()
+                    raise
+
+    def disconnect(self):
+        if self._sftp is not None:
+            self._sftp.close()
+            self._sftp = None
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        if self._entry is not None:
+            # 只关闭自己的 channel，SSH 连接归还给连接池
+            self.pool.release(self._entry)
+            self._entry = None
+            self.ssh = None
+
+    def _login(self):
+        # 认证在建立 SSH 连接时已经完成，这里只需要打开交互式 shell
+        self.session.get_pty()
+        self.session.invoke_shell()
+
+    def send(self, string):
+        self.session.sendall(f"{string}\n".encode())
+
+    def receive(self):
+        data = b''
+        while self.session.recv_ready():
+            data += self.session.recv(65536)
+        return data.decode(errors='replace')
+
+    def _read_until(self, buffer, patterns, timeout):
+        """
+        持续接收数据直到 buffer 中出现任意一个模式，每次收到数据之后产生一次 None，
+        最后产生 (模式序号, match)，超时抛出 TimeoutError
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"waiting for {[pattern.pattern for pattern in patterns]} timeout, "
+                                   f"received: {buffer.text()[-1024:]}")
+            self.session.settimeout(remaining)
             try:
-                self.ssh = paramiko.SSHClient()
-                self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                self.ssh.connect(self.host, self.port, self.username, self.password)
-                trans = self.ssh.get_transport()
-                # self.session = trans.o
-            except:
-                pass
+                # 每次最多接收缓冲区剩余的空间，调用者来得及取走数据时不会丢失输出，
+                # 一行比整个缓冲区还长时只能丢弃
+                available = buffer.available()
+                chunk = self.session.recv(min(65536, available) if available > 0 else 4096)
+            except OSError:
+                continue
+            if not chunk:
+                raise ConnectionError(f"ssh session to {self.host} closed, received: {buffer.text()[-1024:]}")
+            buffer.feed(chunk)
+            found = buffer.search(patterns)
+            if found is not None:
+                yield found
+                return
+            yield None
+
+    def expect(self, wait_for, timeout=60, max_size=1 << 20):
+        """
+        等待输出中出现 wait_for 中的任意一个正则表达式，返回 (模式序号, match, 输出)，
+        输出只保留最后 max_size 字节
+        """
+        buffer = OutputBuffer(max_size)
+        for found in self._read_until(buffer, compile_patterns(wait_for), timeout):
+            if found is not None:
+                number, match = found
+                return number, match, buffer.text()
+
+    def send_and_wait(self, string, wait_for, timeout=60, **kwargs):
+        """
+        发送命令并等待输出中出现 wait_for（一个或多个正则表达式），返回收到的输出，超时抛出 TimeoutError。
+        新收到的数据只扫描一次，输出超过 max_size（默认 1MB）时只保留末尾
+        """
+        self.send(string)
+        return self.expect(wait_for, timeout, kwargs.get('max_size', 1 << 20))[2]
+
+    def send_and_read_lines(self, string, wait_for, timeout=60, max_size=1 << 20):
+        """
+        发送命令并逐行产生输出（str，不包括换行符），直到出现 wait_for 为止，
+        已经产生的行不再保留，适合处理很大的输出；出现 wait_for 的最后一行不会产生
+        """
+        self.send(string)
+        buffer = OutputBuffer(max_size)
+        for found in self._read_until(buffer, compile_patterns(wait_for), timeout):
+            if found is not None:
+                # 只产生匹配位置之前的完整行
+                end = found[1].start()
+                for line in buffer.lines():
+                    if buffer.consumed > end:
+                        return
+                    yield line.decode(errors='replace')
+                return
+            for line in buffer.lines():
+                yield line.decode(errors='replace')
+
+    @property
+    def sftp(self):
+        """
+        在连接池的 SSH 连接上打开的 SFTP 会话，disconnect 时关闭
+        """
+        if self._sftp is None:
+            self.connect()
+            self._sftp = self._entry.transport.open_sftp_client()
+        return self._sftp
+
+    def send_binary(self, binary, remote_path=None, **kwargs):
+        """
+        把 binary（本地文件路径、bytes 或 memoryview）写到设备的 remote_path，返回 TransferStats，
+        kwargs 为 resume、verify、chunk_size、progress，参见 transfer.send_file
+        """
+        if remote_path is None:
+            raise ValueError("remote_path is required to send binary over ssh")
+        return send_file(self._entry_transport(), self.sftp, binary, remote_path, **kwargs)
+
+    def receive_binary(self, remote_path=None, destination=None, **kwargs):
+        """
+        读取设备上的 remote_path，destination 为 None 时返回 bytes，否则写入本地文件并返回 TransferStats
+        """
+        if remote_path is None:
+            raise ValueError("remote_path is required to receive binary over ssh")
+        data, stats = receive_file(self._entry_transport(), self.sftp, remote_path, destination, **kwargs)
+        return stats if destination is not None else data
+
+    def _entry_transport(self):
+        self.connect()
+        return self._entry.transport
+
+
+class AsyncSshClient(AsyncCommandLine):
+    """
+    SshClient 的异步版本：握手和打开 shell 在线程池中完成（同样使用连接池），
+    之后通过 channel 的 fileno 注册到事件循环中读取数据，等待输出时不占用线程
+    """
+
+    def __init__(self, host, port, username, password, pool=None, **kwargs):
+        self.client = SshClient(host, port, username, password, pool, **kwargs)
+        self.host = host
+
+    @property
+    def session(self):
+        return self.client.session
+
+    async def connect(self):
+        if self.session is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.client.connect)
+            await self._login()
+
+    async def disconnect(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.client.disconnect)
+
+    async def _login(self):
+        # SshClient.connect 已经打开了交互式 shell
+        self.session.fileno()
+
+    async def send(self, string):
+        self.session.sendall(f"{string}\n".encode())
+
+    async def _wait_readable(self):
+        if self.session.recv_ready() or self.session.closed or self.session.eof_received:
+            return
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        fileno = self.session.fileno()
+        loop.add_reader(fileno, lambda: readable.done() or readable.set_result(None))
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fileno)
+
+    def _read(self):
+        data = b''
+        while self.session.recv_ready():
+            data += self.session.recv(65536)
+        return data
+
+    async def receive(self):
+        return self._read().decode(errors='replace')
+
+    async def send_and_wait(self, string, wait_for, timeout=60, **kwargs):
+        """
+        发送命令并等待输出中出现 wait_for（一个或多个正则表达式），返回收到的输出，超时抛出 TimeoutError
+        """
+        await self.send(string)
+        patterns = compile_patterns(wait_for)
+        buffer = OutputBuffer(kwargs.get('max_size', 1 << 20))
+
+        async def wait():
+            while True:
+                await self._wait_readable()
+                chunk = self._read()
+                if not chunk and (self.session.closed or self.session.eof_received):
+                    raise ConnectionError(f"ssh session to {self.host} closed, received: {buffer.text()[-1024:]}")
+                buffer.feed(chunk)
+                if buffer.search(patterns) is not None:
+                    return buffer.text()
+
+        try:
+            return await asyncio.wait_for(wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"waiting for {wait_for} timeout, received: {buffer.text()[-1024:]}") from None
+
+    async def send_binary(self, binary, remote_path=None, **kwargs):
+        """
+        SFTP 传输在线程池中执行，参数与 SshClient.send_binary 相同
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.client.send_binary, binary, remote_path, **kwargs))
+
+    async def receive_binary(self, remote_path=None, destination=None, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.client.receive_binary, remote_path, destination, **kwargs))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/18 23:30
+# @Author  : FebSun
+# @FileName: stream.py
+# @Software: PyCharm
+import re
+
+
+def compile_patterns(wait_for):
+    """
+    把一个或多个 str/bytes 正则表达式编译成 bytes 模式的列表
+    """
+    if isinstance(wait_for, (str, bytes, re.Pattern)):
+        wait_for = [wait_for]
+    ret = list()
+    for pattern in wait_for:
+        if isinstance(pattern, re.Pattern):
+            if isinstance(pattern.pattern, str):
+                pattern = re.compile(pattern.pattern.encode(), pattern.flags & ~re.UNICODE)
+        else:
+            pattern = re.compile(pattern.encode() if isinstance(pattern, str) else pattern)
+        ret.append(pattern)
+    return ret
+
+
+class OutputBuffer:
+    """
+    设备输出的有界缓冲区：
+    正则表达式直接在 bytearray 上从上次扫描的位置继续搜索（最多回退 window 字节，用于跨数据块的匹配），
+    每个数据块只扫描一次；超过 max_size 时丢弃最早的数据，已经通过 lines() 取走的数据会被回收，
+    缓冲区的内存占用与输出的总长度无关
+    """
+
+    def __init__(self, max_size=1 << 20, window=4096):
+        self.max_size = max_size
+        self.window = window
+        self.dropped = 0
+        self._data = bytearray()
+        self._scanned = 0
+        self._consumed = 0
+        # _consumed 到 _newline 之间没有换行符，查找下一行时从 _newline 开始
+        self._newline = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def consumed(self):
+        """
+        已经通过 lines() 取走的数据在缓冲区中的结束位置
+        """
+        return self._consumed
+
+    def feed(self, data):
+        data = memoryview(data)
+        if len(data) > self.max_size:
+            # 单个数据块超过上限时只保留末尾，memoryview 切片不复制数据
+            self.dropped += len(data) - self.max_size
+            data = data[len(data) - self.max_size:]
+        self._data += data
+        overflow = len(self._data) - self.max_size
+        if overflow > 0:
+            # 优先回收已经取走的数据，仍然超过上限时才丢弃尚未取走的数据
+            self.dropped += max(0, overflow - self._consumed)
+            self._discard(max(overflow, self._consumed))
+        elif self._consumed > 65536 and self._consumed * 2 > len(self._data):
+            self._discard(self._consumed)
+
+    def available(self):
+        """
+        不丢弃未取走的数据时还能写入的字节数
+        """
+        return self.max_size - len(self._data) + self._consumed
+
+    def _discard(self, size):
+        del self._data[:size]
+        self._scanned = max(0, self._scanned - size)
+        self._consumed = max(0, self._consumed - size)
+        self._newline = max(self._consumed, self._newline - size)
+
+    def search(self, patterns):
+        """
+        在新收到的数据中搜索，返回最先出现的 (模式序号, match)，没有匹配时返回 None
+        """
+        start = max(0, self._scanned - self.window)
+        found = None
+        for number, pattern in enumerate(patterns):
+            match = pattern.search(self._data, start)
+            if match is not None and (found is None or match.start() < found[1].start()):
+                found = (number, match)
+        self._scanned = len(self._data)
+        return found
+
+    def lines(self, final=False):
+        """
+        取出已经完整的行（不包括换行符），final 为 True 时连同最后不完整的一行一起取出
+        """
+        data = self._data
+        while True:
+            end = data.find(b'\n', max(self._consumed, self._newline))
+            if end < 0:
+                self._newline = len(data)
+                break
+            line = bytes(data[self._consumed:end]).rstrip(b'\r')
+            self._consumed = end + 1
+            yield line
+        if final and self._consumed < len(data):
+            line = bytes(data[self._consumed:]).rstrip(b'\r')
+            self._consumed = self._newline = len(data)
+            yield line
+
+    def getvalue(self):
+        return bytes(self._data)
+
+    def text(self):
+        return self._data.decode(errors='replace')
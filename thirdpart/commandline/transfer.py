@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/19 00:10
+# @Author  : FebSun
+# @FileName: transfer.py
+# @Software: PyCharm
+import hashlib
+import mmap
+import os
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+CHUNK_SIZE = 1 << 20
+# 断点续传时比较远端已有数据末尾的长度
+RESUME_CHECK_SIZE = 1 << 16
+
+
+class TransferError(Exception):
+    pass
+
+
+class TransferStats:
+    """
+    一次传输的统计信息，transferred 为实际传输的字节数（不包括断点续传跳过的部分）
+    """
+
+    def __init__(self, path, size, offset=0):
+        self.path = path
+        self.size = size
+        self.offset = offset
+        self.transferred = 0
+        self.elapsed = 0.0
+        self.checksum = None
+
+    @property
+    def throughput(self):
+        """
+        吞吐量，字节/秒
+        """
+        return self.transferred / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return f"TransferStats({self.path}, {self.transferred}/{self.size} bytes, resumed from {self.offset}, " \
+               f"{self.throughput / (1 << 20):.1f}MB/s)"
+
+
+@contextmanager
+def open_source(source):
+    """
+    把文件路径、bytes、bytearray 或 memoryview 统一成只读的 memoryview，
+    文件通过 mmap 映射，不会整个读入内存
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield memoryview(source).cast('B')
+        return
+    with open(source, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+
+
+def _sha256(view, chunk_size=CHUNK_SIZE):
+    digest = hashlib.sha256()
+    for offset in range(0, len(view), chunk_size):
+        digest.update(view[offset:offset + chunk_size])
+    return digest.hexdigest()
+
+
+def remote_sha256(transport, sftp, path):
+    """
+    远端文件的 sha256：优先在设备上执行 sha256sum，设备不支持时通过 SFTP 读回计算
+    """
+    try:
+        channel = transport.open_session()
+        try:
+            channel.exec_command(f"sha256sum {shlex.quote(path)}")
+            output = b''
+            while True:
+                data = channel.recv(4096)
+                if not data:
+                    break
+                output += data
+            if channel.recv_exit_status() == 0 and output:
+                return output.split()[0].decode()
+        finally:
+            channel.close()
+    except Exception:
+        pass
+    digest = hashlib.sha256()
+    with sftp.open(path, 'rb') as file:
+        file.prefetch()
+        while True:
+            data = file.read(CHUNK_SIZE)
+            if not data:
+                break
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _remote_size(sftp, path):
+    try:
+        return sftp.stat(path).st_size
+    except IOError:
+        return None
+
+
+def send_file(transport, sftp, source, path, resume=True, verify=True, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    把 source（文件路径或内存数据）通过 SFTP 写到远端 path，返回 TransferStats。
+    resume 为 True 时远端已有的部分在末尾数据一致的情况下跳过，verify 为 True 时传输之后比较 sha256，
+    续传的结果校验失败时（远端已有部分的前面不一致）从头重新传输一次，仍然失败时删除远端文件，
+    避免之后的续传一直基于错误的数据。progress(已完成字节数, 总字节数) 在每个数据块写完之后调用
+    """
+    with open_source(source) as view:
+        size = len(view)
+        offset = 0
+        if resume:
+            remote = _remote_size(sftp, path)
+            if remote and remote <= size:
+                # 只比较已有数据的末尾，远端内容不一致时从头传输
+                start = max(0, remote - RESUME_CHECK_SIZE)
+                with sftp.open(path, 'rb') as file:
+                    file.seek(start)
+                    if file.read(remote - start) == view[start:remote]:
+                        offset = remote
+        stats = TransferStats(path, size, offset)
+        _write(sftp, view, path, offset, chunk_size, progress, stats)
+        if verify:
+            stats.checksum = _sha256(view)
+            if remote_sha256(transport, sftp, path) != stats.checksum and offset:
+                stats.offset = 0
+                _write(sftp, view, path, 0, chunk_size, progress, stats)
+            if remote_sha256(transport, sftp, path) != stats.checksum:
+                sftp.remove(path)
+                raise TransferError(f"checksum of {path} mismatch after transfer")
+    return stats
+
+
+def _write(sftp, view, path, offset, chunk_size, progress, stats):
+    size = len(view)
+    begin = time.monotonic()
+    with sftp.open(path, 'r+b' if offset else 'wb') as file:
+        # 不等待每个写请求的响应，由 SFTP 流水线发送
+        file.set_pipelined(True)
+        file.seek(offset)
+        for position in range(offset, size, chunk_size):
+            # 切片不复制数据，也不保留对映射内存的引用，mmap 才能正常关闭
+            end = min(position + chunk_size, size)
+            file.write(view[position:end])
+            stats.transferred += end - position
+            if progress is not None:
+                progress(end, size)
+        if size < (_remote_size(sftp, path) or 0):
+            file.truncate(size)
+    stats.elapsed += time.monotonic() - begin
+
+
+def receive_file(transport, sftp, path, destination=None, resume=True, verify=True, chunk_size=CHUNK_SIZE,
+                 progress=None):
+    """
+    读取远端 path。destination 为 None 时返回 (bytes, TransferStats)，
+    否则流式写入本地文件并返回 (None, TransferStats)，本地文件已有的部分在 resume 为 True 时跳过
+    """
+    size = sftp.stat(path).st_size
+    offset = 0
+    if destination is not None and resume and os.path.exists(destination):
+        offset = os.path.getsize(destination)
+        if offset > size:
+            offset = 0
+    stats = TransferStats(path, size, offset)
+    digest = hashlib.sha256()
+    begin = time.monotonic()
+    if destination is None:
+        target = bytearray()
+    else:
+        target = open(destination, 'r+b' if offset else 'wb')
+    try:
+        if offset:
+            # 已有部分也要参与校验
+            target.seek(0)
+            while target.tell() < offset:
+                digest.update(target.read(min(chunk_size, offset - target.tell())))
+            target.seek(offset)
+            target.truncate()
+        with sftp.open(path, 'rb') as file:
+            file.seek(offset)
+            file.prefetch(size - offset)
+            while True:
+                data = file.read(chunk_size)
+                if not data:
+                    break
+                digest.update(data)
+                if destination is None:
+                    target += data
+                else:
+                    target.write(data)
+                stats.transferred += len(data)
+                if progress is not None:
+                    progress(offset + stats.transferred, size)
+    finally:
+        if destination is not None:
+            target.close()
+    stats.elapsed = time.monotonic() - begin
+    stats.checksum = digest.hexdigest()
+    if verify and remote_sha256(transport, sftp, path) != stats.checksum:
+        raise TransferError(f"checksum of {path} mismatch after transfer")
+    return (bytes(target) if destination is None else None), stats
+
+
+def send_to_many(clients, source, path, workers=8, **kwargs):
+    """
+    把同一个 source 同时发送给多个 SshClient，文件只映射一次，
+    返回与 clients 顺序相同的列表，每一项为 TransferStats 或者传输失败时的异常
+    """
+
+    def send(client):
+        try:
+            client.connect()
+            return client.send_binary(view, path, **kwargs)
+        except Exception as error:
+            return error
+
+    with open_source(source) as view:
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(send, clients))